@@ -3,10 +3,14 @@ Core Runner API Server
 FastAPI сервер для выполнения JALM-интентов
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from datetime import datetime, timezone
+from itertools import islice
+import bisect
 import json
 import os
 import sys
@@ -17,6 +21,8 @@ import asyncio
 # Добавляем путь к ядру
 sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
 
+from execution_store import decode_cursor, encode_cursor
+
 # Импорт ядра исполнения
 try:
     from main import JALMExecutor
@@ -30,6 +36,7 @@ except ImportError:
             execution_id = str(uuid.uuid4())
             self.executions[execution_id] = {
                 "status": "completed",
+                "created_at": datetime.now(timezone.utc).isoformat(),
                 "result": {"message": "Mock execution", "intent": intent_content},
                 "params": params or {}
             }
@@ -74,6 +81,78 @@ class ExecutionStatus(BaseModel):
     created_at: str
     updated_at: str
 
+# Время создания для записей без created_at
+DEFAULT_CREATED_AT = "2024-01-01T00:00:00Z"
+
+def _created_at(exec_data: Dict[str, Any]) -> datetime:
+    """Время создания выполнения"""
+    value = exec_data.get("created_at", DEFAULT_CREATED_AT)
+    created = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return created if created.tzinfo else created.replace(tzinfo=timezone.utc)
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Приведение границы фильтра к UTC"""
+    if value is None:
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+# Ключи (created_ts, execution_id) по возрастанию для keyset-пагинации
+_order: List[Tuple[float, str]] = []
+
+def _sorted_keys() -> List[Tuple[float, str]]:
+    """
+    Упорядоченные ключи выполнений
+
+    Новые выполнения добавляются в конец словаря, поэтому индекс
+    дополняется только хвостом; при удалении строится заново.
+    """
+    executions = executor.executions
+    if len(executions) < len(_order):
+        _order.clear()
+    for exec_id, exec_data in islice(executions.items(), len(_order), None):
+        bisect.insort(_order, (_created_at(exec_data).timestamp(), exec_id))
+    return _order
+
+def _page_executions(status: Optional[str], created_after: Optional[datetime],
+                     created_before: Optional[datetime], cursor_key: Optional[Tuple[float, str]],
+                     limit: int) -> Tuple[List[Dict[str, Any]], Optional[Tuple[float, str]]]:
+    """
+    Страница выполнений от новых к старым
+
+    Курсор - ключ (created_ts, execution_id) последнего выполнения страницы:
+    новые выполнения между запросами не сдвигают следующие страницы,
+    а начало страницы находится бинарным поиском.
+    """
+    keys = _sorted_keys()
+    created_after = _as_utc(created_after)
+    created_before = _as_utc(created_before)
+    after_ts = created_after.timestamp() if created_after else None
+
+    position = len(keys)
+    if cursor_key is not None:
+        position = min(position, bisect.bisect_left(keys, cursor_key))
+    if created_before is not None:
+        position = min(position, bisect.bisect_left(keys, (created_before.timestamp(), "")))
+
+    page = []
+    while position > 0:
+        position -= 1
+        created_ts, exec_id = keys[position]
+        if after_ts is not None and created_ts < after_ts:
+            # Дальше только более старые выполнения
+            return page, None
+        exec_data = executor.executions.get(exec_id)
+        if exec_data is None or (status and exec_data["status"] != status):
+            continue
+        page.append({
+            "execution_id": exec_id,
+            "status": exec_data["status"],
+            "created_at": exec_data.get("created_at", DEFAULT_CREATED_AT)
+        })
+        if len(page) == limit:
+            return page, (keys[position] if position > 0 else None)
+    return page, None
+
 # API endpoints
 @app.get("/")
 async def root():
@@ -123,22 +202,43 @@ async def get_execution_status(execution_id: str):
         status=execution["status"],
         result=execution.get("result"),
         error=execution.get("error"),
-        created_at="2024-01-01T00:00:00Z",
-        updated_at="2024-01-01T00:00:00Z"
+        created_at=execution.get("created_at", DEFAULT_CREATED_AT),
+        updated_at=execution.get("updated_at", execution.get("created_at", DEFAULT_CREATED_AT))
     )
 
 @app.get("/exec")
-async def list_executions():
-    """Список всех выполнений"""
+async def list_executions(
+    status: Optional[str] = Query(None, description="Фильтр по статусу"),
+    created_after: Optional[datetime] = Query(None, description="Созданы не раньше (ISO 8601)"),
+    created_before: Optional[datetime] = Query(None, description="Созданы раньше (ISO 8601)"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    limit: int = Query(100, ge=1, le=1000, description="Размер страницы"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json или ndjson (поток)")
+):
+    """Список выполнений с фильтрами и курсорной пагинацией"""
+    try:
+        cursor_key = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Неверный курсор: {cursor}")
+    
+    if format == "ndjson":
+        def stream() -> Iterator[str]:
+            page_key = cursor_key
+            while True:
+                page, page_key = _page_executions(
+                    status, created_after, created_before, page_key, limit
+                )
+                for item in page:
+                    yield json.dumps(item, ensure_ascii=False) + "\n"
+                if page_key is None:
+                    return
+        
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+    
+    page, next_key = _page_executions(status, created_after, created_before, cursor_key, limit)
     return {
-        "executions": [
-            {
-                "execution_id": exec_id,
-                "status": exec_data["status"],
-                "created_at": "2024-01-01T00:00:00Z"
-            }
-            for exec_id, exec_data in executor.executions.items()
-        ],
+        "executions": page,
+        "next_cursor": encode_cursor(*next_key) if next_key is not None else None,
         "total": len(executor.executions)
     }
 
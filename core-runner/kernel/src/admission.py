@@ -0,0 +1,158 @@
+"""
+Контроль допуска выполнений
+Глобальный лимит параллельных выполнений, квоты на арендатора (app_id)
+и ограниченная очередь с круговой (fair) выдачей слотов
+"""
+
+import asyncio
+import math
+from collections import defaultdict, deque
+from typing import Any, Deque, Dict, Optional
+
+from config import RunnerConfig
+
+DEFAULT_TENANT = "default"
+
+
+class AdmissionRejected(Exception):
+    """Очередь заполнена, запрос нужно повторить позже"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """Место выполнения в очереди допуска"""
+
+    def __init__(self, tenant: str, future: asyncio.Future):
+        self.tenant = tenant
+        self.future = future
+        self.granted = False
+        self.released = False
+
+    async def wait(self):
+        """Ожидание выделения слота"""
+        await self.future
+
+
+class AdmissionController:
+    """
+    Очередь допуска выполнений
+
+    Слот выдаётся, если не превышен общий лимит и лимит арендатора.
+    Ожидающие арендаторы обслуживаются по кругу, поэтому всплеск
+    запросов одного app_id не задерживает остальных. Когда очередь
+    заполнена, submit() сразу отклоняет запрос с оценкой Retry-After.
+    """
+
+    def __init__(self, config: RunnerConfig):
+        self.max_concurrent = max(1, config.admission_max_concurrent)
+        self.tenant_concurrency = max(1, config.admission_tenant_concurrency)
+        self.queue_size = config.admission_queue_size
+        self.tenant_queue_size = config.admission_tenant_queue_size
+
+        self._running: Dict[str, int] = defaultdict(int)
+        self._running_total = 0
+        self._waiting: Dict[str, Deque[Ticket]] = defaultdict(deque)
+        self._waiting_total = 0
+        self._rotation: Deque[str] = deque()
+        # Скользящее среднее длительности выполнения для Retry-After
+        self._avg_duration = 1.0
+
+    def submit(self, tenant: Optional[str] = None) -> Ticket:
+        """Постановка в очередь; AdmissionRejected, если мест нет"""
+        tenant = tenant or DEFAULT_TENANT
+
+        if self._waiting_total >= self.queue_size:
+            raise AdmissionRejected("Очередь выполнений заполнена", self.retry_after())
+        if len(self._waiting[tenant]) >= self.tenant_queue_size:
+            raise AdmissionRejected(
+                f"Очередь выполнений для {tenant} заполнена", self.retry_after(tenant)
+            )
+
+        ticket = Ticket(tenant, asyncio.get_running_loop().create_future())
+        self._waiting[tenant].append(ticket)
+        self._waiting_total += 1
+        if tenant not in self._rotation:
+            self._rotation.append(tenant)
+        self._dispatch()
+        return ticket
+
+    def release(self, ticket: Ticket, duration: Optional[float] = None):
+        """Освобождение слота или снятие из очереди (идемпотентно)"""
+        if ticket.released:
+            return
+        ticket.released = True
+
+        if ticket.granted:
+            self._running[ticket.tenant] -= 1
+            self._running_total -= 1
+            if duration is not None:
+                self._avg_duration = 0.9 * self._avg_duration + 0.1 * duration
+        else:
+            waiters = self._waiting[ticket.tenant]
+            if ticket in waiters:
+                waiters.remove(ticket)
+                self._waiting_total -= 1
+                if not waiters and ticket.tenant in self._rotation:
+                    self._rotation.remove(ticket.tenant)
+            if not ticket.future.done():
+                ticket.future.cancel()
+
+        self._dispatch()
+
+    def _dispatch(self):
+        """Выдача свободных слотов ожидающим арендаторам по кругу"""
+        skipped = 0
+        while self._running_total < self.max_concurrent and skipped < len(self._rotation):
+            tenant = self._rotation[0]
+            self._rotation.rotate(-1)
+
+            if self._running[tenant] >= self.tenant_concurrency:
+                skipped += 1
+                continue
+
+            waiters = self._waiting[tenant]
+            ticket = waiters.popleft()
+            self._waiting_total -= 1
+            if not waiters:
+                self._rotation.remove(tenant)
+            skipped = 0
+
+            if ticket.future.done():
+                # Ожидание уже отменено
+                ticket.released = True
+                continue
+
+            ticket.granted = True
+            self._running[tenant] += 1
+            self._running_total += 1
+            ticket.future.set_result(None)
+
+    def retry_after(self, tenant: Optional[str] = None) -> int:
+        """Оценка времени до освобождения места в очереди, секунды"""
+        if tenant:
+            queued = len(self._waiting[tenant])
+            slots = min(self.tenant_concurrency, self.max_concurrent)
+        else:
+            queued = self._waiting_total
+            slots = self.max_concurrent
+        return max(1, math.ceil(self._avg_duration * (queued + 1) / slots))
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние очереди допуска"""
+        return {
+            "running": self._running_total,
+            "queued": self._waiting_total,
+            "max_concurrent": self.max_concurrent,
+            "queue_size": self.queue_size,
+            "tenants": {
+                tenant: {
+                    "running": self._running.get(tenant, 0),
+                    "queued": len(self._waiting.get(tenant, ()))
+                }
+                for tenant in set(self._running) | set(self._waiting)
+                if self._running.get(tenant) or self._waiting.get(tenant)
+            }
+        }
@@ -0,0 +1,166 @@
+"""
+Конфигурация JALM Core Runner
+"""
+
+import os
+import tempfile
+from dataclasses import dataclass, field
+
+
+def _env_int(name: str, default: int) -> int:
+    """Чтение целочисленной переменной окружения"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return int(value)
+
+
+def _env_float(name: str, default: float) -> float:
+    """Чтение вещественной переменной окружения"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return float(value)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Чтение логической переменной окружения"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+@dataclass
+class RunnerConfig:
+    """Конфигурация исполнительного ядра"""
+
+    # Планировщик шагов
+    max_parallel_steps: int = 4
+    step_timeout: float = 60.0
+
+    # Контроль допуска выполнений
+    admission_max_concurrent: int = 50
+    admission_tenant_concurrency: int = 10
+    admission_queue_size: int = 500
+    admission_tenant_queue_size: int = 100
+
+    # HTTP-клиент (io-http, notify-mq)
+    http_max_connections: int = 100
+    http_max_keepalive: int = 20
+    http_keepalive_expiry: float = 30.0
+    http_connect_timeout: float = 5.0
+    http_timeout: float = 30.0
+    http2: bool = True
+
+    # Пул интерпретаторов (compute-script)
+    script_workers_per_language: int = 2
+    script_max_jobs_per_worker: int = 100
+    script_timeout: float = 30.0
+
+    # Рабочие процессы (общее хранилище выполнений в state_dir)
+    workers: int = 1
+    state_poll_interval: float = 1.0
+
+    # Восстановление после перезапуска: resume или fail
+    recovery_mode: str = "resume"
+    worker_stale_after: float = 30.0
+
+    # Хранилище выполнений
+    state_dir: str = field(default_factory=lambda: os.path.join(tempfile.gettempdir(), "jalm"))
+    execution_memory_budget_mb: int = 64
+    execution_cache_size: int = 1000
+    execution_memory_ttl: float = 600.0
+    execution_retention: float = 7 * 24 * 3600.0
+
+    # База данных (io-db)
+    db_url: str = ""
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_statement_cache_size: int = 500
+    db_fetch_size: int = 500
+    db_max_rows: int = 10000
+    db_max_engines: int = 16
+
+    # Шаблоны (render-html)
+    render_cache_size: int = 256
+
+    # Пакетный запуск (POST /exec/batch)
+    batch_max_size: int = 1000
+
+    # Кэш результатов шагов
+    step_cache_enabled: bool = False
+    step_cache_memory_mb: int = 32
+    step_cache_read_ttl: float = 60.0
+
+    # Поток событий выполнений (GET /exec/{id}/events)
+    event_queue_size: int = 256
+    event_heartbeat: float = 15.0
+
+    # Метрики (GET /metrics): период замера задержки event loop, 0 - отключить
+    loop_lag_interval: float = 0.5
+
+    # Профилирование (profile_stacks: true): период выборки стеков
+    profile_sample_interval: float = 0.005
+
+    @classmethod
+    def from_env(cls) -> "RunnerConfig":
+        """Загрузка конфигурации из переменных окружения"""
+        return cls(
+            max_parallel_steps=_env_int("JALM_MAX_PARALLEL_STEPS", cls.max_parallel_steps),
+            step_timeout=_env_float("JALM_STEP_TIMEOUT", cls.step_timeout),
+            admission_max_concurrent=_env_int(
+                "JALM_MAX_CONCURRENT_EXECUTIONS", cls.admission_max_concurrent
+            ),
+            admission_tenant_concurrency=_env_int(
+                "JALM_TENANT_CONCURRENCY", cls.admission_tenant_concurrency
+            ),
+            admission_queue_size=_env_int("JALM_QUEUE_SIZE", cls.admission_queue_size),
+            admission_tenant_queue_size=_env_int(
+                "JALM_TENANT_QUEUE_SIZE", cls.admission_tenant_queue_size
+            ),
+            http_max_connections=_env_int("JALM_HTTP_MAX_CONNECTIONS", cls.http_max_connections),
+            http_max_keepalive=_env_int("JALM_HTTP_MAX_KEEPALIVE", cls.http_max_keepalive),
+            http_keepalive_expiry=_env_float("JALM_HTTP_KEEPALIVE_EXPIRY", cls.http_keepalive_expiry),
+            http_connect_timeout=_env_float("JALM_HTTP_CONNECT_TIMEOUT", cls.http_connect_timeout),
+            http_timeout=_env_float("JALM_HTTP_TIMEOUT", cls.http_timeout),
+            http2=_env_bool("JALM_HTTP2", cls.http2),
+            script_workers_per_language=_env_int(
+                "JALM_SCRIPT_WORKERS", cls.script_workers_per_language
+            ),
+            script_max_jobs_per_worker=_env_int(
+                "JALM_SCRIPT_MAX_JOBS_PER_WORKER", cls.script_max_jobs_per_worker
+            ),
+            script_timeout=_env_float("JALM_SCRIPT_TIMEOUT", cls.script_timeout),
+            workers=_env_int("JALM_WORKERS", cls.workers),
+            state_poll_interval=_env_float("JALM_STATE_POLL_INTERVAL", cls.state_poll_interval),
+            recovery_mode=os.getenv("JALM_RECOVERY_MODE", cls.recovery_mode),
+            worker_stale_after=_env_float("JALM_WORKER_STALE_AFTER", cls.worker_stale_after),
+            state_dir=os.getenv("JALM_STATE_DIR") or os.path.join(tempfile.gettempdir(), "jalm"),
+            execution_memory_budget_mb=_env_int(
+                "JALM_EXECUTION_MEMORY_MB", cls.execution_memory_budget_mb
+            ),
+            execution_cache_size=_env_int("JALM_EXECUTION_CACHE_SIZE", cls.execution_cache_size),
+            execution_memory_ttl=_env_float("JALM_EXECUTION_MEMORY_TTL", cls.execution_memory_ttl),
+            execution_retention=_env_float("JALM_EXECUTION_RETENTION", cls.execution_retention),
+            db_url=os.getenv("JALM_DB_URL", cls.db_url),
+            db_pool_size=_env_int("JALM_DB_POOL_SIZE", cls.db_pool_size),
+            db_max_overflow=_env_int("JALM_DB_MAX_OVERFLOW", cls.db_max_overflow),
+            db_statement_cache_size=_env_int(
+                "JALM_DB_STATEMENT_CACHE", cls.db_statement_cache_size
+            ),
+            db_fetch_size=_env_int("JALM_DB_FETCH_SIZE", cls.db_fetch_size),
+            db_max_rows=_env_int("JALM_DB_MAX_ROWS", cls.db_max_rows),
+            db_max_engines=_env_int("JALM_DB_MAX_ENGINES", cls.db_max_engines),
+            render_cache_size=_env_int("JALM_RENDER_CACHE_SIZE", cls.render_cache_size),
+            batch_max_size=_env_int("JALM_BATCH_MAX_SIZE", cls.batch_max_size),
+            step_cache_enabled=_env_bool("JALM_STEP_CACHE", cls.step_cache_enabled),
+            step_cache_memory_mb=_env_int("JALM_STEP_CACHE_MEMORY_MB", cls.step_cache_memory_mb),
+            step_cache_read_ttl=_env_float("JALM_STEP_CACHE_READ_TTL", cls.step_cache_read_ttl),
+            event_queue_size=_env_int("JALM_EVENT_QUEUE_SIZE", cls.event_queue_size),
+            event_heartbeat=_env_float("JALM_EVENT_HEARTBEAT", cls.event_heartbeat),
+            loop_lag_interval=_env_float("JALM_LOOP_LAG_INTERVAL", cls.loop_lag_interval),
+            profile_sample_interval=_env_float(
+                "JALM_PROFILE_SAMPLE_INTERVAL", cls.profile_sample_interval
+            ),
+        )
@@ -0,0 +1,147 @@
+"""
+Пулы подключений для слоя io-db
+SQLAlchemy Engine на каждую строку подключения: пул соединений,
+кэш скомпилированных запросов и драйвер, выбираемый по схеме URL
+(sqlite://, postgresql+psycopg2://, ...)
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from config import RunnerConfig
+
+
+class DatabasePools:
+    """
+    Engine (и его пул соединений) на каждую строку подключения
+
+    Запросы выполняются в пуле потоков, чтобы не блокировать event loop.
+    Число одновременно открытых Engine ограничено: самый давно
+    неиспользуемый закрывается.
+    """
+
+    def __init__(self, config: RunnerConfig, executor: Executor):
+        self.config = config
+        self.executor = executor
+        self._engines: "OrderedDict[str, Engine]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def default_url(self) -> str:
+        """Строка подключения по умолчанию"""
+        if self.config.db_url:
+            return self.config.db_url
+        return f"sqlite:///{Path(self.config.state_dir) / 'jalm.db'}"
+
+    def get_engine(self, connection_string: Optional[str] = None) -> Engine:
+        """Engine для строки подключения (создаётся при первом обращении)"""
+        url = connection_string or self.default_url()
+        with self._lock:
+            engine = self._engines.get(url)
+            if engine is not None:
+                self._engines.move_to_end(url)
+                return engine
+
+            engine = self._create_engine(url)
+            self._engines[url] = engine
+            while len(self._engines) > self.config.db_max_engines:
+                _, stale = self._engines.popitem(last=False)
+                stale.dispose()
+            return engine
+
+    def _create_engine(self, url: str) -> Engine:
+        """Создание Engine с настройками пула"""
+        options: Dict[str, Any] = {
+            "pool_pre_ping": True,
+            "query_cache_size": self.config.db_statement_cache_size,
+        }
+        if url.startswith("sqlite"):
+            # Соединения SQLite передаются между потоками пула
+            options["connect_args"] = {
+                "check_same_thread": False,
+                "cached_statements": self.config.db_statement_cache_size,
+            }
+        else:
+            options["pool_size"] = self.config.db_pool_size
+            options["max_overflow"] = self.config.db_max_overflow
+        return create_engine(url, **options)
+
+    async def execute(self, query: str, params: Union[Dict[str, Any], Sequence[Any], None] = None,
+                      connection_string: Optional[str] = None,
+                      timeout: Optional[float] = None,
+                      fetch_size: Optional[int] = None,
+                      max_rows: Optional[int] = None) -> Dict[str, Any]:
+        """Выполнение запроса в пуле потоков"""
+        engine = self.get_engine(connection_string)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor,
+            self._execute_sync,
+            engine,
+            query,
+            params,
+            timeout,
+            fetch_size or self.config.db_fetch_size,
+            max_rows or self.config.db_max_rows
+        )
+
+    @staticmethod
+    def _execute_sync(engine: Engine, query: str,
+                      params: Union[Dict[str, Any], Sequence[Any], None],
+                      timeout: Optional[float], fetch_size: int, max_rows: int) -> Dict[str, Any]:
+        """
+        Выполнение запроса на соединении из пула
+
+        Параметры-словарь связываются как :name, параметры-список -
+        в стиле драйвера (? для SQLite, %s для psycopg2). Строки читаются
+        порциями по fetch_size через потоковый (серверный) курсор и
+        обрезаются на max_rows.
+        """
+        start_time = time.perf_counter()
+        with engine.begin() as conn:
+            if timeout and engine.dialect.name == "postgresql":
+                conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout * 1000)}")
+
+            conn = conn.execution_options(stream_results=True, yield_per=fetch_size)
+            if isinstance(params, (list, tuple)):
+                result = conn.exec_driver_sql(query, tuple(params))
+            else:
+                result = conn.execute(text(query), params or {})
+
+            rows: List[Dict[str, Any]] = []
+            truncated = False
+            if result.returns_rows:
+                while True:
+                    batch = result.fetchmany(fetch_size)
+                    if not batch:
+                        break
+                    rows.extend(dict(row._mapping) for row in batch)
+                    if len(rows) >= max_rows:
+                        truncated = len(rows) > max_rows or result.fetchone() is not None
+                        rows = rows[:max_rows]
+                        break
+                row_count = len(rows)
+            else:
+                row_count = result.rowcount
+            result.close()
+
+        return {
+            "rows": rows,
+            "row_count": row_count,
+            "truncated": truncated,
+            "execution_time": time.perf_counter() - start_time
+        }
+
+    def dispose(self):
+        """Закрытие всех пулов соединений"""
+        with self._lock:
+            for engine in self._engines.values():
+                engine.dispose()
+            self._engines.clear()
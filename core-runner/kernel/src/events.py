@@ -0,0 +1,117 @@
+"""
+События выполнений JALM
+Шина рассылает step-started, step-completed и execution-finished
+подписчикам потока GET /exec/{id}/events (Server-Sent Events)
+"""
+
+import asyncio
+import json
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Optional, Set, Tuple
+
+from config import RunnerConfig
+
+STEP_STARTED = "step-started"
+STEP_COMPLETED = "step-completed"
+EXECUTION_FINISHED = "execution-finished"
+# Подписчик не успевал читать, часть событий пропущена
+LAGGED = "lagged"
+
+
+def _json_default(value: Any) -> Any:
+    """Сериализация datetime и прочих значений вне JSON"""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Кадр Server-Sent Events"""
+    payload = json.dumps(data, ensure_ascii=False, default=_json_default)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class EventSubscription:
+    """
+    Подписка на события одного выполнения
+
+    Очередь ограничена: если клиент читает медленнее, чем идут события,
+    самые старые события вытесняются, а клиент получает lagged с числом
+    пропущенных и может перечитать состояние через GET /exec/{id}.
+    execution-finished публикуется последним и не вытесняется.
+    """
+
+    def __init__(self, execution_id: str, queue_size: int):
+        self.execution_id = execution_id
+        # Минимум два места: execution-finished и признак конца потока
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(2, queue_size))
+        self.dropped = 0
+
+    def put(self, item: Optional[Tuple[str, Dict[str, Any]]]):
+        """Постановка события (None - конец потока) без ожидания"""
+        while self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    async def events(self, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[Tuple[str, Dict[str, Any]]]]:
+        """События по мере поступления; None - пульс при простое"""
+        while True:
+            try:
+                item = await asyncio.wait_for(self.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+                continue
+
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                yield LAGGED, {"execution_id": self.execution_id, "dropped": dropped}
+            if item is None:
+                return
+            yield item
+
+
+class ExecutionEventBus:
+    """Подписчики событий по execution_id"""
+
+    def __init__(self, config: RunnerConfig):
+        self.queue_size = config.event_queue_size
+        self._subscribers: Dict[str, Set[EventSubscription]] = defaultdict(set)
+
+    def subscribe(self, execution_id: str) -> EventSubscription:
+        """Новая подписка на события выполнения"""
+        subscription = EventSubscription(execution_id, self.queue_size)
+        self._subscribers[execution_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: EventSubscription):
+        """Отписка (идемпотентно)"""
+        subscribers = self._subscribers.get(subscription.execution_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscription)
+        if not subscribers:
+            del self._subscribers[subscription.execution_id]
+
+    def has_subscribers(self, execution_id: str) -> bool:
+        """Есть ли открытые подписки на выполнение"""
+        return bool(self._subscribers.get(execution_id))
+
+    def publish(self, execution_id: str, event: str, data: Dict[str, Any]):
+        """Рассылка события подписчикам выполнения"""
+        subscribers = self._subscribers.get(execution_id)
+        if not subscribers:
+            return
+        for subscription in subscribers:
+            subscription.put((event, data))
+
+    def finish(self, execution_id: str, data: Dict[str, Any]):
+        """Последнее событие выполнения и закрытие всех подписок"""
+        subscribers = self._subscribers.pop(execution_id, set())
+        for subscription in subscribers:
+            subscription.put((EXECUTION_FINISHED, data))
+            subscription.put(None)
+
+    def subscriber_count(self) -> int:
+        """Число открытых подписок"""
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
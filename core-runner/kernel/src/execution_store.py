@@ -0,0 +1,476 @@
+"""
+Хранилище выполнений JALM
+Активные выполнения живут в памяти и записываются в SQLite по ходу работы,
+завершённые держатся в ограниченном LRU-кэше. Файл SQLite (WAL) общий
+для всех рабочих процессов ядра с одним JALM_STATE_DIR.
+"""
+
+import base64
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config import RunnerConfig
+from models import JALMExecution
+
+logger = logging.getLogger("jalm-core-runner")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS executions (
+    execution_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_ts REAL NOT NULL,
+    completed_ts REAL,
+    owner TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_executions_created ON executions (created_ts, execution_id);
+CREATE INDEX IF NOT EXISTS idx_executions_status ON executions (status, created_ts, execution_id);
+CREATE INDEX IF NOT EXISTS idx_executions_completed ON executions (completed_ts);
+CREATE INDEX IF NOT EXISTS idx_executions_cancel ON executions (owner) WHERE cancel_requested = 1;
+CREATE TABLE IF NOT EXISTS execution_layers (
+    layer TEXT NOT NULL,
+    created_ts REAL NOT NULL,
+    execution_id TEXT NOT NULL,
+    PRIMARY KEY (layer, created_ts, execution_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_executions_unfinished ON executions (owner) WHERE completed_ts IS NULL;
+CREATE TABLE IF NOT EXISTS workers (
+    owner TEXT PRIMARY KEY,
+    heartbeat_ts REAL NOT NULL
+);
+"""
+
+# Колонки, добавленные после первой версии схемы
+MIGRATIONS = {
+    "owner": "ALTER TABLE executions ADD COLUMN owner TEXT",
+    "cancel_requested": "ALTER TABLE executions ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0",
+}
+
+# Интервал очистки устаревших записей на диске, секунды
+PURGE_INTERVAL = 60.0
+
+# Пауза перед повтором неудавшейся записи, секунды
+WRITE_RETRY_DELAY = 1.0
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+def worker_id() -> str:
+    """
+    Идентификатор рабочего процесса ядра
+
+    Случайный суффикс отличает перезапущенный процесс от упавшего,
+    даже если у них совпали хост и pid (PID 1 в контейнере).
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def execution_layers(execution: JALMExecution) -> Set[str]:
+    """Слои, задействованные в выполнении"""
+    return {
+        step.get("layer", "compute-script")
+        for step in execution.jalm_config.get("steps", [])
+    }
+
+
+def encode_cursor(created_ts: float, execution_id: str) -> str:
+    """Непрозрачный курсор пагинации"""
+    raw = json.dumps([created_ts, execution_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Разбор курсора пагинации"""
+    try:
+        created_ts, execution_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(created_ts), str(execution_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Неверный курсор: {cursor}") from e
+
+
+class ExecutionStore:
+    """
+    Ограниченное хранилище выполнений
+
+    - pending/running выполнения хранятся в памяти процесса-владельца
+      и записываются в SQLite (WAL) фоновым потоком, поэтому видны
+      остальным процессам; изменения, накопившиеся за время записи,
+      схлопываются в одну запись на выполнение
+    - завершённые остаются в LRU-кэше, пока не превышен бюджет памяти,
+      лимит записей или TTL
+    - записи на диске старше execution_retention удаляются тем же
+      фоновым потоком
+
+    Методы, обращающиеся к SQLite напрямую (heartbeat, claim_orphans,
+    take_cancel_requests, query), могут ждать блокировку файла до 30 с:
+    из event loop их вызывают через asyncio.to_thread.
+    """
+
+    def __init__(self, config: RunnerConfig, db_path: Optional[Path] = None,
+                 owner: Optional[str] = None):
+        self.config = config
+        self.db_path = db_path or Path(config.state_dir) / "executions.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.owner = owner or worker_id()
+
+        self._active: Dict[str, JALMExecution] = {}
+        # execution_id -> (выполнение, размер в байтах, момент помещения в кэш)
+        self._recent: "OrderedDict[str, Tuple[JALMExecution, int, float]]" = OrderedDict()
+        self._recent_bytes = 0
+        self._last_purge = time.monotonic()
+
+        self._lock = threading.Lock()
+        # Другие процессы пишут в тот же файл: ждём блокировку, а не падаем
+        self._db = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self._db.executescript(SCHEMA)
+        self.heartbeat()
+
+        # Очередь записи: execution_id -> (выполнение, completed_ts, готовый JSON)
+        self._pending: Dict[str, Tuple[JALMExecution, Optional[float], Optional[str]]] = {}
+        self._pending_cond = threading.Condition()
+        self._writing = False
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="jalm-store-writer", daemon=True)
+        self._writer.start()
+
+    def _migrate(self):
+        """Добавление новых колонок в базу предыдущей версии"""
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(executions)")}
+        if not columns:
+            return
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self._db.execute(statement)
+        self._db.commit()
+
+    def add(self, execution: JALMExecution):
+        """Регистрация нового выполнения"""
+        self._active[execution.execution_id] = execution
+        self._schedule(execution)
+
+    def update(self, execution: JALMExecution):
+        """Запись текущего состояния выполнения в работе"""
+        self._schedule(execution)
+
+    def complete(self, execution: JALMExecution):
+        """Перенос завершённого выполнения в кэш и на диск"""
+        # Сериализуем здесь: размер нужен бюджету кэша, писатель возьмёт готовый JSON
+        data = execution.model_dump_json()
+        self._schedule(execution, completed_ts=time.time(), data=data)
+        self._active.pop(execution.execution_id, None)
+        self._remember(execution, len(data))
+        self._evict()
+
+    def flush(self):
+        """Ожидание записи всех накопленных изменений на диск"""
+        with self._pending_cond:
+            while self._pending or self._writing:
+                self._pending_cond.wait()
+
+    def _schedule(self, execution: JALMExecution, completed_ts: Optional[float] = None,
+                  data: Optional[str] = None):
+        """Постановка выполнения в очередь записи; предыдущее состояние заменяется"""
+        with self._pending_cond:
+            self._pending[execution.execution_id] = (execution, completed_ts, data)
+            self._pending_cond.notify_all()
+
+    def _write_loop(self):
+        """
+        Поток записи: забирает накопленные изменения и пишет их одной транзакцией
+
+        Неудавшийся пакет возвращается в очередь (более новые состояния тех же
+        выполнений его заменяют) и повторяется после паузы. При остановке
+        хранилища пакет не повторяется: выполнения остаются незавершёнными
+        на диске и будут перехвачены другим процессом.
+        """
+        while True:
+            with self._pending_cond:
+                while not self._pending and not self._closed:
+                    self._pending_cond.wait()
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending, {}
+                self._writing = True
+            failed = False
+            try:
+                self._write(batch.values())
+                self._purge_expired()
+            except Exception as e:
+                failed = True
+                logger.error(f"Ошибка записи выполнений на диск ({len(batch)}): {e}")
+            finally:
+                with self._pending_cond:
+                    self._writing = False
+                    if failed and not self._closed:
+                        for execution_id, item in batch.items():
+                            self._pending.setdefault(execution_id, item)
+                    self._pending_cond.notify_all()
+            if failed and not self._closed:
+                time.sleep(WRITE_RETRY_DELAY)
+
+    def _write(self, batch: Iterable[Tuple[JALMExecution, Optional[float], Optional[str]]]):
+        """Запись выполнений на диск"""
+        rows = []
+        layers = []
+        for execution, completed_ts, data in batch:
+            created_ts = execution.created_at.timestamp()
+            rows.append((
+                execution.execution_id, execution.status, created_ts, completed_ts, self.owner,
+                data if data is not None else execution.model_dump_json()
+            ))
+            layers.extend((layer, created_ts, execution.execution_id) for layer in execution_layers(execution))
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO executions "
+                "(execution_id, status, created_ts, completed_ts, owner, data) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (execution_id) DO UPDATE SET status = excluded.status, "
+                "completed_ts = excluded.completed_ts, owner = excluded.owner, data = excluded.data",
+                rows
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO execution_layers (layer, created_ts, execution_id) "
+                "VALUES (?, ?, ?)",
+                layers
+            )
+            self._db.commit()
+
+    def get(self, execution_id: str) -> Optional[JALMExecution]:
+        """Поиск выполнения по id: память, затем диск (в т.ч. выполнения других процессов)"""
+        execution = self._active.get(execution_id)
+        if execution is not None:
+            return execution
+
+        cached = self._recent.get(execution_id)
+        if cached is not None:
+            self._recent.move_to_end(execution_id)
+            return cached[0]
+
+        with self._pending_cond:
+            pending = self._pending.get(execution_id)
+        if pending is not None:
+            return pending[0]
+
+        with self._lock:
+            row = self._db.execute(
+                "SELECT data FROM executions WHERE execution_id = ?", (execution_id,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        execution = JALMExecution.model_validate_json(row[0])
+        if execution.status in TERMINAL_STATUSES:
+            # Выполнение в работе у другого процесса ещё изменится - не кэшируем
+            self._remember(execution, len(row[0]))
+            self._evict()
+        return execution
+
+    def is_local(self, execution_id: str) -> bool:
+        """Выполняется ли выполнение в этом процессе"""
+        return execution_id in self._active
+
+    def request_cancel(self, execution_id: str) -> bool:
+        """Запрос отмены выполнения, идущего в другом процессе"""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE executions SET cancel_requested = 1 "
+                "WHERE execution_id = ? AND completed_ts IS NULL",
+                (execution_id,)
+            )
+            self._db.commit()
+        return cursor.rowcount > 0
+
+    def take_cancel_requests(self) -> List[str]:
+        """Запрошенные другими процессами отмены выполнений этого процесса"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT execution_id FROM executions WHERE owner = ? AND cancel_requested = 1",
+                (self.owner,)
+            ).fetchall()
+            if rows:
+                self._db.executemany(
+                    "UPDATE executions SET cancel_requested = 0 WHERE execution_id = ?", rows
+                )
+                self._db.commit()
+        return [row[0] for row in rows]
+
+    def heartbeat(self):
+        """Отметка, что процесс жив и владеет своими выполнениями"""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO workers (owner, heartbeat_ts) VALUES (?, ?)",
+                (self.owner, time.time())
+            )
+            self._db.commit()
+
+    def claim_orphans(self, stale_after: float) -> List[JALMExecution]:
+        """
+        Перехват незавершённых выполнений упавших или остановленных процессов
+
+        Владелец считается потерянным, если его отметка старше stale_after
+        или он удалил её при остановке. Перехват атомарен: из нескольких
+        живых процессов выполнение достанется одному. Выполнения без
+        владельца (записанные до появления колонки owner) тоже перехватываются.
+        """
+        now = time.time()
+        claimed: List[JALMExecution] = []
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT execution_id, owner FROM executions "
+                "WHERE completed_ts IS NULL AND owner IS NOT ? AND (owner IS NULL OR owner NOT IN "
+                "(SELECT owner FROM workers WHERE heartbeat_ts >= ?))",
+                (self.owner, now - stale_after)
+            ).fetchall()
+            for execution_id, owner in rows:
+                cursor = self._db.execute(
+                    "UPDATE executions SET owner = ?, cancel_requested = 0 "
+                    "WHERE execution_id = ? AND owner IS ? AND completed_ts IS NULL",
+                    (self.owner, execution_id, owner)
+                )
+                if cursor.rowcount:
+                    data = self._db.execute(
+                        "SELECT data FROM executions WHERE execution_id = ?", (execution_id,)
+                    ).fetchone()[0]
+                    claimed.append(JALMExecution.model_validate_json(data))
+            self._db.execute("DELETE FROM workers WHERE heartbeat_ts < ?", (now - stale_after,))
+            self._db.commit()
+
+        # Вызывается и из пула потоков: запись в словарь атомарна, а обход
+        # _active нигде не выполняется
+        for execution in claimed:
+            self._active[execution.execution_id] = execution
+        return claimed
+
+    def query(self, status: Optional[str] = None, layer: Optional[str] = None,
+              created_after: Optional[datetime] = None,
+              created_before: Optional[datetime] = None,
+              cursor: Optional[str] = None,
+              limit: int = 100) -> Tuple[List[JALMExecution], Optional[str]]:
+        """
+        Страница выполнений от новых к старым
+
+        Фильтры по статусу и слою идут через индексы SQLite; для
+        выполнений этого процесса берётся актуальная копия из памяти.
+        Возвращает страницу и курсор следующей страницы (None, если
+        страниц больше нет).
+        """
+        after_ts = created_after.timestamp() if created_after else None
+        before_ts = created_before.timestamp() if created_before else None
+        cursor_key = decode_cursor(cursor) if cursor else None
+        # Страница строится по диску: дожидаемся записи накопленных изменений
+        self.flush()
+
+        # Выборка с диска: limit + 1 строка, чтобы понять, есть ли следующая страница
+        if layer:
+            sql = ("SELECT e.execution_id, e.created_ts, e.data FROM execution_layers l "
+                   "JOIN executions e ON e.execution_id = l.execution_id WHERE l.layer = ?")
+            params: list = [layer]
+            column = "l.created_ts"
+            id_column = "l.execution_id"
+        else:
+            sql = "SELECT e.execution_id, e.created_ts, e.data FROM executions e WHERE 1 = 1"
+            params = []
+            column = "e.created_ts"
+            id_column = "e.execution_id"
+
+        if status:
+            sql += " AND e.status = ?"
+            params.append(status)
+        if after_ts is not None:
+            sql += f" AND {column} >= ?"
+            params.append(after_ts)
+        if before_ts is not None:
+            sql += f" AND {column} < ?"
+            params.append(before_ts)
+        if cursor_key:
+            sql += f" AND ({column} < ? OR ({column} = ? AND {id_column} < ?))"
+            params.extend([cursor_key[0], cursor_key[0], cursor_key[1]])
+        sql += f" ORDER BY {column} DESC, {id_column} DESC LIMIT ?"
+        params.append(limit + 1)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        candidates: List[Tuple[float, str, JALMExecution]] = []
+        for execution_id, created_ts, data in rows:
+            execution = self._active.get(execution_id)
+            if execution is None:
+                cached = self._recent.get(execution_id)
+                execution = cached[0] if cached is not None else JALMExecution.model_validate_json(data)
+            candidates.append((created_ts, execution_id, execution))
+
+        page = candidates[:limit]
+        next_cursor = None
+        if len(candidates) > limit and page:
+            next_cursor = encode_cursor(page[-1][0], page[-1][1])
+        return [item[2] for item in page], next_cursor
+
+    def active_count(self) -> int:
+        """Число выполнений в работе"""
+        return len(self._active)
+
+    def _remember(self, execution: JALMExecution, size: int):
+        """Помещение выполнения в LRU-кэш"""
+        previous = self._recent.pop(execution.execution_id, None)
+        if previous is not None:
+            self._recent_bytes -= previous[1]
+        self._recent[execution.execution_id] = (execution, size, time.monotonic())
+        self._recent_bytes += size
+
+    def _evict(self):
+        """Вытеснение из памяти по бюджету, количеству и TTL"""
+        budget = self.config.execution_memory_budget_mb * 1024 * 1024
+        deadline = time.monotonic() - self.config.execution_memory_ttl
+
+        while self._recent:
+            execution_id, (_, size, cached_at) = next(iter(self._recent.items()))
+            over_budget = self._recent_bytes > budget
+            over_count = len(self._recent) > self.config.execution_cache_size
+            expired = cached_at < deadline
+            if not (over_budget or over_count or expired):
+                break
+            self._recent.popitem(last=False)
+            self._recent_bytes -= size
+
+    def _purge_expired(self):
+        """Удаление записей старше срока хранения (в потоке записи)"""
+        now = time.monotonic()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM execution_layers WHERE execution_id IN "
+                "(SELECT execution_id FROM executions WHERE completed_ts < ?)",
+                (time.time() - self.config.execution_retention,)
+            )
+            self._db.execute(
+                "DELETE FROM executions WHERE completed_ts < ?",
+                (time.time() - self.config.execution_retention,)
+            )
+            self._db.commit()
+
+    def close(self):
+        """Закрытие соединения с диском; незавершённые выполнения сразу доступны для перехвата"""
+        with self._pending_cond:
+            self._closed = True
+            self._pending_cond.notify_all()
+        self._writer.join()
+        with self._lock:
+            self._db.execute("DELETE FROM workers WHERE owner = ?", (self.owner,))
+            self._db.commit()
+            self._db.close()
@@ -0,0 +1,78 @@
+"""
+Асинхронный HTTP-клиент ядра
+Общий пул соединений для слоёв io-http и notify-mq
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+import httpx
+
+from config import RunnerConfig
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPClientPool:
+    """
+    Общий httpx.AsyncClient с keep-alive и пулом соединений
+
+    httpx держит отдельные соединения для каждого origin (схема + хост + порт),
+    поэтому повторные запросы к одному хосту переиспользуют открытые соединения.
+    """
+
+    def __init__(self, config: RunnerConfig):
+        self.config = config
+        self._client: Optional[httpx.AsyncClient] = None
+        self._lock = asyncio.Lock()
+
+    def _build_client(self) -> httpx.AsyncClient:
+        """Создание клиента по настройкам ядра"""
+        limits = httpx.Limits(
+            max_connections=self.config.http_max_connections,
+            max_keepalive_connections=self.config.http_max_keepalive,
+            keepalive_expiry=self.config.http_keepalive_expiry
+        )
+        timeout = httpx.Timeout(
+            self.config.http_timeout,
+            connect=self.config.http_connect_timeout
+        )
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=timeout,
+            http2=self.config.http2 and HTTP2_AVAILABLE
+        )
+
+    async def get_client(self) -> httpx.AsyncClient:
+        """Ленивое создание клиента внутри работающего event loop"""
+        if self._client is None:
+            async with self._lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    async def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None,
+                      json: Any = None, timeout: Optional[float] = None) -> httpx.Response:
+        """Выполнение запроса через общий пул"""
+        client = await self.get_client()
+        request_timeout = httpx.USE_CLIENT_DEFAULT
+        if timeout is not None:
+            request_timeout = httpx.Timeout(timeout, connect=self.config.http_connect_timeout)
+
+        return await client.request(
+            method,
+            url,
+            headers=headers,
+            json=json,
+            timeout=request_timeout
+        )
+
+    async def aclose(self):
+        """Закрытие всех соединений пула"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
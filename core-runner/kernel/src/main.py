@@ -7,19 +7,44 @@ JALM Core Runner - Исполнительное ядро для JALM Full Stack
 import asyncio
 import json
 import logging
-import os
-import subprocess
-import tempfile
+import sys
+import time
 import uuid
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any, List, Optional
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 from datetime import datetime
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 import yaml
 
+# Добавляем путь к модулям ядра
+sys.path.append(str(Path(__file__).parent))
+
+from admission import AdmissionController, AdmissionRejected, Ticket
+from config import RunnerConfig
+from db_pool import DatabasePools
+from events import (
+    EXECUTION_FINISHED, STEP_COMPLETED, STEP_STARTED,
+    EventSubscription, ExecutionEventBus, format_sse
+)
+from execution_store import TERMINAL_STATUSES, ExecutionStore
+from http_client import HTTPClientPool
+from metrics import RunnerMetrics, prepare_multiprocess_dir
+from profiler import StackSampler, collapsed_stacks
+from models import (
+    JALMStep, JALMExecution, ExecutionRequest, BatchExecutionRequest,
+    ExecutionProfile, StepProfile
+)
+from render_engine import DEFAULT_ENGINE, TemplateRenderer
+from script_pool import ScriptWorkerPool
+from scheduler import StepGraph, StepScheduler, resolve_references
+from step_cache import StepResultCache, side_effect, step_key
+from step_cards import load_step_cards, input_default
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -27,43 +52,55 @@ logging.basicConfig(
 )
 logger = logging.getLogger("jalm-core-runner")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Жизненный цикл приложения: создание, прогрев и освобождение ядра
+    
+    Ядро создаётся здесь, а не при импорте: родительский процесс uvicorn
+    и повторные импорты модуля не заводят лишних хранилищ и отметок жизни.
+    """
+    global core_runner
+    created = core_runner is None
+    if created:
+        core_runner = CoreRunner()
+    await core_runner.start()
+    try:
+        yield
+    finally:
+        await core_runner.close()
+        if created:
+            core_runner = None
+
 app = FastAPI(
     title="JALM Core Runner",
     description="Исполнительное ядро для JALM Full Stack",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-class JALMStep(BaseModel):
-    """Модель JALM-шага"""
-    id: str
-    layer: str
-    input: Dict[str, Any]
-    output: Optional[Dict[str, Any]] = None
-    error: Optional[str] = None
-    execution_time: Optional[float] = None
-
-class JALMExecution(BaseModel):
-    """Модель JALM-выполнения"""
-    execution_id: str
-    jalm_config: Dict[str, Any]
-    steps: List[JALMStep]
-    status: str  # pending, running, completed, failed
-    created_at: datetime
-    started_at: Optional[datetime] = None
-    completed_at: Optional[datetime] = None
-    total_time: Optional[float] = None
-
-class ExecutionRequest(BaseModel):
-    """Модель запроса на выполнение"""
-    jalm_config: Dict[str, Any]
-    timeout: Optional[int] = 300  # секунды
-
 class CoreRunner:
     """Основной класс исполнительного ядра"""
     
-    def __init__(self):
-        self.executions: Dict[str, JALMExecution] = {}
+    def __init__(self, config: Optional[RunnerConfig] = None):
+        self.config = config or RunnerConfig.from_env()
+        self.store = ExecutionStore(self.config)
         self.worker_pool = ThreadPoolExecutor(max_workers=10)
+        self.db = DatabasePools(self.config, self.worker_pool)
+        self.http = HTTPClientPool(self.config)
+        self.scripts = ScriptWorkerPool(self.config)
+        self.renderer = TemplateRenderer(self.config)
+        self.step_cache = StepResultCache(self.config)
+        self.step_cards = load_step_cards()
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.admission = AdmissionController(self.config)
+        self.tickets: Dict[str, Ticket] = {}
+        self.events = ExecutionEventBus(self.config)
+        self.metrics = RunnerMetrics()
+        self._loop_monitor: Optional[asyncio.Task] = None
+        self._state_watcher: Optional[asyncio.Task] = None
+        self._closing = False
+        self._remote_pollers: Dict[str, asyncio.Task] = {}
         self.supported_layers = {
             "io-http": self._execute_http,
             "io-db": self._execute_db,
@@ -73,9 +110,15 @@ class CoreRunner:
             "notify-mq": self._execute_notify
         }
     
-    async def execute_jalm(self, jalm_config: Dict[str, Any], timeout: int = 300) -> str:
-        """Выполнение JALM-конфига"""
+    async def execute_jalm(self, jalm_config: Dict[str, Any], timeout: Optional[int] = 300,
+                           app_id: Optional[str] = None, profile: bool = False,
+                           profile_stacks: bool = False) -> str:
+        """Выполнение JALM-конфига; AdmissionRejected, если очередь заполнена"""
         execution_id = str(uuid.uuid4())
+        app_id = app_id or jalm_config.get("app_id")
+        
+        # Место в очереди допуска резервируется до создания записи
+        ticket = self.admission.submit(app_id)
         
         # Создаём запись выполнения
         execution = JALMExecution(
@@ -83,86 +126,425 @@ class CoreRunner:
             jalm_config=jalm_config,
             steps=[],
             status="pending",
+            app_id=app_id,
+            timeout=timeout,
             created_at=datetime.now()
         )
+        if profile:
+            execution.profile = ExecutionProfile(
+                sample_interval=self.config.profile_sample_interval if profile_stacks else None
+            )
+        
+        self.store.add(execution)
+        self._launch(execution_id, ticket)
+        return execution_id
+    
+    def _launch(self, execution_id: str, ticket: Ticket):
+        """Запуск выполнения в фоне"""
+        self.tickets[execution_id] = ticket
+        task = asyncio.create_task(self._run_execution(execution_id))
+        self.tasks[execution_id] = task
+        task.add_done_callback(lambda _: self._forget_task(execution_id))
+    
+    async def recover_executions(self) -> int:
+        """
+        Восстановление выполнений, потерянных при остановке или падении процесса
         
-        self.executions[execution_id] = execution
+        Успешные шаги берутся из записей хранилища и не повторяются.
+        Если процесс прервался посреди шага с побочным эффектом записи
+        (side_effect карточки слоя), повтор может задвоить его результат -
+        такое выполнение, как и все при JALM_RECOVERY_MODE=fail,
+        завершается ошибкой.
+        """
+        recovered = 0
+        claimed = await asyncio.to_thread(self.store.claim_orphans, self.config.worker_stale_after)
+        for execution in claimed:
+            steps = StepGraph(execution.jalm_config.get("steps", [])).steps
+            unsafe = []
+            for step_id in execution.in_flight:
+                step_config = steps.get(step_id, {})
+                layer = step_config.get("layer", "compute-script")
+                if side_effect(layer, step_config.get("input", {}), self.step_cards.get(layer)) == "write":
+                    unsafe.append(step_id)
+            
+            error = None
+            if self.config.recovery_mode != "resume":
+                error = "Выполнение прервано перезапуском ядра"
+            elif unsafe:
+                error = f"Выполнение прервано перезапуском ядра во время шагов с записью: {', '.join(unsafe)}"
+            else:
+                try:
+                    ticket = self.admission.submit(execution.app_id)
+                except AdmissionRejected as e:
+                    error = f"Выполнение прервано перезапуском ядра и не восстановлено: {e}"
+            
+            if error:
+                execution.status = "failed"
+                execution.error = error
+                execution.completed_at = datetime.now()
+                self.store.complete(execution)
+                logger.warning(f"Выполнение JALM {execution.execution_id}: {error}")
+                continue
+            
+            # Шаги, прерванные остановкой, будут выполнены заново
+            execution.steps = [step for step in execution.steps if step.output is not None and not step.error]
+            execution.in_flight = []
+            execution.status = "pending"
+            self.store.update(execution)
+            self._launch(execution.execution_id, ticket)
+            recovered += 1
+            logger.info(
+                f"Выполнение JALM {execution.execution_id} восстановлено, "
+                f"готовых шагов: {len(execution.steps)}"
+            )
+        return recovered
+    
+    async def execute_batch(self, requests: List[ExecutionRequest]) -> List[Dict[str, Any]]:
+        """
+        Запуск пачки конфигов
         
-        # Запускаем выполнение в фоне
-        asyncio.create_task(self._run_execution(execution_id, timeout))
+        Каждый конфиг проходит контроль допуска отдельно: часть пачки может
+        быть принята, а часть отклонена с оценкой Retry-After.
+        """
+        results: List[Dict[str, Any]] = []
+        for index, request in enumerate(requests):
+            try:
+                execution_id = await self.execute_jalm(
+                    request.jalm_config, request.timeout, request.app_id,
+                    request.profile, request.profile_stacks
+                )
+                results.append({"index": index, "execution_id": execution_id})
+            except AdmissionRejected as e:
+                results.append({
+                    "index": index, "status": 429, "error": str(e), "retry_after": e.retry_after
+                })
+        return results
+    
+    async def wait_executions(self, execution_ids: List[str]) -> AsyncIterator[JALMExecution]:
+        """Выполнения по мере завершения (без отмены при закрытии итератора)"""
+        pending: Dict[asyncio.Task, str] = {}
+        for execution_id in execution_ids:
+            task = self.tasks.get(execution_id)
+            if task is None or task.done():
+                yield self.store.get(execution_id)
+            else:
+                pending[task] = execution_id
         
-        return execution_id
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield self.store.get(pending.pop(task))
     
-    async def _run_execution(self, execution_id: str, timeout: int):
+    def _forget_task(self, execution_id: str):
+        """Очистка служебных записей завершённой задачи"""
+        self.tasks.pop(execution_id, None)
+        ticket = self.tickets.pop(execution_id, None)
+        if ticket is not None:
+            self.admission.release(ticket)
+    
+    async def _run_execution(self, execution_id: str):
         """Выполнение JALM в фоновом режиме"""
-        execution = self.executions[execution_id]
-        execution.status = "running"
-        execution.started_at = datetime.now()
+        execution = self.store.get(execution_id)
+        ticket = self.tickets[execution_id]
+        timeout = execution.timeout
+        execution.status = "queued"
+        loop = asyncio.get_running_loop()
+        profile = execution.profile
+        sampler: Optional[StackSampler] = None
         
         try:
-            steps = execution.jalm_config.get("steps", [])
+            # Ожидание слота в очереди допуска
+            queued_at = time.perf_counter()
+            if not ticket.future.done():
+                self.store.update(execution)
+            self.metrics.set_queue(self.admission.stats())
+            await ticket.wait()
+            queue_wait = time.perf_counter() - queued_at
+            self.metrics.queue_wait.observe(queue_wait)
+            self.metrics.set_queue(self.admission.stats())
+            if profile is not None:
+                profile.queue_wait = (profile.queue_wait or 0.0) + queue_wait
+                if profile.sample_interval:
+                    sampler = StackSampler(profile.sample_interval)
+                    sampler.start()
+            execution.status = "running"
+            execution.started_at = execution.started_at or datetime.now()
+            self.store.update(execution)
+            
+            # Дедлайн отсчитывается от первого запуска, в т.ч. после восстановления
+            remaining = None
+            if timeout:
+                remaining = max(timeout - (datetime.now() - execution.started_at).total_seconds(), 0)
+            deadline = loop.time() + remaining if remaining is not None else None
             
-            for step_config in steps:
+            graph = StepGraph(execution.jalm_config.get("steps", []))
+            meta = execution.jalm_config.get("meta", {})
+            max_parallel = meta.get("max_parallel", self.config.max_parallel_steps)
+            use_cache = meta.get("cache", self.config.step_cache_enabled)
+            # Результаты шагов, восстановленные из хранилища
+            outputs: Dict[str, Any] = {step.id: step.output for step in execution.steps}
+            scheduler = StepScheduler(graph, max_parallel)
+            
+            async def run_step(step_id: str, step_config: Dict[str, Any]) -> bool:
                 step = JALMStep(
-                    id=step_config.get("id", str(uuid.uuid4())),
+                    id=step_id,
                     layer=step_config.get("layer", "compute-script"),
                     input=step_config.get("input", {})
                 )
                 
-                # Выполняем шаг
-                start_time = datetime.now()
+                # Выполняем шаг; отметка о начале нужна для восстановления после падения
+                start_time = time.perf_counter()
+                prepared_at = None
+                execution.in_flight.append(step_id)
+                self.store.update(execution)
+                if side_effect(step.layer, step.input, self.step_cards.get(step.layer)) == "write":
+                    # Шаг с записью не запускается, пока отметка не на диске:
+                    # иначе после падения его повторят, не зная о первом запуске
+                    await asyncio.to_thread(self.store.flush)
+                self.events.publish(execution_id, STEP_STARTED, {
+                    "execution_id": execution_id,
+                    "step_id": step_id,
+                    "layer": step.layer
+                })
                 try:
-                    result = await self._execute_step(step)
+                    step.input = resolve_references(step.input, outputs)
+                    step_timeout = self._step_timeout(step, deadline, loop.time())
+                    prepared_at = time.perf_counter()
+                    result = await asyncio.wait_for(
+                        self._execute_step(
+                            step,
+                            cache=step_config.get("cache", use_cache),
+                            cache_ttl=step_config.get("cache_ttl")
+                        ),
+                        step_timeout
+                    )
                     step.output = result
+                except asyncio.TimeoutError as e:
+                    step.error = str(e) or f"Превышен таймаут шага: {step_timeout:.1f} с"
+                    logger.error(f"Таймаут шага {step.id}")
+                except asyncio.CancelledError:
+                    step.error = "Шаг отменён"
+                    step.execution_time = time.perf_counter() - start_time
+                    execution.steps.append(step)
+                    self._publish_step(execution_id, step)
+                    raise
                 except Exception as e:
                     step.error = str(e)
                     logger.error(f"Ошибка выполнения шага {step.id}: {e}")
+                finally:
+                    # При остановке ядра отметка остаётся: по ней recover_executions
+                    # узнаёт шаги, прерванные посреди записи
+                    if not self._closing:
+                        execution.in_flight.remove(step_id)
                 
-                step.execution_time = (datetime.now() - start_time).total_seconds()
+                finished_at = time.perf_counter()
+                step.execution_time = finished_at - start_time
+                self.metrics.observe_step(step.layer, step.execution_time,
+                                          error=bool(step.error), cached=step.cached)
                 execution.steps.append(step)
+                if profile is not None:
+                    prepared_at = prepared_at or finished_at
+                    step_profile = StepProfile(
+                        step_id=step_id,
+                        layer=step.layer,
+                        queue_wait=start_time - scheduler.ready_at.get(step_id, start_time),
+                        input_prep=prepared_at - start_time,
+                        executor=finished_at - prepared_at
+                    )
+                    profile.steps.append(step_profile)
+                self.store.update(execution)
+                self._publish_step(execution_id, step)
+                if profile is not None:
+                    # Попадает в хранилище со следующей записью выполнения
+                    step_profile.serialization = time.perf_counter() - finished_at
                 
-                # Если шаг завершился с ошибкой, останавливаем выполнение
                 if step.error:
-                    execution.status = "failed"
-                    break
+                    return False
+                outputs[step_id] = step.output
+                return True
             
-            if execution.status != "failed":
-                execution.status = "completed"
+            # Независимые шаги выполняются параллельно, после ошибки новые не запускаются
+            succeeded = await asyncio.wait_for(
+                scheduler.run(run_step, completed=set(outputs)),
+                remaining
+            )
+            execution.status = "completed" if succeeded else "failed"
             
+        except asyncio.TimeoutError:
+            execution.status = "failed"
+            execution.error = f"Превышен таймаут выполнения: {timeout} с"
+            logger.error(f"Таймаут выполнения JALM {execution_id}")
+        
+        except asyncio.CancelledError:
+            if self._closing:
+                # Остановка ядра: выполнение остаётся в хранилище и будет восстановлено
+                logger.info(f"Выполнение JALM {execution_id} прервано остановкой ядра")
+            else:
+                # Отмена через DELETE /exec/{id}: шаги в работе уже прерваны планировщиком
+                execution.status = "cancelled"
+                logger.info(f"Выполнение JALM {execution_id} отменено")
+        
         except Exception as e:
             execution.status = "failed"
+            execution.error = str(e)
             logger.error(f"Ошибка выполнения JALM {execution_id}: {e}")
         
         finally:
+            if sampler is not None:
+                stacks = sampler.stop()
+                profile.samples += sampler.samples
+                for stack, count in stacks.items():
+                    profile.stacks[stack] = profile.stacks.get(stack, 0) + count
+            if execution.status in TERMINAL_STATUSES:
+                execution.completed_at = datetime.now()
+                if execution.started_at:
+                    execution.total_time = (execution.completed_at - execution.started_at).total_seconds()
+                self.admission.release(ticket, execution.total_time)
+                if execution.total_time is not None:
+                    self.metrics.observe_execution(execution.status, execution.total_time)
+                self.store.complete(execution)
+                self.events.finish(execution_id, self._finished_event(execution))
+            else:
+                # Остановка ядра: последнее состояние с отметками прерванных шагов
+                self.admission.release(ticket)
+                self.store.update(execution)
+    
+    def _publish_step(self, execution_id: str, step: JALMStep):
+        """Событие завершения шага (сериализуется, только если есть подписчики)"""
+        if self.events.has_subscribers(execution_id):
+            self.events.publish(execution_id, STEP_COMPLETED, self._step_event(execution_id, step))
+    
+    @staticmethod
+    def _step_event(execution_id: str, step: JALMStep) -> Dict[str, Any]:
+        """Событие завершения шага"""
+        return {
+            "execution_id": execution_id,
+            "step_id": step.id,
+            **step.model_dump(exclude={"id", "input"})
+        }
+    
+    @staticmethod
+    def _finished_event(execution: JALMExecution) -> Dict[str, Any]:
+        """Событие завершения выполнения"""
+        return {
+            "execution_id": execution.execution_id,
+            "status": execution.status,
+            "error": execution.error,
+            "total_time": execution.total_time,
+            "completed_at": execution.completed_at
+        }
+    
+    def subscribe_events(self, execution_id: str) -> Tuple[List[Tuple[str, Dict[str, Any]]],
+                                                            Optional[EventSubscription]]:
+        """
+        События уже завершённых шагов и подписка на последующие
+        
+        Снимок и подписка делаются без переключения event loop, поэтому
+        события не теряются и не дублируются. Для завершённого выполнения
+        подписка не нужна: история заканчивается execution-finished.
+        """
+        execution = self.store.get(execution_id)
+        history = [(STEP_COMPLETED, self._step_event(execution_id, step)) for step in execution.steps]
+        if execution.status in TERMINAL_STATUSES:
+            history.append((EXECUTION_FINISHED, self._finished_event(execution)))
+            return history, None
+        if not self.store.is_local(execution_id):
+            # Выполнение идёт в другом рабочем процессе: события из общего хранилища
+            if execution_id not in self._remote_pollers:
+                poller = asyncio.create_task(self._poll_remote_events(execution_id, len(execution.steps)))
+                self._remote_pollers[execution_id] = poller
+                poller.add_done_callback(lambda _: self._remote_pollers.pop(execution_id, None))
+        return history, self.events.subscribe(execution_id)
+    
+    async def _poll_remote_events(self, execution_id: str, seen_steps: int):
+        """Публикация событий выполнения другого процесса по его записям в хранилище"""
+        while True:
+            await asyncio.sleep(self.config.state_poll_interval)
+            if not self.events.has_subscribers(execution_id):
+                return
+            execution = self.store.get(execution_id)
+            if execution is None:
+                return
+            for step in execution.steps[seen_steps:]:
+                self.events.publish(execution_id, STEP_COMPLETED, self._step_event(execution_id, step))
+            seen_steps = len(execution.steps)
+            if execution.status in TERMINAL_STATUSES:
+                self.events.finish(execution_id, self._finished_event(execution))
+                return
+    
+    def _step_timeout(self, step: JALMStep, deadline: Optional[float], now: float) -> Optional[float]:
+        """Таймаут шага: input.timeout, затем карточка слоя, не дальше дедлайна выполнения"""
+        timeout = step.input.get("timeout")
+        if timeout is None:
+            timeout = input_default(self.step_cards.get(step.layer), "timeout")
+        if timeout is None:
+            timeout = self.config.step_timeout
+        if deadline is not None:
+            timeout = min(timeout, max(deadline - now, 0))
+        return timeout
+    
+    def cancel_execution(self, execution_id: str) -> bool:
+        """Отмена выполнения; False, если оно уже завершено"""
+        execution = self.store.get(execution_id)
+        if execution is None or execution.status in TERMINAL_STATUSES:
+            return False
+        
+        task = self.tasks.get(execution_id)
+        if task is None:
+            # Выполнение идёт в другом рабочем процессе - отменит его владелец
+            return self.store.request_cancel(execution_id)
+        if task.done():
+            return False
+        
+        task.cancel()
+        if execution.status == "pending":
+            # Задача ещё не стартовала, её код не выполнится
+            execution.status = "cancelled"
             execution.completed_at = datetime.now()
-            if execution.started_at:
-                execution.total_time = (execution.completed_at - execution.started_at).total_seconds()
+            self.store.complete(execution)
+            self.events.finish(execution_id, self._finished_event(execution))
+        return True
     
-    async def _execute_step(self, step: JALMStep) -> Dict[str, Any]:
-        """Выполнение отдельного шага"""
+    async def _execute_step(self, step: JALMStep, cache: bool = False,
+                            cache_ttl: Optional[float] = None) -> Dict[str, Any]:
+        """Выполнение отдельного шага, с кэшем результата, если он включён"""
         layer = step.layer
         if layer not in self.supported_layers:
             raise ValueError(f"Неподдерживаемый слой: {layer}")
         
         executor = self.supported_layers[layer]
-        return await executor(step.input)
+        ttl = None
+        if cache:
+            # Кэшируются только шаги без записи (side_effect в карточке слоя)
+            ttl = self.step_cache.ttl(layer, step.input, self.step_cards.get(layer), cache_ttl)
+        if ttl is None:
+            return await executor(step.input)
+        
+        key = step_key(layer, step.input)
+        result = self.step_cache.get(key)
+        if result is not None:
+            step.cached = True
+            return result
+        
+        result = await executor(step.input)
+        if not result.get("error"):
+            self.step_cache.put(key, result, ttl)
+        return result
     
     async def _execute_http(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Выполнение HTTP-запросов"""
-        import requests
-        
         method = input_data.get("method", "GET")
         url = input_data.get("url")
         headers = input_data.get("headers", {})
         body = input_data.get("body")
-        timeout = input_data.get("timeout", 30)
+        timeout = input_data.get("timeout", self.config.http_timeout)
         
         if not url:
             raise ValueError("URL обязателен для HTTP-запросов")
         
-        response = requests.request(
-            method=method,
-            url=url,
+        response = await self.http.request(
+            method,
+            url,
             headers=headers,
             json=body,
             timeout=timeout
@@ -176,18 +558,20 @@ class CoreRunner:
     
     async def _execute_db(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Выполнение операций с БД"""
-        # В реальной реализации здесь будет подключение к БД
-        # Пока возвращаем мок-данные
         query = input_data.get("query", "")
         params = input_data.get("params", {})
         
-        logger.info(f"Выполнение DB запроса: {query} с параметрами {params}")
+        if not query:
+            raise ValueError("Запрос обязателен для операций с БД")
         
-        return {
-            "rows": [{"id": 1, "name": "test"}],
-            "row_count": 1,
-            "execution_time": 0.001
-        }
+        return await self.db.execute(
+            query,
+            params,
+            connection_string=input_data.get("connection_string"),
+            timeout=input_data.get("timeout"),
+            fetch_size=input_data.get("fetch_size"),
+            max_rows=input_data.get("max_rows")
+        )
     
     async def _execute_file(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Выполнение файловых операций"""
@@ -216,44 +600,19 @@ class CoreRunner:
         script = input_data.get("script", "")
         language = input_data.get("language", "py")
         variables = input_data.get("variables", {})
+        timeout = input_data.get("timeout", self.config.script_timeout)
         
         if not script:
             raise ValueError("Скрипт обязателен")
         
-        # Создаём временный файл
-        with tempfile.NamedTemporaryFile(mode='w', suffix=f'.{language}', delete=False) as f:
-            f.write(script)
-            temp_file = f.name
+        # Скрипт выполняется на прогретом интерпретаторе из пула
+        result = await self.scripts.run(language, script, variables, timeout)
         
-        try:
-            # Выполняем скрипт
-            if language == "py":
-                result = subprocess.run(
-                    ["python", temp_file],
-                    capture_output=True,
-                    text=True,
-                    timeout=30,
-                    env={**os.environ, **variables}
-                )
-            elif language == "js":
-                result = subprocess.run(
-                    ["node", temp_file],
-                    capture_output=True,
-                    text=True,
-                    timeout=30,
-                    env={**os.environ, **variables}
-                )
-            else:
-                raise ValueError(f"Неподдерживаемый язык: {language}")
-            
-            return {
-                "result": result.stdout.strip(),
-                "error": result.stderr.strip() if result.stderr else None,
-                "return_code": result.returncode
-            }
-        
-        finally:
-            os.unlink(temp_file)
+        return {
+            "result": result["stdout"].strip(),
+            "error": result["stderr"].strip() or None,
+            "return_code": result["return_code"]
+        }
     
     async def _execute_render(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Выполнение рендеринга"""
@@ -262,8 +621,23 @@ class CoreRunner:
         render_type = input_data.get("type", "html")
         
         if render_type == "html":
-            # Простой рендеринг HTML
-            result = template.format(**data)
+            # Скомпилированный шаблон берётся из кэша по хэшу содержимого
+            engine = input_data.get("engine", DEFAULT_ENGINE)
+            # Без явного autoescape - по движку: jinja2 экранирует, format нет
+            autoescape = input_data.get("autoescape")
+            output_path = input_data.get("output_path")
+            
+            if output_path:
+                # Большие страницы пишутся в файл по частям
+                loop = asyncio.get_running_loop()
+                size = await loop.run_in_executor(
+                    self.worker_pool,
+                    self.renderer.render_to_file,
+                    template, data, output_path, engine, autoescape
+                )
+                return {"path": output_path, "size": size, "type": "html"}
+            
+            result = self.renderer.render(template, data, engine, autoescape)
             return {"content": result, "type": "html"}
         
         elif render_type == "json":
@@ -289,8 +663,12 @@ class CoreRunner:
             if not url:
                 raise ValueError("URL обязателен для webhook")
             
-            import requests
-            response = requests.post(url, json=data, timeout=10)
+            response = await self.http.request(
+                "POST",
+                url,
+                json=data,
+                timeout=input_data.get("timeout", 10)
+            )
             
             return {
                 "success": response.status_code == 200,
@@ -300,16 +678,81 @@ class CoreRunner:
         else:
             raise ValueError(f"Неподдерживаемый тип уведомления: {notification_type}")
     
+    async def start(self):
+        """Прогрев пулов ядра и восстановление прерванных выполнений"""
+        await self.scripts.start()
+        await self.recover_executions()
+        self._state_watcher = asyncio.create_task(self._watch_state())
+        if self.config.loop_lag_interval > 0:
+            self._loop_monitor = asyncio.create_task(self.metrics.monitor_loop_lag(
+                self.config.loop_lag_interval,
+                on_tick=lambda: self.metrics.set_queue(self.admission.stats())
+            ))
+    
+    async def _watch_state(self):
+        """Отметка жизни процесса, запросы отмены и выполнения упавших процессов"""
+        while True:
+            await asyncio.sleep(self.config.state_poll_interval)
+            try:
+                # Запросы к общему файлу SQLite могут ждать его блокировку - не в event loop
+                await asyncio.to_thread(self.store.heartbeat)
+                for execution_id in await asyncio.to_thread(self.store.take_cancel_requests):
+                    if self.cancel_execution(execution_id):
+                        logger.info(f"Выполнение JALM {execution_id} отменено по запросу другого процесса")
+                await self.recover_executions()
+            except Exception as e:
+                logger.error(f"Ошибка проверки общего хранилища: {e}")
+    
+    async def close(self):
+        """Освобождение ресурсов ядра"""
+        self._closing = True
+        for watcher in (self._state_watcher, self._loop_monitor):
+            if watcher is not None:
+                watcher.cancel()
+        for poller in list(self._remote_pollers.values()):
+            poller.cancel()
+        
+        # Выполнения в работе сохраняются в хранилище и продолжатся после перезапуска
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        await self.http.aclose()
+        await self.scripts.close()
+        self.db.dispose()
+        await asyncio.to_thread(self.store.close)
+        self.metrics.close()
+        self.worker_pool.shutdown(wait=False)
+    
     def get_execution(self, execution_id: str) -> Optional[JALMExecution]:
         """Получение информации о выполнении"""
-        return self.executions.get(execution_id)
+        return self.store.get(execution_id)
     
-    def list_executions(self) -> List[JALMExecution]:
-        """Список всех выполнений"""
-        return list(self.executions.values())
+    async def list_executions(self, status: Optional[str] = None, layer: Optional[str] = None,
+                              created_after: Optional[datetime] = None,
+                              created_before: Optional[datetime] = None,
+                              cursor: Optional[str] = None,
+                              limit: int = 100) -> Tuple[List[JALMExecution], Optional[str]]:
+        """
+        Страница выполнений с фильтрами, от новых к старым
+        
+        Запрос ждёт записи накопленных изменений и читает SQLite - в пуле
+        потоков, а не в event loop.
+        """
+        return await asyncio.to_thread(
+            self.store.query,
+            status=status,
+            layer=layer,
+            created_after=created_after,
+            created_before=created_before,
+            cursor=cursor,
+            limit=limit
+        )
 
-# Инициализация ядра
-core_runner = CoreRunner()
+# Ядро процесса, создаётся в lifespan
+core_runner: Optional[CoreRunner] = None
 
 # API endpoints
 @app.post("/exec", response_model=Dict[str, str])
@@ -318,14 +761,68 @@ async def execute_jalm(request: ExecutionRequest, background_tasks: BackgroundTa
     try:
         execution_id = await core_runner.execute_jalm(
             request.jalm_config,
-            request.timeout
+            request.timeout,
+            request.app_id,
+            request.profile,
+            request.profile_stacks
         )
         logger.info(f"Запущено выполнение JALM: {execution_id}")
         return {"execution_id": execution_id}
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)}
+        )
     except Exception as e:
         logger.exception("Ошибка запуска выполнения JALM")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/exec/batch")
+async def execute_batch(
+    request: BatchExecutionRequest,
+    wait: bool = Query(False, description="Дождаться всех выполнений и вернуть их потоком NDJSON")
+):
+    """Пакетный запуск JALM-конфигов"""
+    if len(request.executions) > core_runner.config.batch_max_size:
+        raise HTTPException(
+            status_code=413,
+            detail=f"В пачке больше {core_runner.config.batch_max_size} конфигов"
+        )
+    
+    results = await core_runner.execute_batch(request.executions)
+    accepted = [result for result in results if "execution_id" in result]
+    logger.info(f"Запущено выполнений JALM из пачки: {len(accepted)} из {len(results)}")
+    
+    if accepted == [] and results:
+        # Не принят ни один конфиг - как и POST /exec, отвечаем 429
+        raise HTTPException(
+            status_code=429,
+            detail=results[0]["error"],
+            headers={"Retry-After": str(max(result["retry_after"] for result in results))}
+        )
+    
+    if wait:
+        async def stream() -> AsyncIterator[str]:
+            # Сначала отклонённые, затем выполнения в порядке завершения
+            for result in results:
+                if "error" in result:
+                    yield json.dumps(result, ensure_ascii=False) + "\n"
+            index_by_id = {result["execution_id"]: result["index"] for result in accepted}
+            async for execution in core_runner.wait_executions(list(index_by_id)):
+                yield json.dumps({
+                    "index": index_by_id[execution.execution_id],
+                    "execution": execution.model_dump(mode="json")
+                }, ensure_ascii=False) + "\n"
+        
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+    
+    return {
+        "executions": results,
+        "accepted": len(accepted),
+        "rejected": len(results) - len(accepted)
+    }
+
 @app.get("/exec/{execution_id}")
 async def get_execution(execution_id: str):
     """Получение статуса выполнения"""
@@ -335,10 +832,119 @@ async def get_execution(execution_id: str):
     
     return execution
 
+@app.delete("/exec/{execution_id}")
+async def cancel_execution(execution_id: str):
+    """Отмена выполнения с прерыванием шагов в работе"""
+    execution = core_runner.get_execution(execution_id)
+    if not execution:
+        raise HTTPException(status_code=404, detail="Выполнение не найдено")
+    
+    if not core_runner.cancel_execution(execution_id):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Выполнение уже завершено со статусом {execution.status}"
+        )
+    
+    return {"message": "Выполнение отменено", "execution_id": execution_id}
+
+@app.get("/exec/{execution_id}/profile")
+async def execution_profile(
+    execution_id: str,
+    format: str = Query("json", pattern="^(json|collapsed)$",
+                        description="json или collapsed (flamegraph.pl, speedscope)")
+):
+    """Профиль выполнения, запущенного с profile: true"""
+    execution = core_runner.get_execution(execution_id)
+    if not execution:
+        raise HTTPException(status_code=404, detail="Выполнение не найдено")
+    if execution.profile is None:
+        raise HTTPException(status_code=404, detail="Выполнение запущено без профилирования")
+    
+    if format == "collapsed":
+        return Response(
+            content=collapsed_stacks(execution_id, execution.profile),
+            media_type="text/plain; charset=utf-8",
+            headers={"Content-Disposition": f'attachment; filename="{execution_id}.folded"'}
+        )
+    return execution.profile
+
+@app.get("/exec/{execution_id}/events")
+async def execution_events(
+    execution_id: str,
+    include_output: bool = Query(True, description="Передавать результаты шагов")
+):
+    """Поток событий выполнения (Server-Sent Events) вместо опроса статуса"""
+    if not core_runner.get_execution(execution_id):
+        raise HTTPException(status_code=404, detail="Выполнение не найдено")
+    
+    history, subscription = core_runner.subscribe_events(execution_id)
+    
+    def frame(event: str, data: Dict[str, Any]) -> str:
+        if not include_output:
+            data = {key: value for key, value in data.items() if key != "output"}
+        return format_sse(event, data)
+    
+    async def stream() -> AsyncIterator[str]:
+        try:
+            for event, data in history:
+                yield frame(event, data)
+            if subscription is None:
+                return
+            async for item in subscription.events(core_runner.config.event_heartbeat):
+                # Комментарий-пульс держит соединение через прокси
+                yield ": ping\n\n" if item is None else frame(*item)
+        finally:
+            if subscription is not None:
+                core_runner.events.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/exec")
-async def list_executions():
-    """Список всех выполнений"""
-    return core_runner.list_executions()
+async def list_executions(
+    status: Optional[str] = Query(None, description="Фильтр по статусу"),
+    layer: Optional[str] = Query(None, description="Фильтр по слою шагов"),
+    created_after: Optional[datetime] = Query(None, description="Созданы не раньше (ISO 8601)"),
+    created_before: Optional[datetime] = Query(None, description="Созданы раньше (ISO 8601)"),
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы"),
+    limit: int = Query(100, ge=1, le=1000, description="Размер страницы"),
+    format: str = Query("json", pattern="^(json|ndjson)$", description="json или ndjson (поток)")
+):
+    """Список выполнений с фильтрами и курсорной пагинацией"""
+    filters = {
+        "status": status,
+        "layer": layer,
+        "created_after": created_after,
+        "created_before": created_before
+    }
+    try:
+        executions, next_cursor = await core_runner.list_executions(cursor=cursor, limit=limit, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if format == "ndjson":
+        async def stream() -> AsyncIterator[str]:
+            # Поток всех подходящих выполнений, страница за страницей
+            page, page_cursor = executions, next_cursor
+            while True:
+                for execution in page:
+                    yield execution.model_dump_json() + "\n"
+                if not page_cursor:
+                    break
+                page, page_cursor = await core_runner.list_executions(
+                    cursor=page_cursor, limit=limit, **filters
+                )
+        
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+    
+    return {
+        "executions": executions,
+        "next_cursor": next_cursor,
+        "count": len(executions)
+    }
 
 @app.get("/health")
 async def health_check():
@@ -346,9 +952,18 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "supported_layers": list(core_runner.supported_layers.keys())
+        "supported_layers": list(core_runner.supported_layers.keys()),
+        "admission": core_runner.admission.stats(),
+        "render_cache": core_runner.renderer.stats(),
+        "step_cache": core_runner.step_cache.stats()
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Метрики в формате Prometheus"""
+    core_runner.metrics.set_queue(core_runner.admission.stats())
+    return Response(content=core_runner.metrics.render(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/")
 async def root():
     """Корневой endpoint"""
@@ -360,4 +975,11 @@ async def root():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8888) 
\ No newline at end of file
+    workers = RunnerConfig.from_env().workers
+    if workers > 1:
+        # Рабочие процессы делят порт и хранилище выполнений в JALM_STATE_DIR,
+        # метрики - в общем каталоге, иначе /metrics видит только один процесс
+        prepare_multiprocess_dir()
+        uvicorn.run("main:app", host="0.0.0.0", port=8888, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8888) 
\ No newline at end of file
@@ -0,0 +1,145 @@
+"""
+Метрики ядра JALM в формате Prometheus
+Время шагов по слоям, время выполнений, глубина очереди и задержка event loop
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from prometheus_client import (
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+# Добавляем путь к общим модулям сервисов
+sys.path.append(str(Path(__file__).parent.parent.parent.parent / "shared"))
+
+import latency
+
+# Границы корзин: от быстрых шагов из кэша до долгих выполнений
+LATENCY_BUCKETS = latency.LATENCY_BUCKETS + (60.0, 120.0, 300.0)
+LOOP_LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def multiprocess_dir() -> Optional[str]:
+    """Каталог метрик рабочих процессов (PROMETHEUS_MULTIPROC_DIR), если задан"""
+    return os.getenv("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+def prepare_multiprocess_dir() -> str:
+    """
+    Каталог метрик для нескольких рабочих процессов
+
+    Вызывается до запуска процессов: prometheus_client выбирает хранилище
+    значений при импорте. Без PROMETHEUS_MULTIPROC_DIR создаётся временный
+    каталог; файлы метрик прошлого запуска удаляются.
+    """
+    path = multiprocess_dir()
+    if path is None:
+        path = tempfile.mkdtemp(prefix="jalm-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    else:
+        Path(path).mkdir(parents=True, exist_ok=True)
+        for stale in Path(path).glob("*.db"):
+            stale.unlink()
+    return path
+
+
+class RunnerMetrics:
+    """
+    Метрики одного процесса ядра
+
+    Реестр собственный, а не глобальный: несколько экземпляров ядра
+    (тесты, бенчмарк) не конфликтуют за имена метрик.
+    """
+
+    def __init__(self):
+        self.registry = CollectorRegistry(auto_describe=True)
+        self.step_duration = Histogram(
+            "jalm_step_duration_seconds",
+            "Время выполнения шага",
+            ["layer", "outcome"],
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry
+        )
+        self.execution_duration = Histogram(
+            "jalm_execution_duration_seconds",
+            "Время выполнения JALM от запуска до завершения",
+            ["status"],
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry
+        )
+        self.queue_wait = Histogram(
+            "jalm_queue_wait_seconds",
+            "Ожидание места в очереди допуска",
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry
+        )
+        self.queue_depth = Gauge(
+            "jalm_queue_depth",
+            "Выполнения, ожидающие в очереди допуска",
+            multiprocess_mode="livesum",
+            registry=self.registry
+        )
+        self.in_flight = Gauge(
+            "jalm_executions_in_flight",
+            "Выполнения в работе",
+            multiprocess_mode="livesum",
+            registry=self.registry
+        )
+        self.loop_lag = Histogram(
+            "jalm_event_loop_lag_seconds",
+            "Задержка event loop относительно запланированного пробуждения",
+            buckets=LOOP_LAG_BUCKETS,
+            registry=self.registry
+        )
+        self.loop_lag_last = Gauge(
+            "jalm_event_loop_lag_last_seconds",
+            "Последний замер задержки event loop",
+            multiprocess_mode="livemax",
+            registry=self.registry
+        )
+
+    def observe_step(self, layer: str, seconds: float, error: bool = False, cached: bool = False):
+        """Замер шага; outcome - ok, error или cached"""
+        outcome = "error" if error else "cached" if cached else "ok"
+        self.step_duration.labels(layer=layer, outcome=outcome).observe(seconds)
+
+    def observe_execution(self, status: str, seconds: float):
+        """Замер завершённого выполнения"""
+        self.execution_duration.labels(status=status).observe(seconds)
+
+    def set_queue(self, admission_stats: Dict[str, Any]):
+        """Глубина очереди и число выполнений в работе из состояния допуска"""
+        self.queue_depth.set(admission_stats["queued"])
+        self.in_flight.set(admission_stats["running"])
+
+    async def monitor_loop_lag(self, interval: float, on_tick=None):
+        """Фоновый замер задержки event loop; on_tick вызывается после каждого замера"""
+        def observe(lag: float):
+            self.loop_lag.observe(lag)
+            self.loop_lag_last.set(lag)
+            if on_tick is not None:
+                on_tick()
+
+        await latency.monitor_loop_lag(interval, observe)
+
+    def render(self) -> bytes:
+        """Текст метрик; при нескольких процессах - сумма по всем"""
+        path = multiprocess_dir()
+        if path:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry, path=path)
+            return generate_latest(registry)
+        return generate_latest(self.registry)
+
+    def close(self):
+        """Удаление живых gauge процесса из общего каталога метрик"""
+        if multiprocess_dir():
+            multiprocess.mark_process_dead(os.getpid())
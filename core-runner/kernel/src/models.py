@@ -0,0 +1,81 @@
+"""
+Модели данных JALM Core Runner
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, field_validator
+
+
+class JALMStep(BaseModel):
+    """Модель JALM-шага"""
+    id: str
+    layer: str
+    input: Dict[str, Any]
+    output: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    execution_time: Optional[float] = None
+    cached: bool = False  # результат взят из кэша шагов
+
+
+class StepProfile(BaseModel):
+    """Разбивка времени шага по фазам, секунды"""
+    step_id: str
+    layer: str
+    queue_wait: float = 0.0  # от готовности шага до запуска (лимит параллельности)
+    input_prep: float = 0.0  # подстановка ссылок и отметка о начале
+    executor: float = 0.0  # исполнитель слоя
+    serialization: float = 0.0  # запись результата в хранилище и событие
+
+
+class ExecutionProfile(BaseModel):
+    """Профиль выполнения (profile: true в запросе)"""
+    queue_wait: Optional[float] = None  # ожидание в очереди допуска
+    steps: List[StepProfile] = []
+    sample_interval: Optional[float] = None  # задан, если снимаются стеки
+    samples: int = 0
+    stacks: Dict[str, int] = {}  # collapsed stack -> число выборок
+
+
+class JALMExecution(BaseModel):
+    """Модель JALM-выполнения"""
+    execution_id: str
+    jalm_config: Dict[str, Any]
+    steps: List[JALMStep]
+    status: str  # pending, queued, running, completed, failed, cancelled
+    app_id: Optional[str] = None
+    timeout: Optional[int] = None  # секунды, для восстановления после перезапуска
+    in_flight: List[str] = []  # шаги в работе на момент последней записи
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    total_time: Optional[float] = None
+    error: Optional[str] = None
+    profile: Optional[ExecutionProfile] = None
+
+
+class ExecutionRequest(BaseModel):
+    """Модель запроса на выполнение"""
+    jalm_config: Dict[str, Any]
+    timeout: Optional[int] = 300  # секунды
+    app_id: Optional[str] = None  # арендатор для квот, иначе jalm_config.app_id
+    profile: bool = False  # разбивка времени шагов по фазам
+    profile_stacks: bool = False  # вместе с profile: выборочный профиль стеков Python
+
+    @field_validator("jalm_config")
+    @classmethod
+    def check_meta(cls, jalm_config: Dict[str, Any]) -> Dict[str, Any]:
+        """meta.max_parallel - положительное целое: иначе конфиг отклоняется при приёме (422)"""
+        meta = jalm_config.get("meta") or {}
+        if not isinstance(meta, dict):
+            raise ValueError("meta должен быть объектом")
+        max_parallel = meta.get("max_parallel", 1)
+        if isinstance(max_parallel, bool) or not isinstance(max_parallel, int) or max_parallel < 1:
+            raise ValueError(f"meta.max_parallel должен быть положительным целым, получено: {max_parallel!r}")
+        return jalm_config
+
+
+class BatchExecutionRequest(BaseModel):
+    """Модель пакетного запроса на выполнение"""
+    executions: List[ExecutionRequest]
@@ -0,0 +1,111 @@
+"""
+Профилирование выполнений JALM
+Разбивка времени шагов по фазам и выборочный профиль стеков Python
+в формате collapsed stacks (flamegraph.pl, speedscope, inferno)
+"""
+
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Dict, List, Optional
+
+from models import ExecutionProfile
+
+# Фазы шага в порядке выполнения
+PHASES = ("queue_wait", "input_prep", "executor", "serialization")
+
+# Внутренние кадры простаивающего потока: event loop ждёт событий,
+# поток пула ждёт задач, служебный поток asyncio ждёт завершения
+# подпроцесса. Такие выборки не несут информации о нагрузке.
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("unix_events.py", "_do_waitpid"),
+}
+
+
+def _frame_label(frame) -> str:
+    """Подпись кадра: функция (файл:строка)"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class StackSampler:
+    """
+    Выборочный профилировщик стеков всех потоков процесса
+
+    Отдельный поток раз в interval секунд снимает sys._current_frames()
+    и считает одинаковые стеки. Профиль относится к процессу целиком:
+    при параллельных выполнениях в него попадают и чужие шаги.
+    """
+
+    def __init__(self, interval: float, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Запуск потока выборки"""
+        self._thread = threading.Thread(target=self._run, name="jalm-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, int]:
+        """Остановка и накопленные стеки"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return dict(self.stacks)
+
+    def _run(self):
+        """Цикл выборки"""
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = self._collapse(frame)
+                if stack is None:
+                    continue
+                self.stacks[f"{names.get(thread_id, thread_id)};{stack}"] += 1
+            self.samples += 1
+
+    def _collapse(self, frame) -> Optional[str]:
+        """Стек от корня к листу через ';'; None для простаивающего потока"""
+        code = frame.f_code
+        if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+            return None
+
+        labels: List[str] = []
+        while frame is not None and len(labels) < self.max_depth:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+
+def collapsed_stacks(execution_id: str, profile: ExecutionProfile) -> str:
+    """
+    Профиль в формате collapsed stacks: "кадр;кадр;... вес" в строке
+
+    Если снимались стеки, вес - число выборок. Иначе стеки строятся
+    из разбивки по фазам: execution;шаг (слой);фаза, вес - микросекунды.
+    """
+    if profile.stacks:
+        lines = [f"{stack} {count}" for stack, count in profile.stacks.items()]
+        return "\n".join(sorted(lines)) + "\n"
+
+    root = f"execution {execution_id}"
+    lines = []
+    if profile.queue_wait:
+        lines.append(f"{root};admission_wait {round(profile.queue_wait * 1_000_000)}")
+    for step in profile.steps:
+        frame = f"{root};{step.step_id} ({step.layer})"
+        for phase in PHASES:
+            weight = round((getattr(step, phase) or 0.0) * 1_000_000)
+            if weight > 0:
+                lines.append(f"{frame};{phase} {weight}")
+    return "\n".join(lines) + "\n" if lines else ""
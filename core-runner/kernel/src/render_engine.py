@@ -0,0 +1,148 @@
+"""
+Движок шаблонов для слоя render-html
+Шаблон компилируется один раз и хранится в LRU-кэше по хэшу содержимого
+"""
+
+import hashlib
+import html
+import string
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from jinja2 import Environment, StrictUndefined, select_autoescape
+
+from config import RunnerConfig
+
+# Движок по умолчанию - синтаксис str.format ({name}), как в прежних конфигах
+DEFAULT_ENGINE = "format"
+ENGINES = ("format", "jinja2")
+
+
+def default_autoescape(engine: str) -> bool:
+    """
+    Экранирование по умолчанию: у jinja2 включено, у format выключено -
+    прежние конфиги рендерятся так же, как template.format(**data)
+    """
+    return engine == "jinja2"
+
+
+class FormatTemplate:
+    """Шаблон str.format, заранее разобранный на литералы и поля"""
+
+    _formatter = string.Formatter()
+
+    def __init__(self, source: str, autoescape: bool = False):
+        # Экранируются подставленные значения, литералы шаблона - нет
+        self.autoescape = autoescape
+        # (литерал, имя поля, спецификатор формата, преобразование)
+        self.parts: List[Tuple[str, Optional[str], str, Optional[str]]] = [
+            (literal, field_name, format_spec or "", conversion)
+            for literal, field_name, format_spec, conversion in self._formatter.parse(source)
+        ]
+
+    def generate(self, data: Dict[str, Any]) -> Iterator[str]:
+        """Потоковый рендеринг по частям"""
+        formatter = self._formatter
+        for literal, field_name, format_spec, conversion in self.parts:
+            if literal:
+                yield literal
+            if field_name is None:
+                continue
+            value, _ = formatter.get_field(field_name, (), data)
+            value = formatter.convert_field(value, conversion)
+            if "{" in format_spec:
+                # Вложенные поля в спецификаторе: {value:{width}}
+                format_spec = formatter.vformat(format_spec, (), data)
+            text = formatter.format_field(value, format_spec)
+            yield html.escape(text) if self.autoescape else text
+
+    def render(self, data: Dict[str, Any]) -> str:
+        """Рендеринг в строку"""
+        return "".join(self.generate(data))
+
+
+class TemplateRenderer:
+    """
+    Компиляция и кэширование шаблонов
+
+    Ключ кэша - sha256 от движка, режима экранирования и текста шаблона,
+    поэтому одинаковые шаблоны из разных конфигов компилируются один раз.
+    """
+
+    def __init__(self, config: RunnerConfig):
+        self.cache_size = max(1, config.render_cache_size)
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        # Отдельные окружения: с экранированием HTML и без
+        self._environments = {
+            autoescape: Environment(
+                autoescape=select_autoescape(default_for_string=autoescape, default=autoescape),
+                undefined=StrictUndefined,
+                cache_size=0
+            )
+            for autoescape in (True, False)
+        }
+
+    def compile(self, source: str, engine: str = DEFAULT_ENGINE, autoescape: Optional[bool] = None):
+        """Скомпилированный шаблон из кэша или после компиляции; autoescape=None - по движку"""
+        if engine not in ENGINES:
+            raise ValueError(f"Неподдерживаемый движок шаблонов: {engine}")
+        if autoescape is None:
+            autoescape = default_autoescape(engine)
+        autoescape = bool(autoescape)
+
+        key = hashlib.sha256(f"{engine}:{int(autoescape)}:{source}".encode("utf-8")).hexdigest()
+        with self._lock:
+            template = self._cache.get(key)
+            if template is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        if engine == "jinja2":
+            template = self._environments[autoescape].from_string(source)
+        else:
+            template = FormatTemplate(source, autoescape)
+
+        with self._lock:
+            self._cache[key] = template
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return template
+
+    def render(self, source: str, data: Dict[str, Any], engine: str = DEFAULT_ENGINE,
+               autoescape: Optional[bool] = None) -> str:
+        """Рендеринг шаблона в строку"""
+        return self.compile(source, engine, autoescape).render(data)
+
+    def generate(self, source: str, data: Dict[str, Any], engine: str = DEFAULT_ENGINE,
+                 autoescape: Optional[bool] = None) -> Iterator[str]:
+        """Потоковый рендеринг: части страницы по мере готовности"""
+        return self.compile(source, engine, autoescape).generate(data)
+
+    def render_to_file(self, source: str, data: Dict[str, Any], path: str,
+                       engine: str = DEFAULT_ENGINE, autoescape: Optional[bool] = None) -> int:
+        """Потоковая запись большой страницы в файл без сборки строки в памяти"""
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        size = 0
+        with open(target, "w", encoding="utf-8") as f:
+            for chunk in self.generate(source, data, engine, autoescape):
+                f.write(chunk)
+                size += len(chunk.encode("utf-8"))
+        return size
+
+    def stats(self) -> Dict[str, int]:
+        """Состояние кэша шаблонов"""
+        return {
+            "size": len(self._cache),
+            "capacity": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
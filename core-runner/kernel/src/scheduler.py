@@ -0,0 +1,179 @@
+"""
+Планировщик шагов JALM
+Строит DAG зависимостей между шагами и выполняет независимые шаги параллельно
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+# Ссылка на результат другого шага: ${step_id} или ${step_id.body.items}
+STEP_REF_PATTERN = re.compile(r"\$\{\s*([A-Za-z0-9_\-]+)((?:\.[A-Za-z0-9_\-]+)*)\s*\}")
+
+
+def find_references(value: Any) -> Set[str]:
+    """Поиск идентификаторов шагов, на которые ссылается значение"""
+    refs: Set[str] = set()
+    if isinstance(value, str):
+        refs.update(match.group(1) for match in STEP_REF_PATTERN.finditer(value))
+    elif isinstance(value, dict):
+        for item in value.values():
+            refs |= find_references(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            refs |= find_references(item)
+    return refs
+
+
+def _lookup(outputs: Dict[str, Any], step_id: str, path: str) -> Any:
+    """Получение значения по пути внутри результата шага"""
+    if step_id not in outputs:
+        raise ValueError(f"Результат шага {step_id} недоступен")
+
+    value = outputs[step_id]
+    for key in filter(None, path.split(".")):
+        if isinstance(value, dict) and key in value:
+            value = value[key]
+        elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+            value = value[int(key)]
+        else:
+            raise ValueError(f"Поле {key} не найдено в результате шага {step_id}")
+    return value
+
+
+def resolve_references(value: Any, outputs: Dict[str, Any]) -> Any:
+    """Подстановка результатов завершённых шагов вместо ссылок ${...}"""
+    if isinstance(value, str):
+        match = STEP_REF_PATTERN.fullmatch(value.strip())
+        if match:
+            # Ссылка целиком - сохраняем тип значения
+            return _lookup(outputs, match.group(1), match.group(2))
+        return STEP_REF_PATTERN.sub(
+            lambda m: str(_lookup(outputs, m.group(1), m.group(2))),
+            value
+        )
+    if isinstance(value, dict):
+        return {key: resolve_references(item, outputs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, outputs) for item in value]
+    return value
+
+
+class StepGraph:
+    """DAG шагов JALM-конфига"""
+
+    def __init__(self, steps: List[Dict[str, Any]]):
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self.dependencies: Dict[str, Set[str]] = {}
+        self.dependents: Dict[str, List[str]] = {}
+
+        for index, step_config in enumerate(steps):
+            # Id без явного указания детерминирован: нужен для восстановления после перезапуска
+            step_id = step_config.get("id") or f"step_{index}"
+            if step_id in self.steps:
+                raise ValueError(f"Дублирующийся id шага: {step_id}")
+            self.steps[step_id] = step_config
+
+        for step_id, step_config in self.steps.items():
+            depends_on = step_config.get("depends_on", [])
+            if isinstance(depends_on, str):
+                depends_on = [depends_on]
+
+            deps = set(depends_on) | find_references(step_config.get("input", {}))
+            deps.discard(step_id)
+
+            unknown = deps - self.steps.keys()
+            if unknown:
+                raise ValueError(
+                    f"Шаг {step_id} зависит от неизвестных шагов: {', '.join(sorted(unknown))}"
+                )
+
+            self.dependencies[step_id] = deps
+            self.dependents.setdefault(step_id, [])
+            for dep in deps:
+                self.dependents.setdefault(dep, []).append(step_id)
+
+        self._check_acyclic()
+
+    def _check_acyclic(self):
+        """Проверка отсутствия циклов (алгоритм Кана)"""
+        in_degree = {step_id: len(deps) for step_id, deps in self.dependencies.items()}
+        ready = [step_id for step_id, degree in in_degree.items() if degree == 0]
+        visited = 0
+
+        while ready:
+            step_id = ready.pop()
+            visited += 1
+            for dependent in self.dependents[step_id]:
+                in_degree[dependent] -= 1
+                if in_degree[dependent] == 0:
+                    ready.append(dependent)
+
+        if visited != len(self.steps):
+            cycle = sorted(step_id for step_id, degree in in_degree.items() if degree > 0)
+            raise ValueError(f"Циклическая зависимость между шагами: {', '.join(cycle)}")
+
+
+class StepScheduler:
+    """Выполнение DAG шагов с ограничением параллелизма"""
+
+    def __init__(self, graph: StepGraph, max_parallel: int = 4):
+        self.graph = graph
+        self.max_parallel = max(1, max_parallel)
+        # Момент готовности шага к запуску (time.perf_counter), для профилирования
+        self.ready_at: Dict[str, float] = {}
+
+    async def run(self, run_step: Callable[[str, Dict[str, Any]], Awaitable[bool]],
+                  completed: Optional[Set[str]] = None) -> bool:
+        """
+        Выполняет шаги в порядке зависимостей
+
+        run_step(step_id, step_config) возвращает True при успехе.
+        После первой ошибки новые шаги не запускаются, уже запущенные
+        дорабатывают до конца. Шаги из completed (восстановленные после
+        перезапуска) считаются выполненными и не запускаются.
+        """
+        completed = completed or set()
+        remaining = {
+            step_id: len(deps - completed) for step_id, deps in self.graph.dependencies.items()
+        }
+        # Сохраняем порядок объявления шагов среди готовых к запуску
+        ready = [
+            step_id for step_id in self.graph.steps
+            if remaining[step_id] == 0 and step_id not in completed
+        ]
+        running: Dict[asyncio.Task, str] = {}
+        failed = False
+        started = time.perf_counter()
+        self.ready_at.update((step_id, started) for step_id in ready)
+
+        try:
+            while ready or running:
+                while ready and len(running) < self.max_parallel and not failed:
+                    step_id = ready.pop(0)
+                    task = asyncio.create_task(run_step(step_id, self.graph.steps[step_id]))
+                    running[task] = step_id
+
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step_id = running.pop(task)
+                    if task.exception() is not None or not task.result():
+                        failed = True
+                        continue
+                    for dependent in self.graph.dependents[step_id]:
+                        remaining[dependent] -= 1
+                        if remaining[dependent] == 0:
+                            ready.append(dependent)
+                            self.ready_at[dependent] = time.perf_counter()
+        finally:
+            # При отмене или таймауте прерываем шаги в работе и дожидаемся их остановки
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+
+        return not failed
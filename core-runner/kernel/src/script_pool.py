@@ -0,0 +1,205 @@
+"""
+Пул прогретых интерпретаторов для слоя compute-script
+Долгоживущие процессы python/node принимают скрипты через отдельную пару
+каналов: stdin/stdout воркера остаются у скриптов и не пересекаются
+с протоколом
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config import RunnerConfig
+
+logger = logging.getLogger("jalm-core-runner")
+
+WORKERS_DIR = Path(__file__).parent / "workers"
+
+# Команды запуска воркеров по языкам
+WORKER_COMMANDS: Dict[str, List[str]] = {
+    "py": [sys.executable, "-u", str(WORKERS_DIR / "py_worker.py")],
+    "js": ["node", str(WORKERS_DIR / "js_worker.js")],
+}
+
+# Лимит размера одной строки протокола (вывод скрипта)
+STREAM_LIMIT = 16 * 1024 * 1024
+
+# Переменная окружения воркера: дескрипторы "задания,ответы"
+PROTOCOL_FDS_ENV = "JALM_WORKER_FDS"
+
+
+class ScriptWorker:
+    """Один долгоживущий процесс-интерпретатор"""
+
+    def __init__(self, language: str):
+        self.language = language
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.jobs: Optional[asyncio.StreamWriter] = None
+        self.results: Optional[asyncio.StreamReader] = None
+        self._results_transport: Optional[asyncio.BaseTransport] = None
+        self.jobs_done = 0
+        # Воркер попросил замену: после задания в нём могли остаться чужие таймеры
+        self.retired = False
+
+    async def start(self):
+        """Запуск процесса воркера"""
+        jobs_read, jobs_write = os.pipe()
+        results_read, results_write = os.pipe()
+        try:
+            # stdin/stdout/stderr воркера - /dev/null: чтение stdin и прямые
+            # записи скрипта в fd 1 не попадают в протокол
+            self.process = await asyncio.create_subprocess_exec(
+                *WORKER_COMMANDS[self.language],
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL,
+                pass_fds=(jobs_read, results_write),
+                env={**os.environ, PROTOCOL_FDS_ENV: f"{jobs_read},{results_write}"}
+            )
+        except BaseException:
+            for fd in (jobs_write, results_read):
+                os.close(fd)
+            raise
+        finally:
+            os.close(jobs_read)
+            os.close(results_write)
+
+        loop = asyncio.get_running_loop()
+        self.results = asyncio.StreamReader(limit=STREAM_LIMIT, loop=loop)
+        self._results_transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(self.results, loop=loop),
+            os.fdopen(results_read, "rb", 0)
+        )
+        transport, protocol = await loop.connect_write_pipe(
+            lambda: asyncio.StreamReaderProtocol(asyncio.StreamReader(loop=loop), loop=loop),
+            os.fdopen(jobs_write, "wb", 0)
+        )
+        self.jobs = asyncio.StreamWriter(transport, protocol, None, loop)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def run(self, script: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """Отправка задания и ожидание ответа"""
+        job = json.dumps({"script": script, "variables": variables}) + "\n"
+        self.jobs.write(job.encode("utf-8"))
+        await self.jobs.drain()
+
+        line = await self.results.readline()
+        if not line:
+            raise RuntimeError(f"Воркер {self.language} завершился во время выполнения скрипта")
+
+        self.jobs_done += 1
+        result = json.loads(line)
+        self.retired = bool(result.pop("retire", False))
+        return result
+
+    async def stop(self):
+        """Остановка процесса воркера"""
+        if self.jobs is not None:
+            self.jobs.close()
+            self._results_transport.close()
+            self.jobs = None
+        if not self.alive:
+            return
+        self.process.kill()
+        await self.process.wait()
+
+
+class ScriptWorkerPool:
+    """
+    Пул воркеров по языкам
+
+    Воркер перезапускается после script_max_jobs_per_worker заданий,
+    после таймаута и после аварийного завершения.
+    """
+
+    def __init__(self, config: RunnerConfig):
+        self.config = config
+        self._idle: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, List[ScriptWorker]] = {}
+        self._lock = asyncio.Lock()
+
+    def available_languages(self) -> List[str]:
+        """Языки, для которых найден интерпретатор"""
+        return [
+            language for language, command in WORKER_COMMANDS.items()
+            if shutil.which(command[0])
+        ]
+
+    async def start(self, languages: Optional[List[str]] = None):
+        """Предварительный запуск воркеров"""
+        for language in languages or self.available_languages():
+            await self._ensure_language(language)
+
+    async def _ensure_language(self, language: str) -> asyncio.Queue:
+        """Ленивое создание пула воркеров для языка"""
+        if language in self._idle:
+            return self._idle[language]
+
+        async with self._lock:
+            if language not in self._idle:
+                queue: asyncio.Queue = asyncio.Queue()
+                workers = []
+                for _ in range(max(1, self.config.script_workers_per_language)):
+                    worker = ScriptWorker(language)
+                    await worker.start()
+                    workers.append(worker)
+                    queue.put_nowait(worker)
+                self._workers[language] = workers
+                self._idle[language] = queue
+                logger.info(f"Запущено воркеров {language}: {len(workers)}")
+        return self._idle[language]
+
+    async def _replace(self, language: str, worker: ScriptWorker) -> ScriptWorker:
+        """Замена воркера новым процессом"""
+        await worker.stop()
+        fresh = ScriptWorker(language)
+        await fresh.start()
+        workers = self._workers[language]
+        workers[workers.index(worker)] = fresh
+        return fresh
+
+    async def run(self, language: str, script: str, variables: Dict[str, Any],
+                  timeout: float) -> Dict[str, Any]:
+        """Выполнение скрипта на свободном воркере"""
+        if language not in WORKER_COMMANDS:
+            raise ValueError(f"Неподдерживаемый язык: {language}")
+
+        queue = await self._ensure_language(language)
+        worker: ScriptWorker = await queue.get()
+        healthy = False
+        try:
+            if not worker.alive:
+                worker = await self._replace(language, worker)
+            try:
+                result = await asyncio.wait_for(worker.run(script, variables), timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"Скрипт превысил таймаут {timeout} с")
+            healthy = True
+            return result
+        finally:
+            if not healthy:
+                # После таймаута или отмены протокол воркера рассинхронизирован
+                await worker.stop()
+            if (not worker.alive or worker.retired
+                    or worker.jobs_done >= self.config.script_max_jobs_per_worker):
+                try:
+                    worker = await self._replace(language, worker)
+                except Exception as e:
+                    logger.error(f"Не удалось перезапустить воркер {language}: {e}")
+            queue.put_nowait(worker)
+
+    async def close(self):
+        """Остановка всех воркеров"""
+        for workers in self._workers.values():
+            for worker in workers:
+                await worker.stop()
+        self._workers.clear()
+        self._idle.clear()
@@ -0,0 +1,130 @@
+"""
+Кэш результатов шагов JALM
+Результат шага без побочных эффектов переиспользуется по хэшу слоя и input
+"""
+
+import copy
+import hashlib
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from config import RunnerConfig
+
+# Безопасные HTTP-методы: не меняют состояние на стороне сервера
+SAFE_HTTP_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Поля input, не влияющие на результат шага
+IGNORED_INPUT_FIELDS = {"timeout"}
+
+
+def side_effect(layer: str, input_data: Dict[str, Any], card: Optional[Dict[str, Any]]) -> str:
+    """
+    Побочный эффект шага: none, read или write
+
+    Берётся из карточки слоя (side_effect), но уточняется по input:
+    карточка описывает слой целиком, а не конкретный вызов.
+    """
+    effect = (card or {}).get("side_effect") or "write"
+
+    if layer == "io-http":
+        # Ответ удалённого API меняется со временем - это чтение, а не чистая функция
+        method = str(input_data.get("method", "GET")).upper()
+        return "read" if method in SAFE_HTTP_METHODS else "write"
+    if layer == "io-db":
+        query = str(input_data.get("query", "")).lstrip().split(None, 1)
+        if not query or query[0].upper() not in ("SELECT", "WITH"):
+            return "write"
+    if layer == "render-html" and input_data.get("output_path"):
+        return "write"
+    return effect
+
+
+def step_key(layer: str, input_data: Dict[str, Any]) -> str:
+    """Канонический хэш слоя и input шага"""
+    payload = {
+        "layer": layer,
+        "input": {key: value for key, value in input_data.items() if key not in IGNORED_INPUT_FIELDS}
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class StepResultCache:
+    """
+    LRU-кэш результатов шагов с бюджетом памяти
+
+    - side_effect: none - результат хранится до вытеснения
+    - side_effect: read - результат живёт step_cache_read_ttl секунд
+    - side_effect: write - не кэшируется
+    """
+
+    def __init__(self, config: RunnerConfig):
+        self.budget = config.step_cache_memory_mb * 1024 * 1024
+        self.read_ttl = config.step_cache_read_ttl
+        # key -> (результат, размер в байтах, момент истечения)
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl(self, layer: str, input_data: Dict[str, Any], card: Optional[Dict[str, Any]],
+            ttl_override: Optional[float] = None) -> Optional[float]:
+        """Время жизни результата; None, если шаг нельзя кэшировать"""
+        effect = side_effect(layer, input_data, card)
+        if effect == "none":
+            return math.inf if ttl_override is None else ttl_override
+        if effect == "read":
+            ttl = self.read_ttl if ttl_override is None else ttl_override
+            return ttl if ttl > 0 else None
+        return None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Копия сохранённого результата или None"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] < time.monotonic():
+            self._drop(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return copy.deepcopy(entry[0])
+
+    def put(self, key: str, output: Dict[str, Any], ttl: float):
+        """Сохранение результата с вытеснением по бюджету памяти"""
+        size = len(json.dumps(output, ensure_ascii=False, default=str).encode("utf-8"))
+        if size > self.budget:
+            return
+
+        self._drop(key)
+        self._entries[key] = (copy.deepcopy(output), size, time.monotonic() + ttl)
+        self._bytes += size
+        while self._bytes > self.budget:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        """Удаление записи"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def stats(self) -> Dict[str, Any]:
+        """Метрики кэша"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "budget_bytes": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
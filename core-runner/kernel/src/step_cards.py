@@ -0,0 +1,34 @@
+"""
+Карточки шагов JALM
+Загрузка kernel/step_cards/*.yml и значения по умолчанию для слоёв
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import yaml
+
+STEP_CARDS_DIR = Path(__file__).parent.parent / "step_cards"
+
+
+def load_step_cards(cards_dir: Path = STEP_CARDS_DIR) -> Dict[str, Dict[str, Any]]:
+    """Загружает карточки шагов, ключ - слой"""
+    cards: Dict[str, Dict[str, Any]] = {}
+    if not cards_dir.exists():
+        return cards
+
+    for card_path in sorted(cards_dir.glob("*.yml")):
+        with open(card_path, 'r', encoding='utf-8') as f:
+            card = yaml.safe_load(f) or {}
+        layer = card.get("layer")
+        if layer:
+            cards.setdefault(layer, card)
+    return cards
+
+
+def input_default(card: Optional[Dict[str, Any]], field: str) -> Any:
+    """Значение по умолчанию поля input из карточки"""
+    if not card:
+        return None
+    spec = (card.get("input") or {}).get(field) or {}
+    return spec.get("default")
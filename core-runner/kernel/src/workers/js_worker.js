@@ -0,0 +1,176 @@
+// Прогретый Node.js-воркер для слоя compute-script
+//
+// Читает задания построчно в формате JSON из канала заданий и отвечает одной
+// JSON-строкой в канал ответов (дескрипторы - в JALM_WORKER_FDS). Вывод
+// скрипта через console и process.stdout/stderr попадает в результат задания.
+// Каждое задание выполняется в новом vm-контексте; ответ отправляется, когда
+// завершились все таймеры и асинхронные операции задания (зависший скрипт
+// прерывает таймаут пула). После выполнения process.env и cwd восстанавливаются.
+
+const asyncHooks = require("async_hooks");
+const fs = require("fs");
+const net = require("net");
+const readline = require("readline");
+const util = require("util");
+const vm = require("vm");
+
+const [jobsFd, resultsFd] = process.env.JALM_WORKER_FDS.split(",").map(Number);
+delete process.env.JALM_WORKER_FDS;
+
+// Текущее задание: буферы вывода, код возврата, незавершённые операции
+let current = null;
+
+// Асинхронные операции, созданные во время задания (кроме промисов:
+// их продолжения выполняются до выхода из очереди микрозадач) -
+// и самим скриптом, и его колбэками; internal - собственные таймеры воркера
+let internal = false;
+asyncHooks.createHook({
+  init(asyncId, type, triggerAsyncId, resource) {
+    if (current && !internal && type !== "PROMISE") {
+      current.pending.set(asyncId, resource);
+    }
+  },
+  destroy(asyncId) {
+    if (current) {
+      current.pending.delete(asyncId);
+    }
+  },
+}).enable();
+
+// Прямые записи в process.stdout/stderr идут в буферы задания
+const captureStream = (stream, name) => {
+  stream.write = (chunk, encoding, callback) => {
+    if (current) {
+      current[name].push(typeof chunk === "string" ? chunk : Buffer.from(chunk).toString());
+    }
+    const done = typeof encoding === "function" ? encoding : callback;
+    if (done) {
+      done();
+    }
+    return true;
+  };
+};
+captureStream(process.stdout, "stdout");
+captureStream(process.stderr, "stderr");
+
+class ScriptExit extends Error {
+  constructor(code) {
+    super(`process.exit(${code})`);
+    this.code = code;
+  }
+}
+
+const realExit = process.exit;
+process.exit = (code) => {
+  throw new ScriptExit(code === undefined ? 0 : code);
+};
+
+const fail = (err) => {
+  if (!current) {
+    return;
+  }
+  if (err instanceof ScriptExit) {
+    current.returnCode = err.code;
+    current.exited = true;
+    return;
+  }
+  current.stderr.push((err && err.stack ? err.stack : String(err)) + "\n");
+  current.returnCode = 1;
+};
+process.on("uncaughtException", fail);
+process.on("unhandledRejection", fail);
+
+// Пауза воркера, которая сама не считается операцией задания
+const idle = (ms) => new Promise((resolve) => {
+  internal = true;
+  try {
+    setTimeout(resolve, ms);
+  } finally {
+    internal = false;
+  }
+});
+
+async function settle(job) {
+  while (job.pending.size && !job.exited) {
+    await idle(1);
+  }
+}
+
+async function runJob(message) {
+  const variables = message.variables || {};
+  const job = { stdout: [], stderr: [], returnCode: 0, exited: false, pending: new Map() };
+
+  const savedEnv = Object.assign({}, process.env);
+  const savedCwd = process.cwd();
+
+  for (const [key, value] of Object.entries(variables)) {
+    process.env[key] = String(value);
+  }
+
+  const write = (name) => (...args) => job[name].push(util.format(...args) + "\n");
+  const sandbox = Object.assign({}, variables, {
+    console: {
+      log: write("stdout"),
+      info: write("stdout"),
+      warn: write("stderr"),
+      error: write("stderr"),
+    },
+    require,
+    process,
+    Buffer,
+    setTimeout,
+    clearTimeout,
+    setInterval,
+    clearInterval,
+    setImmediate,
+    clearImmediate,
+    queueMicrotask,
+  });
+
+  current = job;
+  try {
+    const value = vm.runInNewContext(message.script, sandbox, { filename: "jalm-script.js" });
+    if (value && typeof value.then === "function") {
+      await value;
+    }
+    await settle(job);
+  } catch (err) {
+    fail(err);
+  } finally {
+    for (const key of Object.keys(process.env)) {
+      if (!(key in savedEnv)) {
+        delete process.env[key];
+      }
+    }
+    Object.assign(process.env, savedEnv);
+    process.chdir(savedCwd);
+  }
+  current = null;
+
+  // После process.exit операции задания могли остаться - воркер заменяется
+  return {
+    stdout: job.stdout.join(""),
+    stderr: job.stderr.join(""),
+    return_code: job.returnCode,
+    retire: job.exited && job.pending.size > 0,
+  };
+}
+
+const respond = (result) => {
+  const data = Buffer.from(JSON.stringify(result) + "\n");
+  let offset = 0;
+  while (offset < data.length) {
+    offset += fs.writeSync(resultsFd, data, offset);
+  }
+};
+
+// Задания выполняются строго по очереди
+let queue = Promise.resolve();
+const jobs = new net.Socket({ fd: jobsFd, readable: true, writable: false });
+jobs.on("end", () => realExit(0));
+readline.createInterface({ input: jobs }).on("line", (line) => {
+  if (!line.trim()) {
+    return;
+  }
+  queue = queue.then(() => runJob(JSON.parse(line))).then(respond);
+});
@@ -0,0 +1,79 @@
+"""
+Прогретый Python-воркер для слоя compute-script
+
+Читает задания построчно в формате JSON из канала заданий и отвечает одной
+JSON-строкой в канал ответов (дескрипторы - в JALM_WORKER_FDS). stdin и
+stdout процесса остаются скриптам: чтение stdin не заберёт следующее
+задание, запись в fd 1 не испортит ответ. Каждое задание выполняется в чистом пространстве имён, после выполнения
+окружение процесса (env, cwd, argv, sys.path) восстанавливается.
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import traceback
+
+
+def run_job(job):
+    """Выполнение одного скрипта с захватом вывода"""
+    variables = job.get("variables") or {}
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    return_code = 0
+
+    saved_env = dict(os.environ)
+    saved_cwd = os.getcwd()
+    saved_argv = list(sys.argv)
+    saved_path = list(sys.path)
+
+    os.environ.update({key: str(value) for key, value in variables.items()})
+    namespace = {"__name__": "__main__", "__builtins__": __builtins__}
+    namespace.update(variables)
+
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            code = compile(job["script"], "<jalm-script>", "exec")
+            exec(code, namespace)
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            return_code = e.code
+        elif e.code is not None:
+            stderr.write(str(e.code))
+            return_code = 1
+    except BaseException:
+        stderr.write(traceback.format_exc())
+        return_code = 1
+    finally:
+        os.environ.clear()
+        os.environ.update(saved_env)
+        os.chdir(saved_cwd)
+        sys.argv[:] = saved_argv
+        sys.path[:] = saved_path
+
+    return {
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "return_code": return_code
+    }
+
+
+def main():
+    jobs_fd, results_fd = (int(fd) for fd in os.environ.pop("JALM_WORKER_FDS").split(","))
+    # Дочерние процессы скриптов не наследуют каналы протокола
+    os.set_inheritable(jobs_fd, False)
+    os.set_inheritable(results_fd, False)
+    jobs = os.fdopen(jobs_fd, "r", encoding="utf-8")
+    results = os.fdopen(results_fd, "w", encoding="utf-8")
+
+    for line in jobs:
+        if not line.strip():
+            continue
+        result = run_job(json.loads(line))
+        results.write(json.dumps(result) + "\n")
+        results.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+Нагрузочный тест и бенчмарк пути /exec JALM Core Runner
+
+Синтетические JALM-конфиги задействуют все 6 слоёв, HTTP- и webhook-цели
+обслуживает локальная заглушка. Режимы:
+- inprocess - CoreRunner в этом процессе, без HTTP
+- http - запущенное ядро (--url) или поднятое скриптом (--spawn)
+
+Результат - JSON (пропускная способность, p50/p95/p99 по выполнениям и
+слоям, задержка event loop), который можно сравнить с прошлым прогоном:
+
+    python scripts/benchmark.py --requests 500 --concurrency 50 --output bench.json
+    python scripts/benchmark.py --mode http --spawn --compare bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+KERNEL_SRC = Path(__file__).parent.parent / "kernel" / "src"
+LAYERS = ["io-http", "io-db", "io-file", "compute-script", "render-html", "notify-mq"]
+
+CATALOG_PAYLOAD = json.dumps({
+    "items": [{"id": i, "title": f"Услуга {i}", "price": 100 + i} for i in range(20)]
+}).encode("utf-8")
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Заглушка внешнего API (GET) и получателя webhook (POST)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, body: bytes):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply(CATALOG_PAYLOAD)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply(b'{"ok": true}')
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer:
+    """Локальная заглушка HTTP-целей в фоновом потоке"""
+
+    def __init__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StandInServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def build_config(index: int, layers: List[str], target_url: str, work_dir: Path) -> Dict[str, Any]:
+    """Синтетический JALM-конфиг: по одному независимому шагу на слой"""
+    inputs = {
+        "io-http": {"method": "GET", "url": f"{target_url}/catalog"},
+        "io-db": {"query": "SELECT :index AS value", "params": {"index": index}},
+        "io-file": {
+            "operation": "write",
+            "path": str(work_dir / f"bench_{index}.txt"),
+            "content": f"booking {index}\n" * 20
+        },
+        "compute-script": {
+            "language": "py",
+            "script": "print(sum(i * i for i in range(1000)))"
+        },
+        "render-html": {
+            "template": "<h1>{title}</h1><p>{user[name]}: {total:.2f}</p>",
+            "data": {"title": f"Заказ {index}", "user": {"name": "Анна"}, "total": index * 1.5}
+        },
+        "notify-mq": {"type": "webhook", "url": f"{target_url}/webhook", "data": {"index": index}},
+    }
+    return {
+        "intent": "benchmark",
+        "steps": [
+            {"id": layer.replace("-", "_"), "layer": layer, "input": inputs[layer]}
+            for layer in layers
+        ]
+    }
+
+
+class LoopLagMonitor:
+    """Задержка event loop: насколько позже срока просыпается sleep(interval)"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(loop.time() - expected, 0.0) * 1000)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Процентиль по методу ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """Сводка по выборке задержек, мс"""
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered), 3) if ordered else 0.0,
+        "p50": round(percentile(ordered, 50), 3),
+        "p95": round(percentile(ordered, 95), 3),
+        "p99": round(percentile(ordered, 99), 3),
+        "max": round(ordered[-1], 3) if ordered else 0.0,
+    }
+
+
+class Collector:
+    """Накопление результатов выполнений"""
+
+    def __init__(self):
+        self.execution_ms: List[float] = []
+        self.layer_ms: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, int] = {}
+        self.rejected = 0
+        self.errors: List[str] = []
+
+    def add(self, latency: float, status: str, steps: List[Dict[str, Any]], error: Optional[str]):
+        self.execution_ms.append(latency * 1000)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        for step in steps:
+            if step.get("execution_time") is not None:
+                self.layer_ms.setdefault(step["layer"], []).append(step["execution_time"] * 1000)
+            if step.get("error") and len(self.errors) < 10:
+                self.errors.append(f"{step['layer']}: {step['error']}")
+        if error and len(self.errors) < 10:
+            self.errors.append(error)
+
+
+async def run_inprocess(args, layers: List[str], target_url: str, work_dir: Path,
+                        collector: Collector, lag: LoopLagMonitor) -> float:
+    """Прогон через CoreRunner в этом процессе"""
+    os.environ.setdefault("JALM_STATE_DIR", str(work_dir / "state"))
+    sys.path.append(str(KERNEL_SRC))
+    import main as kernel
+    from admission import AdmissionRejected
+
+    # Журнал каждого выполнения искажает замер
+    logging.getLogger().setLevel(logging.WARNING)
+
+    runner = kernel.CoreRunner()
+    await runner.start()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(index: int, record: bool):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                execution_id = await runner.execute_jalm(
+                    build_config(index, layers, target_url, work_dir), args.timeout
+                )
+            except AdmissionRejected:
+                if record:
+                    collector.rejected += 1
+                return
+            async for execution in runner.wait_executions([execution_id]):
+                if record:
+                    collector.add(
+                        time.perf_counter() - started,
+                        execution.status,
+                        [step.model_dump(include={"layer", "error", "execution_time"})
+                         for step in execution.steps],
+                        execution.error
+                    )
+
+    try:
+        await asyncio.gather(*(one(i, False) for i in range(args.warmup)))
+        lag.start()
+        started = time.perf_counter()
+        await asyncio.gather(*(one(args.warmup + i, True) for i in range(args.requests)))
+        return time.perf_counter() - started
+    finally:
+        await lag.stop()
+        await runner.close()
+
+
+async def run_http(args, layers: List[str], target_url: str, work_dir: Path,
+                   collector: Collector, lag: LoopLagMonitor) -> float:
+    """Прогон через HTTP API ядра: POST /exec и поток событий до завершения"""
+    import httpx
+
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout) as client:
+        async def one(index: int, record: bool):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/exec", json={
+                    "jalm_config": build_config(index, layers, target_url, work_dir),
+                    "timeout": args.timeout
+                })
+                if response.status_code == 429:
+                    if record:
+                        collector.rejected += 1
+                    return
+                response.raise_for_status()
+                execution_id = response.json()["execution_id"]
+
+                steps: List[Dict[str, Any]] = []
+                finished: Dict[str, Any] = {}
+                event = None
+                async with client.stream(
+                    "GET", f"/exec/{execution_id}/events", params={"include_output": "false"}
+                ) as stream:
+                    async for line in stream.aiter_lines():
+                        if line.startswith("event: "):
+                            event = line[len("event: "):]
+                        elif line.startswith("data: "):
+                            data = json.loads(line[len("data: "):])
+                            if event == "step-completed":
+                                steps.append(data)
+                            elif event == "execution-finished":
+                                finished = data
+                                break
+                if record:
+                    collector.add(
+                        time.perf_counter() - started,
+                        finished.get("status", "unknown"),
+                        steps,
+                        finished.get("error")
+                    )
+
+        await asyncio.gather(*(one(i, False) for i in range(args.warmup)))
+        lag.start()
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(one(args.warmup + i, True) for i in range(args.requests)))
+        finally:
+            await lag.stop()
+        return time.perf_counter() - started
+
+
+def spawn_runner(args, work_dir: Path) -> subprocess.Popen:
+    """Запуск ядра в отдельном процессе и ожидание /health"""
+    import httpx
+
+    env = dict(os.environ, JALM_STATE_DIR=str(work_dir / "state"))
+    process = subprocess.Popen(
+        [sys.executable, str(KERNEL_SRC / "main.py")],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{args.url}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Ядро не запустилось")
+
+
+def git_commit() -> Optional[str]:
+    """Текущий коммит репозитория, если доступен"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """Регрессии относительно прошлого прогона: падение пропускной способности и рост p95"""
+    regressions = []
+    for key in ("mode", "requests", "concurrency", "layers"):
+        if baseline.get("meta", {}).get(key) != current["meta"][key]:
+            print(f"Внимание: параметр {key} отличается от прошлого прогона", file=sys.stderr)
+
+    def check(name: str, now: float, before: float, higher_is_better: bool):
+        if not before:
+            return
+        change = (now - before) / before * 100
+        worse = -change if higher_is_better else change
+        marker = "!" if worse > max_regression else " "
+        print(f"{marker} {name:<32} {before:>12.3f} -> {now:>12.3f} ({change:+.1f}%)", file=sys.stderr)
+        if worse > max_regression:
+            regressions.append(name)
+
+    check("throughput_rps", current["throughput_rps"], baseline.get("throughput_rps", 0), True)
+    check("execution.p95",
+          current["latency_ms"]["execution"]["p95"],
+          baseline.get("latency_ms", {}).get("execution", {}).get("p95", 0), False)
+    for layer, summary in current["latency_ms"]["layers"].items():
+        before = baseline.get("latency_ms", {}).get("layers", {}).get(layer, {})
+        check(f"{layer}.p95", summary["p95"], before.get("p95", 0), False)
+    return regressions
+
+
+async def benchmark(args) -> Dict[str, Any]:
+    """Полный прогон бенчмарка"""
+    layers = args.layers.split(",") if args.layers else LAYERS
+    unknown = set(layers) - set(LAYERS)
+    if unknown:
+        raise SystemExit(f"Неизвестные слои: {', '.join(sorted(unknown))}")
+
+    collector = Collector()
+    lag = LoopLagMonitor()
+    with tempfile.TemporaryDirectory(prefix="jalm-bench-") as tmp, StandInServer() as target:
+        work_dir = Path(tmp)
+        process = None
+        try:
+            if args.mode == "http":
+                if args.spawn:
+                    process = spawn_runner(args, work_dir)
+                duration = await run_http(args, layers, target.url, work_dir, collector, lag)
+            else:
+                duration = await run_inprocess(args, layers, target.url, work_dir, collector, lag)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=10)
+
+    completed = sum(collector.statuses.values())
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mode": args.mode,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "layers": layers,
+        },
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(completed / duration, 3) if duration else 0.0,
+        "statuses": collector.statuses,
+        "rejected": collector.rejected,
+        "errors": collector.errors,
+        "latency_ms": {
+            "execution": summarize(collector.execution_ms),
+            "layers": {layer: summarize(values) for layer, values in sorted(collector.layer_ms.items())},
+        },
+        # В режиме http - event loop клиента бенчмарка, а не ядра
+        "event_loop_lag_ms": summarize(lag.samples),
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Бенчмарк пути /exec JALM Core Runner")
+    parser.add_argument("--mode", choices=["inprocess", "http"], default="inprocess")
+    parser.add_argument("--url", default="http://localhost:8888", help="Адрес ядра для режима http")
+    parser.add_argument("--spawn", action="store_true", help="Поднять ядро для режима http")
+    parser.add_argument("--requests", type=int, default=200, help="Число замеряемых выполнений")
+    parser.add_argument("--concurrency", type=int, default=20, help="Одновременных выполнений")
+    parser.add_argument("--warmup", type=int, default=20, help="Выполнений на прогрев (не замеряются)")
+    parser.add_argument("--timeout", type=int, default=60, help="Таймаут выполнения, сек")
+    parser.add_argument("--layers", help=f"Слои через запятую (по умолчанию все: {','.join(LAYERS)})")
+    parser.add_argument("--output", help="Файл для JSON-результата (по умолчанию stdout)")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="Допустимое ухудшение при сравнении, %% (иначе код выхода 1)")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    result = asyncio.run(benchmark(args))
+
+    payload = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(payload + "\n", encoding="utf-8")
+    else:
+        print(payload)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(result, baseline, args.max_regression)
+        if regressions:
+            print(f"Регрессии: {', '.join(regressions)}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""
+Тесты для контроля допуска выполнений
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from admission import AdmissionController, AdmissionRejected
+from config import RunnerConfig
+
+
+def make_controller(**overrides):
+    """Контроллер с небольшими лимитами"""
+    params = dict(
+        admission_max_concurrent=2,
+        admission_tenant_concurrency=1,
+        admission_queue_size=4,
+        admission_tenant_queue_size=3
+    )
+    params.update(overrides)
+    return AdmissionController(RunnerConfig(**params))
+
+
+def test_tenant_concurrency_limit():
+    """Арендатор не занимает больше своей квоты слотов"""
+    async def scenario():
+        controller = make_controller()
+        first = controller.submit("a")
+        second = controller.submit("a")
+        other = controller.submit("b")
+        return first.granted, second.granted, other.granted
+    
+    assert asyncio.run(scenario()) == (True, False, True)
+
+
+def test_fair_round_robin():
+    """Освободившийся слот достаётся следующему арендатору по кругу"""
+    async def scenario():
+        controller = make_controller(admission_max_concurrent=1, admission_tenant_concurrency=1)
+        running = controller.submit("a")
+        queued = [controller.submit("a"), controller.submit("a"), controller.submit("b")]
+        controller.release(running)
+        granted_first = [t.tenant for t in queued if t.granted]
+        controller.release(next(t for t in queued if t.granted))
+        granted_second = [t.tenant for t in queued if t.granted and not t.released]
+        return granted_first, granted_second
+    
+    first, second = asyncio.run(scenario())
+    
+    assert first == ["a"]
+    assert second == ["b"]
+
+
+def test_queue_full_rejects_with_retry_after():
+    """Заполненная очередь отклоняет запрос сразу"""
+    async def scenario():
+        controller = make_controller(admission_max_concurrent=1, admission_queue_size=1)
+        controller.submit("a")
+        controller.submit("b")
+        with pytest.raises(AdmissionRejected) as exc_info:
+            controller.submit("c")
+        return exc_info.value.retry_after
+    
+    assert asyncio.run(scenario()) >= 1
+
+
+def test_tenant_queue_limit():
+    """Один арендатор не может занять всю очередь"""
+    async def scenario():
+        controller = make_controller(admission_tenant_queue_size=1)
+        controller.submit("a")
+        controller.submit("a")
+        with pytest.raises(AdmissionRejected):
+            controller.submit("a")
+        return controller.submit("b").granted
+    
+    assert asyncio.run(scenario()) is True
+
+
+def test_release_queued_ticket():
+    """Снятие из очереди не занимает слот и идемпотентно"""
+    async def scenario():
+        controller = make_controller()
+        running = controller.submit("a")
+        queued = controller.submit("a")
+        controller.release(queued)
+        controller.release(queued)
+        controller.release(running)
+        return controller.stats()
+    
+    stats = asyncio.run(scenario())
+    
+    assert stats["running"] == 0
+    assert stats["queued"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,77 @@
+"""
+Тесты для списка выполнений API Core Runner
+"""
+
+import importlib.util
+import sys
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from fastapi.testclient import TestClient
+
+API_PATH = Path(__file__).parent.parent / "api" / "main.py"
+
+
+@pytest.fixture
+def api():
+    """Модуль API (имя main занято ядром, поэтому загрузка по пути)"""
+    spec = importlib.util.spec_from_file_location("core_runner_api", API_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def add_execution(api, execution_id, minute, status="completed"):
+    api.executor.executions[execution_id] = {
+        "status": status,
+        "created_at": f"2024-06-15T10:{minute:02d}:00+00:00"
+    }
+
+
+class TestListExecutions:
+    """Тесты для GET /exec"""
+
+    def test_pages_stable_under_inserts(self, api):
+        """Новое выполнение между страницами не сдвигает следующую страницу"""
+        for minute in range(10):
+            add_execution(api, f"e{minute}", minute)
+        client = TestClient(api.app)
+
+        first = client.get("/exec", params={"limit": 4}).json()
+        assert [item["execution_id"] for item in first["executions"]] == ["e9", "e8", "e7", "e6"]
+
+        add_execution(api, "e10", 10)
+        second = client.get("/exec", params={"limit": 4, "cursor": first["next_cursor"]}).json()
+        assert [item["execution_id"] for item in second["executions"]] == ["e5", "e4", "e3", "e2"]
+
+        third = client.get("/exec", params={"limit": 4, "cursor": second["next_cursor"]}).json()
+        assert [item["execution_id"] for item in third["executions"]] == ["e1", "e0"]
+        assert third["next_cursor"] is None
+
+    def test_filters_and_ndjson(self, api):
+        """Фильтры по статусу и времени; ndjson отдаёт все страницы"""
+        for minute in range(6):
+            add_execution(api, f"e{minute}", minute, "failed" if minute % 2 else "completed")
+        client = TestClient(api.app)
+
+        response = client.get("/exec", params={
+            "status": "failed", "created_before": "2024-06-15T10:05:00Z", "limit": 10
+        })
+        assert [item["execution_id"] for item in response.json()["executions"]] == ["e3", "e1"]
+
+        lines = client.get("/exec", params={"format": "ndjson", "limit": 2}).text.splitlines()
+        assert len(lines) == 6
+
+    @pytest.mark.parametrize("cursor", ["-1", "12", "not-a-cursor"])
+    def test_invalid_cursor(self, api, cursor):
+        """Неверный курсор - 400, а не 500"""
+        add_execution(api, "e0", 0)
+        response = TestClient(api.app).get("/exec", params={"cursor": cursor})
+        assert response.status_code == 400
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,85 @@
+"""
+Тесты для пулов подключений слоя io-db
+"""
+
+import sys
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from config import RunnerConfig
+from db_pool import DatabasePools
+
+
+@pytest.fixture
+def pools(tmp_path):
+    executor = ThreadPoolExecutor(max_workers=2)
+    pools = DatabasePools(RunnerConfig(state_dir=str(tmp_path), db_max_engines=2), executor)
+    yield pools
+    pools.dispose()
+    executor.shutdown()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_default_sqlite_database(pools):
+    """Запись и чтение в базе по умолчанию с обоими стилями параметров"""
+    run(pools.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, status TEXT)"))
+    insert = run(pools.execute(
+        "INSERT INTO users (name, status) VALUES (:name, :status)",
+        {"name": "John", "status": "active"}
+    ))
+    run(pools.execute("INSERT INTO users (name, status) VALUES (?, ?)", ["Ann", "inactive"]))
+    
+    result = run(pools.execute("SELECT name FROM users WHERE status = ?", ["active"]))
+    
+    assert insert["row_count"] == 1
+    assert result["rows"] == [{"name": "John"}]
+    assert result["row_count"] == 1
+    assert result["truncated"] is False
+
+
+def test_max_rows_truncates_stream(pools):
+    """Большая выборка читается порциями и обрезается на max_rows"""
+    run(pools.execute("CREATE TABLE numbers (n INTEGER)"))
+    run(pools.execute(
+        "INSERT INTO numbers (n) SELECT value FROM json_each(:values)",
+        {"values": "[" + ",".join(str(i) for i in range(50)) + "]"}
+    ))
+    
+    result = run(pools.execute("SELECT n FROM numbers ORDER BY n", fetch_size=7, max_rows=20))
+    exact = run(pools.execute("SELECT n FROM numbers WHERE n < 20", fetch_size=7, max_rows=20))
+    
+    assert result["row_count"] == 20
+    assert result["rows"][-1] == {"n": 19}
+    assert result["truncated"] is True
+    assert exact["truncated"] is False
+
+
+def test_engine_per_connection_string(pools, tmp_path):
+    """Engine переиспользуется для строки подключения, лишние закрываются"""
+    urls = [f"sqlite:///{tmp_path / name}.db" for name in ("a", "b", "c")]
+    
+    first = pools.get_engine(urls[0])
+    assert pools.get_engine(urls[0]) is first
+    
+    pools.get_engine(urls[1])
+    pools.get_engine(urls[2])
+    
+    assert list(pools._engines) == urls[1:]
+
+
+def test_invalid_query(pools):
+    """Ошибка SQL пробрасывается как исключение шага"""
+    with pytest.raises(Exception):
+        run(pools.execute("SELECT * FROM missing_table"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
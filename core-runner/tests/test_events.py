@@ -0,0 +1,88 @@
+"""
+Тесты для шины событий выполнений
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from config import RunnerConfig
+from events import (
+    EXECUTION_FINISHED, LAGGED, STEP_COMPLETED, STEP_STARTED,
+    ExecutionEventBus, format_sse
+)
+
+
+async def collect(subscription, heartbeat=None):
+    return [item async for item in subscription.events(heartbeat)]
+
+
+def test_events_delivered_in_order():
+    """Подписчик получает события своего выполнения до execution-finished"""
+    async def scenario():
+        bus = ExecutionEventBus(RunnerConfig())
+        subscription = bus.subscribe("a")
+        other = bus.subscribe("b")
+        
+        bus.publish("a", STEP_STARTED, {"step_id": "s1"})
+        bus.publish("a", STEP_COMPLETED, {"step_id": "s1"})
+        bus.finish("a", {"status": "completed"})
+        
+        events = await collect(subscription)
+        assert [event for event, _ in events] == [STEP_STARTED, STEP_COMPLETED, EXECUTION_FINISHED]
+        assert other.queue.empty()
+        assert not bus.has_subscribers("a")
+        assert bus.subscriber_count() == 1
+    
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_gets_lagged():
+    """Медленный подписчик теряет старые события, но не execution-finished"""
+    async def scenario():
+        bus = ExecutionEventBus(RunnerConfig(event_queue_size=3))
+        subscription = bus.subscribe("a")
+        
+        for i in range(10):
+            bus.publish("a", STEP_COMPLETED, {"step_id": f"s{i}"})
+        bus.finish("a", {"status": "completed"})
+        
+        events = await collect(subscription)
+        assert events[0] == (LAGGED, {"execution_id": "a", "dropped": 9})
+        assert events[1] == (STEP_COMPLETED, {"step_id": "s9"})
+        assert events[-1][0] == EXECUTION_FINISHED
+    
+    asyncio.run(scenario())
+
+
+def test_heartbeat_and_unsubscribe():
+    """Пульс при простое, отписка освобождает подписку"""
+    async def scenario():
+        bus = ExecutionEventBus(RunnerConfig())
+        subscription = bus.subscribe("a")
+        
+        events = subscription.events(heartbeat=0.01)
+        assert await events.__anext__() is None
+        await events.aclose()
+        
+        bus.unsubscribe(subscription)
+        bus.unsubscribe(subscription)
+        assert bus.subscriber_count() == 0
+        bus.publish("a", STEP_STARTED, {})
+        assert subscription.queue.empty()
+    
+    asyncio.run(scenario())
+
+
+def test_format_sse():
+    """Кадр SSE с JSON в data"""
+    assert format_sse("step-started", {"step_id": "шаг"}) == \
+        'event: step-started\ndata: {"step_id": "шаг"}\n\n'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,291 @@
+"""
+Тесты для хранилища выполнений
+"""
+
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from config import RunnerConfig
+from execution_store import ExecutionStore
+from models import JALMExecution, JALMStep
+
+
+def make_execution(execution_id, created_at=None, status="completed", payload=""):
+    """Создание тестового выполнения"""
+    return JALMExecution(
+        execution_id=execution_id,
+        jalm_config={"steps": []},
+        steps=[JALMStep(id="s", layer="render-html", input={}, output={"content": payload})],
+        status=status,
+        created_at=created_at or datetime.now()
+    )
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ExecutionStore(RunnerConfig(state_dir=str(tmp_path), execution_cache_size=2))
+    yield store
+    store.close()
+
+
+def test_active_execution_lookup(store):
+    """Выполнение в работе доступно из памяти"""
+    execution = make_execution("a", status="running")
+    store.add(execution)
+    
+    assert store.get("a") is execution
+    assert store.active_count() == 1
+
+
+def test_completed_executions_spill_to_disk(store):
+    """Вытесненные из кэша выполнения читаются с диска"""
+    for execution_id in ("a", "b", "c"):
+        execution = make_execution(execution_id)
+        store.add(execution)
+        store.complete(execution)
+    
+    assert store.active_count() == 0
+    assert "a" not in store._recent
+    assert len(store._recent) == 2
+    
+    restored = store.get("a")
+    assert restored.execution_id == "a"
+    assert restored.steps[0].output == {"content": ""}
+
+
+def test_memory_budget(tmp_path):
+    """Кэш не превышает бюджет памяти"""
+    config = RunnerConfig(state_dir=str(tmp_path), execution_memory_budget_mb=1)
+    store = ExecutionStore(config)
+    try:
+        for i in range(5):
+            execution = make_execution(str(i), payload="x" * 400_000)
+            store.add(execution)
+            store.complete(execution)
+        
+        assert store._recent_bytes <= 1024 * 1024
+        assert store.get("0") is not None
+    finally:
+        store.close()
+
+
+def test_memory_ttl(tmp_path):
+    """Завершённые выполнения вытесняются из памяти по TTL"""
+    store = ExecutionStore(RunnerConfig(state_dir=str(tmp_path), execution_memory_ttl=0))
+    try:
+        execution = make_execution("a")
+        store.add(execution)
+        store.complete(execution)
+        
+        assert "a" not in store._recent
+        assert store.get("a") is not None
+    finally:
+        store.close()
+
+
+def test_list_newest_first(store):
+    """Список отсортирован от новых к старым и ограничен"""
+    now = datetime.now()
+    for i in range(4):
+        execution = make_execution(str(i), created_at=now + timedelta(seconds=i))
+        store.add(execution)
+        store.complete(execution)
+    store.add(make_execution("running", created_at=now + timedelta(seconds=10), status="running"))
+    
+    page, cursor = store.query(limit=3)
+    
+    assert [e.execution_id for e in page] == ["running", "3", "2"]
+    
+    page, cursor = store.query(cursor=cursor, limit=3)
+    
+    assert [e.execution_id for e in page] == ["1", "0"]
+    assert cursor is None
+
+
+def test_query_filters(store):
+    """Фильтрация по статусу, слою и времени создания"""
+    now = datetime.now()
+    configs = [
+        ("a", "completed", "io-http"),
+        ("b", "failed", "io-http"),
+        ("c", "completed", "render-html"),
+    ]
+    for i, (execution_id, status, layer) in enumerate(configs):
+        execution = make_execution(execution_id, created_at=now + timedelta(seconds=i), status=status)
+        execution.jalm_config = {"steps": [{"id": "s", "layer": layer}]}
+        store.add(execution)
+        store.complete(execution)
+    
+    by_layer, _ = store.query(layer="io-http")
+    by_status, _ = store.query(status="completed")
+    both, _ = store.query(status="completed", layer="io-http")
+    by_time, _ = store.query(created_after=now + timedelta(seconds=1))
+    
+    assert [e.execution_id for e in by_layer] == ["b", "a"]
+    assert [e.execution_id for e in by_status] == ["c", "a"]
+    assert [e.execution_id for e in both] == ["a"]
+    assert [e.execution_id for e in by_time] == ["c", "b"]
+
+
+def test_shared_between_processes(tmp_path):
+    """Выполнение одного процесса видно другому, отмена передаётся владельцу"""
+    config = RunnerConfig(state_dir=str(tmp_path))
+    owner = ExecutionStore(config, owner="host:1")
+    other = ExecutionStore(config, owner="host:2")
+    try:
+        execution = make_execution("a", status="running")
+        owner.add(execution)
+        execution.steps.append(JALMStep(id="t", layer="io-http", input={}))
+        owner.update(execution)
+        owner.flush()
+        
+        remote = other.get("a")
+        assert remote.status == "running" and len(remote.steps) == 2
+        assert not other.is_local("a") and owner.is_local("a")
+        assert "a" not in other._recent
+        assert [e.execution_id for e in other.query(status="running")[0]] == ["a"]
+        
+        assert other.request_cancel("a")
+        assert other.take_cancel_requests() == []
+        assert owner.take_cancel_requests() == ["a"]
+        assert owner.take_cancel_requests() == []
+        
+        execution.status = "cancelled"
+        owner.complete(execution)
+        owner.flush()
+        assert other.get("a").status == "cancelled"
+        assert not other.request_cancel("a")
+    finally:
+        owner.close()
+        other.close()
+
+
+def test_claim_orphans(tmp_path):
+    """Незавершённые выполнения остановленного процесса перехватывает один живой процесс"""
+    config = RunnerConfig(state_dir=str(tmp_path))
+    crashed = ExecutionStore(config, owner="host:1")
+    execution = make_execution("a", status="running")
+    execution.in_flight = ["s"]
+    crashed.add(execution)
+    finished = make_execution("b")
+    crashed.add(finished)
+    crashed.complete(finished)
+    
+    alive = ExecutionStore(config, owner="host:2")
+    late = ExecutionStore(config, owner="host:3")
+    try:
+        # Владелец ещё отмечается - перехватывать нельзя
+        assert alive.claim_orphans(stale_after=60) == []
+        
+        crashed.close()
+        claimed = alive.claim_orphans(stale_after=60)
+        assert [e.execution_id for e in claimed] == ["a"]
+        assert claimed[0].in_flight == ["s"]
+        assert alive.is_local("a")
+        assert late.claim_orphans(stale_after=60) == []
+    finally:
+        alive.close()
+        late.close()
+
+
+def test_claim_orphans_without_owner(tmp_path):
+    """Незавершённые выполнения без владельца (база до колонки owner) тоже перехватываются"""
+    config = RunnerConfig(state_dir=str(tmp_path))
+    old = ExecutionStore(config, owner="host:1")
+    old.add(make_execution("a", status="running"))
+    old.flush()
+    with old._lock:
+        old._db.execute("UPDATE executions SET owner = NULL")
+        old._db.commit()
+    old.close()
+
+    alive = ExecutionStore(config, owner="host:2")
+    try:
+        assert [e.execution_id for e in alive.claim_orphans(stale_after=60)] == ["a"]
+        assert alive.claim_orphans(stale_after=60) == []
+    finally:
+        alive.close()
+
+
+def test_failed_write_retried(tmp_path, monkeypatch):
+    """Неудавшийся пакет возвращается в очередь, не затирая более новое состояние"""
+    monkeypatch.setattr("execution_store.WRITE_RETRY_DELAY", 0.01)
+    config = RunnerConfig(state_dir=str(tmp_path))
+    owner = ExecutionStore(config, owner="host:1")
+    other = ExecutionStore(config, owner="host:2")
+    write = owner._write
+    failures = []
+
+    def flaky(batch):
+        batch = list(batch)
+        if not failures:
+            failures.append(len(batch))
+            # Пока пакет пишется, выполнение успевает измениться
+            execution.status = "completed"
+            owner.complete(execution)
+            raise RuntimeError("database is locked")
+        write(batch)
+
+    owner._write = flaky
+    try:
+        execution = make_execution("a", status="running")
+        owner.add(execution)
+        owner.add(make_execution("b", status="running"))
+        owner.flush()
+
+        assert failures
+        assert other.get("a").status == "completed"
+        assert other.get("b").status == "running"
+    finally:
+        owner.close()
+        other.close()
+
+
+def test_writes_off_caller_thread(tmp_path):
+    """Запись на диск идёт в фоновом потоке, накопившиеся изменения схлопываются"""
+    config = RunnerConfig(state_dir=str(tmp_path))
+    owner = ExecutionStore(config, owner="host:1")
+    other = ExecutionStore(config, owner="host:2")
+    writes = []
+    write = owner._write
+
+    def record(batch):
+        batch = list(batch)
+        writes.append((threading.current_thread().name, len(batch)))
+        time.sleep(0.01)
+        write(batch)
+
+    owner._write = record
+    try:
+        execution = make_execution("a", status="running")
+        owner.add(execution)
+        for i in range(50):
+            execution.steps.append(JALMStep(id=f"t{i}", layer="io-http", input={}))
+            owner.update(execution)
+        # Процесс-владелец видит актуальное состояние, не дожидаясь записи
+        assert owner.get("a") is execution
+        owner.flush()
+
+        assert {name for name, _ in writes} == {"jalm-store-writer"}
+        assert sum(size for _, size in writes) < 51
+        assert len(other.get("a").steps) == 51
+    finally:
+        owner.close()
+        other.close()
+
+
+def test_invalid_cursor(store):
+    """Неверный курсор отклоняется"""
+    with pytest.raises(ValueError):
+        store.query(cursor="not-a-cursor")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,72 @@
+"""
+Тесты для асинхронного HTTP-клиента ядра
+"""
+
+import sys
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from config import RunnerConfig
+from http_client import HTTPClientPool
+
+
+class EchoHandler(BaseHTTPRequestHandler):
+    """Локальный HTTP-сервер, возвращающий тело запроса"""
+    
+    protocol_version = "HTTP/1.1"
+    
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        payload = json.dumps({
+            "echo": json.loads(body or b"null"),
+            "port": self.client_address[1]
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def echo_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EchoHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_request_reuses_connection(echo_server):
+    """Повторные запросы к одному хосту идут через одно соединение"""
+    async def scenario():
+        pool = HTTPClientPool(RunnerConfig(http2=False))
+        try:
+            first = await pool.request("POST", echo_server, json={"n": 1})
+            second = await pool.request("POST", echo_server, json={"n": 2}, timeout=5)
+            return first.json(), second.json()
+        finally:
+            await pool.aclose()
+    
+    first, second = asyncio.run(scenario())
+    
+    assert first["echo"] == {"n": 1}
+    assert second["echo"] == {"n": 2}
+    # Тот же клиентский порт - соединение из пула keep-alive
+    assert first["port"] == second["port"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,81 @@
+"""
+Тесты для метрик ядра
+"""
+
+import os
+import sys
+import asyncio
+import time
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from metrics import RunnerMetrics, prepare_multiprocess_dir
+
+
+def test_step_histogram_by_layer_and_outcome():
+    """Замеры шагов раскладываются по слою и исходу"""
+    metrics = RunnerMetrics()
+    metrics.observe_step("io-http", 0.02)
+    metrics.observe_step("io-http", 0.5, error=True)
+    metrics.observe_step("render-html", 0.0001, cached=True)
+
+    registry = metrics.registry
+    assert registry.get_sample_value(
+        "jalm_step_duration_seconds_count", {"layer": "io-http", "outcome": "ok"}
+    ) == 1
+    assert registry.get_sample_value(
+        "jalm_step_duration_seconds_count", {"layer": "io-http", "outcome": "error"}
+    ) == 1
+    assert registry.get_sample_value(
+        "jalm_step_duration_seconds_bucket", {"layer": "render-html", "outcome": "cached", "le": "0.001"}
+    ) == 1
+
+
+def test_queue_gauges_and_text_format():
+    """Глубина очереди и выполнения в работе попадают в текст /metrics"""
+    metrics = RunnerMetrics()
+    metrics.set_queue({"queued": 3, "running": 7})
+    metrics.observe_execution("completed", 1.5)
+
+    text = metrics.render().decode("utf-8")
+    assert "jalm_queue_depth 3.0" in text
+    assert "jalm_executions_in_flight 7.0" in text
+    assert 'jalm_execution_duration_seconds_count{status="completed"} 1.0' in text
+
+
+def test_loop_lag_detects_blocking():
+    """Блокирующий вызов в event loop виден как задержка"""
+    async def scenario():
+        metrics = RunnerMetrics()
+        monitor = asyncio.create_task(metrics.monitor_loop_lag(0.01))
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)
+        await asyncio.sleep(0.02)
+        monitor.cancel()
+
+        registry = metrics.registry
+        assert registry.get_sample_value("jalm_event_loop_lag_seconds_count") >= 1
+        assert registry.get_sample_value("jalm_event_loop_lag_seconds_sum") >= 0.05
+
+    asyncio.run(scenario())
+
+
+def test_prepare_multiprocess_dir(tmp_path, monkeypatch):
+    """Каталог метрик процессов создаётся, если не задан, и очищается от прошлого запуска"""
+    # Пустое значение - как незаданная переменная; monkeypatch вернёт исходное после теста
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", "")
+    created = prepare_multiprocess_dir()
+    assert os.environ["PROMETHEUS_MULTIPROC_DIR"] == created
+    assert Path(created).is_dir()
+
+    (tmp_path / "histogram_123.db").write_bytes(b"")
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    assert prepare_multiprocess_dir() == str(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
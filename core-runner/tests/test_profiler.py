@@ -0,0 +1,68 @@
+"""
+Тесты для профилирования выполнений
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from models import ExecutionProfile, StepProfile
+from profiler import StackSampler, collapsed_stacks
+
+
+def busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_captures_busy_thread():
+    """Занятый поток попадает в профиль, простаивающий - нет"""
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    idle = threading.Thread(target=stop.wait, name="idle")
+    worker.start()
+    idle.start()
+
+    sampler = StackSampler(0.001)
+    sampler.start()
+    time.sleep(0.1)
+    stacks = sampler.stop()
+    stop.set()
+    worker.join()
+    idle.join()
+
+    assert sampler.samples > 0
+    busy = [stack for stack in stacks if stack.startswith("busy;")]
+    assert busy and all("busy_loop (test_profiler.py:" in stack for stack in busy)
+    assert not any(stack.startswith("idle;") for stack in stacks)
+    assert not any(stack.startswith("jalm-profiler;") for stack in stacks)
+
+
+def test_collapsed_stacks_from_breakdown():
+    """Без выборки стеков flamegraph строится из разбивки по фазам, вес - микросекунды"""
+    profile = ExecutionProfile(
+        queue_wait=0.002,
+        steps=[StepProfile(step_id="fetch", layer="io-http", input_prep=0.0001, executor=0.25)]
+    )
+
+    lines = collapsed_stacks("e1", profile).splitlines()
+    assert lines == [
+        "execution e1;admission_wait 2000",
+        "execution e1;fetch (io-http);input_prep 100",
+        "execution e1;fetch (io-http);executor 250000",
+    ]
+
+
+def test_collapsed_stacks_from_samples():
+    """Снятые стеки выгружаются как есть"""
+    profile = ExecutionProfile(sample_interval=0.005, stacks={"MainThread;run;step": 3})
+    assert collapsed_stacks("e1", profile) == "MainThread;run;step 3\n"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,88 @@
+"""
+Тесты для движка шаблонов слоя render-html
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from config import RunnerConfig
+from render_engine import TemplateRenderer
+
+
+@pytest.fixture
+def renderer():
+    return TemplateRenderer(RunnerConfig(render_cache_size=2))
+
+
+def test_format_engine_matches_str_format(renderer):
+    """Движок по умолчанию совместим с template.format(**data)"""
+    template = "<p>{name!r}: {user[city]} {price:.2f} {price:>{width}}</p>"
+    data = {"name": "Анна", "user": {"city": "Москва"}, "price": 3.14159, "width": 8}
+    assert renderer.render(template, data) == template.format(**data)
+    
+    with pytest.raises(KeyError):
+        renderer.render("{missing}", {})
+
+
+def test_jinja_loops_and_escaping(renderer):
+    """Циклы и экранирование HTML в jinja2"""
+    template = "<ul>{% for item in items %}<li>{{ item }}</li>{% endfor %}</ul>"
+    data = {"items": ["a", "<b>"]}
+    
+    assert renderer.render(template, data, engine="jinja2") == "<ul><li>a</li><li>&lt;b&gt;</li></ul>"
+    assert renderer.render(template, data, engine="jinja2", autoescape=False) == \
+        "<ul><li>a</li><li><b></li></ul>"
+    
+    with pytest.raises(ValueError):
+        renderer.render("{{ x }}", {}, engine="mustache")
+
+
+def test_format_engine_autoescape(renderer):
+    """autoescape у format экранирует подставленные значения, но не разметку шаблона"""
+    template = "<p title=\"{title}\">{name}</p>"
+    data = {"title": 'a"b', "name": "<script>"}
+
+    assert renderer.render(template, data) == template.format(**data)
+    assert renderer.render(template, data, autoescape=True) == \
+        "<p title=\"a&quot;b\">&lt;script&gt;</p>"
+    assert renderer.compile(template, autoescape=True) is not renderer.compile(template)
+
+
+def test_compiled_templates_are_cached(renderer):
+    """Повторный рендер не компилирует шаблон, старые вытесняются по LRU"""
+    first = renderer.compile("Привет, {name}")
+    assert renderer.compile("Привет, {name}") is first
+    assert renderer.render("Привет, {name}", {"name": "мир"}) == "Привет, мир"
+    
+    renderer.compile("{a}")
+    renderer.compile("Привет, {name}")
+    renderer.compile("{b}")
+    
+    stats = renderer.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 3
+    assert renderer.compile("{a}") is not None
+    assert renderer.stats()["misses"] == 4
+
+
+def test_streaming_to_file(renderer, tmp_path):
+    """Большая страница пишется в файл по частям"""
+    template = "{% for row in rows %}<tr><td>{{ row }}</td></tr>\n{% endfor %}"
+    rows = list(range(10000))
+    target = tmp_path / "pages" / "table.html"
+    
+    chunks = renderer.generate(template, {"rows": rows[:3]}, engine="jinja2")
+    assert next(chunks) == "<tr><td>"
+    
+    size = renderer.render_to_file(template, {"rows": rows}, str(target), engine="jinja2")
+    content = target.read_text(encoding="utf-8")
+    assert size == len(content.encode("utf-8"))
+    assert content.count("<tr>") == 10000
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,391 @@
+"""
+Тесты ядра CoreRunner и API выполнений
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+# Ядро, созданное lifespan приложения, хранит выполнения во временном каталоге
+os.environ.setdefault("JALM_STATE_DIR", tempfile.mkdtemp(prefix="jalm-test-"))
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import RunnerConfig
+from execution_store import TERMINAL_STATUSES, ExecutionStore
+from main import CoreRunner
+
+
+def make_runner(state_dir, **overrides) -> CoreRunner:
+    """Ядро с отдельным хранилищем и слоем test-sleep (запуски шагов - в runner.sleeps)"""
+    settings = dict(state_dir=str(state_dir), loop_lag_interval=0, state_poll_interval=0.05)
+    settings.update(overrides)
+    runner = CoreRunner(RunnerConfig(**settings))
+    runner.sleeps = []
+
+    async def execute_sleep(input_data):
+        runner.sleeps.append(input_data.get("seconds", 0))
+        await asyncio.sleep(input_data.get("seconds", 0))
+        return {"slept": input_data.get("seconds", 0)}
+
+    runner.supported_layers["test-sleep"] = execute_sleep
+    # Шаг без побочных эффектов: после падения его можно повторить
+    runner.step_cards["test-sleep"] = {"side_effect": "none"}
+    return runner
+
+
+def sleep_config(*seconds, **step_input):
+    """Конфиг из последовательных шагов test-sleep"""
+    steps = []
+    for index, value in enumerate(seconds):
+        step = {"id": f"s{index}", "layer": "test-sleep", "input": {"seconds": value, **step_input}}
+        if index:
+            step["depends_on"] = [f"s{index - 1}"]
+        steps.append(step)
+    return {"steps": steps}
+
+
+def persisted(state_dir, execution_id):
+    """Выполнение в том виде, в каком оно записано на диск"""
+    reader = ExecutionStore(RunnerConfig(state_dir=str(state_dir)), owner="reader")
+    try:
+        return reader.get(execution_id)
+    finally:
+        reader.close()
+
+
+def wait_for(predicate, timeout=10.0):
+    """Ожидание условия, пока ядро работает в потоке TestClient"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(0.02)
+    raise AssertionError("Условие не выполнено за отведённое время")
+
+
+async def until(predicate, timeout=10.0):
+    """Ожидание условия внутри event loop ядра"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        await asyncio.sleep(0.02)
+    raise AssertionError("Условие не выполнено за отведённое время")
+
+
+def parse_sse(body):
+    """Кадры Server-Sent Events: [(event, data)]"""
+    frames = []
+    for chunk in body.split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in chunk.splitlines() if not line.startswith(":"))
+        if "event" in lines:
+            frames.append((lines["event"], json.loads(lines["data"])))
+    return frames
+
+
+@pytest.fixture
+def runner(tmp_path):
+    return make_runner(tmp_path)
+
+
+@pytest.fixture
+def client(runner, monkeypatch):
+    """API ядра поверх отдельного CoreRunner"""
+    monkeypatch.setattr(main, "core_runner", runner)
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def finished(client, execution_id):
+    execution = client.get(f"/exec/{execution_id}").json()
+    return execution if execution["status"] in TERMINAL_STATUSES else None
+
+
+def test_runner_created_in_lifespan(tmp_path, monkeypatch):
+    """Импорт main не создаёт ядро: оно живёт от запуска до остановки приложения"""
+    monkeypatch.setenv("JALM_STATE_DIR", str(tmp_path))
+    monkeypatch.setattr(main, "core_runner", None)
+    with TestClient(main.app) as test_client:
+        assert test_client.get("/health").status_code == 200
+        assert main.core_runner.store.db_path.parent == tmp_path
+    assert main.core_runner is None
+
+
+@pytest.mark.parametrize("max_parallel", [0, -1, "4", 2.5, True, None])
+def test_invalid_max_parallel(client, max_parallel):
+    """meta.max_parallel проверяется при приёме: 422 и для POST /exec, и для пачки"""
+    config = sleep_config(0)
+    config["meta"] = {"max_parallel": max_parallel}
+
+    assert client.post("/exec", json={"jalm_config": config}).status_code == 422
+    response = client.post("/exec/batch", json={"executions": [
+        {"jalm_config": sleep_config(0)}, {"jalm_config": config}
+    ]})
+    assert response.status_code == 422
+    assert main.core_runner.store.active_count() == 0
+
+
+def test_delete_clears_in_flight(client, tmp_path):
+    """DELETE /exec/{id} прерывает шаг и не оставляет его в in_flight"""
+    execution_id = client.post("/exec", json={"jalm_config": sleep_config(30)}).json()["execution_id"]
+    wait_for(lambda: client.get(f"/exec/{execution_id}").json()["in_flight"] == ["s0"])
+
+    assert client.delete(f"/exec/{execution_id}").status_code == 200
+    execution = wait_for(lambda: finished(client, execution_id))
+
+    assert execution["status"] == "cancelled"
+    assert execution["in_flight"] == []
+    assert execution["steps"][0]["error"] == "Шаг отменён"
+    main.core_runner.store.flush()
+    assert persisted(tmp_path, execution_id).in_flight == []
+    assert client.delete(f"/exec/{execution_id}").status_code == 409
+
+
+def test_timeouts_clear_in_flight(tmp_path):
+    """Таймаут шага и таймаут выполнения не оставляют шаги в in_flight"""
+    async def scenario():
+        runner = make_runner(tmp_path)
+        try:
+            step_timeout = await runner.execute_jalm(sleep_config(30, timeout=0.05))
+            execution_timeout = await runner.execute_jalm(sleep_config(30), timeout=1)
+            await asyncio.gather(*list(runner.tasks.values()))
+            return runner.get_execution(step_timeout), runner.get_execution(execution_timeout)
+        finally:
+            await runner.close()
+
+    by_step, by_execution = asyncio.run(scenario())
+
+    assert by_step.status == "failed"
+    assert "таймаут" in by_step.steps[0].error
+    assert by_execution.status == "failed"
+    assert "таймаут выполнения" in by_execution.error
+    for execution in (by_step, by_execution):
+        assert execution.in_flight == []
+        assert persisted(tmp_path, execution.execution_id).in_flight == []
+
+
+def batch_client(tmp_path, monkeypatch, **overrides):
+    """Клиент API над ядром с заданными лимитами допуска"""
+    monkeypatch.setattr(main, "core_runner", make_runner(tmp_path, **overrides))
+    return TestClient(main.app)
+
+
+def test_batch_partial_admission(tmp_path, monkeypatch):
+    """Пачка принимается частично: отклонённые элементы получают 429 и Retry-After"""
+    with batch_client(tmp_path, monkeypatch, admission_max_concurrent=1, admission_queue_size=1) as client:
+        response = client.post("/exec/batch", json={
+            "executions": [{"jalm_config": sleep_config(0.2)} for _ in range(3)]
+        })
+        body = response.json()
+
+        assert response.status_code == 200
+        assert body["accepted"] == 2 and body["rejected"] == 1
+        assert [item["index"] for item in body["executions"]] == [0, 1, 2]
+        assert "execution_id" in body["executions"][0] and "execution_id" in body["executions"][1]
+        rejected = body["executions"][2]
+        assert rejected["status"] == 429
+        assert rejected["retry_after"] >= 1
+
+        # Очередь по-прежнему занята - пачка целиком отклоняется с Retry-After
+        response = client.post("/exec/batch", json={"executions": [{"jalm_config": sleep_config(0.2)}]})
+        assert response.status_code == 429
+        assert "retry-after" in response.headers
+
+
+def test_batch_too_large(tmp_path, monkeypatch):
+    """Пачка больше JALM_BATCH_MAX_SIZE - 413, ничего не запускается"""
+    with batch_client(tmp_path, monkeypatch, batch_max_size=2) as client:
+        response = client.post("/exec/batch", json={
+            "executions": [{"jalm_config": sleep_config(0)} for _ in range(3)]
+        })
+        assert response.status_code == 413
+        assert main.core_runner.store.active_count() == 0
+
+
+def test_batch_wait_ndjson_order(tmp_path, monkeypatch):
+    """wait=true: сначала отклонённые, затем выполнения в порядке завершения с индексами запроса"""
+    durations = [0.6, 0.1, 0.35, 0.1, 0.1]
+    with batch_client(tmp_path, monkeypatch, admission_max_concurrent=3, admission_queue_size=1) as client:
+        response = client.post("/exec/batch", params={"wait": "true"}, json={
+            "executions": [{"jalm_config": sleep_config(seconds)} for seconds in durations]
+        })
+        lines = [json.loads(line) for line in response.text.splitlines()]
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert lines[0] == {"index": 4, "status": 429, "error": lines[0]["error"], "retry_after": lines[0]["retry_after"]}
+    # Элемент 3 ждал в очереди и стартовал после завершения элемента 1
+    assert [line["index"] for line in lines[1:]] == [1, 3, 2, 0]
+    for line in lines[1:]:
+        assert line["execution"]["status"] == "completed"
+        assert line["execution"]["steps"][0]["output"] == {"slept": durations[line["index"]]}
+
+
+
+def test_recover_after_crash(tmp_path):
+    """Выполнение упавшего процесса перехватывается, когда его отметка жизни устарела"""
+    async def scenario():
+        crashed = make_runner(tmp_path)
+        survivor = make_runner(tmp_path, worker_stale_after=0.5)
+        await crashed.start()
+        execution_id = await crashed.execute_jalm(sleep_config(0.1, 0.4))
+        await until(lambda: crashed.get_execution(execution_id).in_flight == ["s1"])
+
+        # Падение: задачи обрываются без завершения выполнения, отметки жизни прекращаются
+        crashed._closing = True
+        crashed._state_watcher.cancel()
+        await asyncio.gather(*[task for task in crashed.tasks.values() if task.cancel()],
+                             return_exceptions=True)
+        crashed.store.flush()
+
+        # Владелец отмечался только что - перехватывать рано
+        assert await survivor.recover_executions() == 0
+        await survivor.start()
+        try:
+            execution = await until(lambda: survivor.store.is_local(execution_id)
+                                    and survivor.get_execution(execution_id))
+            await asyncio.gather(*list(survivor.tasks.values()))
+            return execution, survivor.sleeps
+        finally:
+            await survivor.close()
+            await crashed.close()
+
+    execution, sleeps = asyncio.run(scenario())
+
+    assert execution.status == "completed"
+    assert [step.id for step in execution.steps] == ["s0", "s1"]
+    assert execution.in_flight == []
+    # Готовый шаг s0 взят из хранилища, повторён только прерванный s1
+    assert sleeps == [0.4]
+    assert persisted(tmp_path, execution.execution_id).status == "completed"
+
+
+def test_remote_cancel(tmp_path):
+    """Отмена через другой процесс доходит до владельца через флаг cancel_requested"""
+    async def scenario():
+        owner = make_runner(tmp_path)
+        other = make_runner(tmp_path)
+        await owner.start()
+        await other.start()
+        try:
+            execution_id = await owner.execute_jalm(sleep_config(30))
+            # Запись владельца видна другому процессу через общее хранилище
+            await until(lambda: getattr(other.get_execution(execution_id), "in_flight", None) == ["s0"])
+            assert not other.store.is_local(execution_id)
+            assert other.cancel_execution(execution_id)
+
+            await until(lambda: owner.get_execution(execution_id).status == "cancelled")
+            owner.store.flush()
+            return owner.get_execution(execution_id), other.get_execution(execution_id)
+        finally:
+            await other.close()
+            await owner.close()
+
+    local, remote = asyncio.run(scenario())
+
+    assert local.in_flight == []
+    assert local.steps[0].error == "Шаг отменён"
+    assert remote.status == "cancelled"
+
+
+def test_events_stream(client):
+    """GET /exec/{id}/events: история, события шагов и execution-finished"""
+    execution_id = client.post("/exec", json={"jalm_config": sleep_config(0.3, 0)}).json()["execution_id"]
+    wait_for(lambda: client.get(f"/exec/{execution_id}").json()["in_flight"] == ["s0"])
+
+    response = client.get(f"/exec/{execution_id}/events")
+    frames = parse_sse(response.text)
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert [(event, data.get("step_id")) for event, data in frames] == [
+        ("step-completed", "s0"), ("step-started", "s1"), ("step-completed", "s1"), ("execution-finished", None)
+    ]
+    assert frames[0][1]["output"] == {"slept": 0.3}
+    assert frames[-1][1]["status"] == "completed"
+
+    # Завершённое выполнение: только история
+    replay = parse_sse(client.get(f"/exec/{execution_id}/events", params={"include_output": "false"}).text)
+    assert [event for event, _ in replay] == ["step-completed", "step-completed", "execution-finished"]
+    assert "output" not in replay[0][1]
+
+
+def test_events_lagged(tmp_path, monkeypatch):
+    """Переполнение очереди подписчика: старые события вытесняются, клиент получает lagged"""
+    monkeypatch.setattr(main, "core_runner", make_runner(tmp_path, event_queue_size=2))
+    config = sleep_config(0.3)
+    config["meta"] = {"max_parallel": 10}
+    config["steps"] += [
+        {"id": f"p{i}", "layer": "test-sleep", "input": {"seconds": 0}, "depends_on": ["s0"]}
+        for i in range(10)
+    ]
+    with TestClient(main.app) as client:
+        execution_id = client.post("/exec", json={"jalm_config": config}).json()["execution_id"]
+        wait_for(lambda: client.get(f"/exec/{execution_id}").json()["in_flight"] == ["s0"])
+        frames = parse_sse(client.get(f"/exec/{execution_id}/events").text)
+
+    lagged = [data for event, data in frames if event == "lagged"]
+    assert lagged and all(data["execution_id"] == execution_id for data in lagged)
+    # Каждое событие либо доставлено, либо учтено в dropped
+    delivered = len([event for event, _ in frames if event.startswith("step-")])
+    assert delivered + sum(data["dropped"] for data in lagged) == 1 + 2 * 10
+    assert frames[-1][0] == "execution-finished"
+
+
+def test_profile(client):
+    """GET /exec/{id}/profile: фазы шагов в json и стеки в collapsed"""
+    plain = client.post("/exec", json={"jalm_config": sleep_config(0)}).json()["execution_id"]
+    profiled = client.post("/exec", json={
+        "jalm_config": sleep_config(0.05, 0), "profile": True, "profile_stacks": True
+    }).json()["execution_id"]
+    wait_for(lambda: finished(client, plain) and finished(client, profiled))
+
+    assert client.get(f"/exec/{plain}/profile").status_code == 404
+    assert client.get("/exec/missing/profile").status_code == 404
+
+    profile = client.get(f"/exec/{profiled}/profile").json()
+    assert [step["step_id"] for step in profile["steps"]] == ["s0", "s1"]
+    assert profile["steps"][0]["executor"] >= 0.05
+    assert profile["queue_wait"] is not None
+
+    collapsed = client.get(f"/exec/{profiled}/profile", params={"format": "collapsed"})
+    assert collapsed.status_code == 200
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    assert client.get(f"/exec/{profiled}/profile", params={"format": "svg"}).status_code == 422
+
+
+def test_list_off_loop(client, monkeypatch):
+    """GET /exec читает хранилище вне event loop и видит ещё не записанные выполнения"""
+    on_loop = []
+    query = main.core_runner.store.query
+
+    def recording_query(**kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return query(**kwargs)
+
+    monkeypatch.setattr(main.core_runner.store, "query", recording_query)
+    ids = [client.post("/exec", json={"jalm_config": sleep_config(0)}).json()["execution_id"] for _ in range(3)]
+
+    listed = client.get("/exec", params={"limit": 10}).json()
+    assert {item["execution_id"] for item in listed["executions"]} == set(ids)
+    lines = client.get("/exec", params={"format": "ndjson", "limit": 1}).text.splitlines()
+    assert len(lines) == 3
+
+    assert on_loop == [False] * 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,164 @@
+"""
+Тесты для планировщика шагов JALM
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from scheduler import StepGraph, StepScheduler, find_references, resolve_references
+
+
+class TestStepGraph:
+    """Тесты построения DAG шагов"""
+    
+    def test_explicit_and_implicit_dependencies(self):
+        """Зависимости берутся из depends_on и ссылок ${...}"""
+        graph = StepGraph([
+            {"id": "fetch", "layer": "io-http", "input": {"url": "http://a"}},
+            {"id": "slots", "layer": "io-http", "input": {"url": "http://b"}},
+            {"id": "render", "layer": "render-html",
+             "input": {"data": {"items": "${fetch.body}"}}},
+            {"id": "notify", "layer": "notify-mq", "depends_on": ["render", "slots"],
+             "input": {}}
+        ])
+        
+        assert graph.dependencies["fetch"] == set()
+        assert graph.dependencies["render"] == {"fetch"}
+        assert graph.dependencies["notify"] == {"render", "slots"}
+    
+    def test_unknown_dependency(self):
+        """Ссылка на несуществующий шаг"""
+        with pytest.raises(ValueError):
+            StepGraph([{"id": "a", "depends_on": "missing"}])
+    
+    def test_cycle_detection(self):
+        """Циклические зависимости запрещены"""
+        with pytest.raises(ValueError):
+            StepGraph([
+                {"id": "a", "depends_on": "b"},
+                {"id": "b", "input": {"x": "${a.value}"}}
+            ])
+    
+    def test_duplicate_ids(self):
+        """Дублирующиеся id шагов запрещены"""
+        with pytest.raises(ValueError):
+            StepGraph([{"id": "a"}, {"id": "a"}])
+
+
+class TestReferences:
+    """Тесты подстановки результатов шагов"""
+    
+    def test_find_references(self):
+        """Поиск ссылок во вложенных структурах"""
+        value = {"a": ["${one.x}", {"b": "id=${two}"}], "c": 5}
+        assert find_references(value) == {"one", "two"}
+    
+    def test_resolve_keeps_type(self):
+        """Ссылка целиком подставляет значение с сохранением типа"""
+        outputs = {"fetch": {"status": 200, "body": {"items": [1, 2]}}}
+        assert resolve_references("${fetch.body.items}", outputs) == [1, 2]
+        assert resolve_references("code: ${fetch.status}", outputs) == "code: 200"
+    
+    def test_resolve_missing_field(self):
+        """Ошибка при отсутствии поля в результате"""
+        with pytest.raises(ValueError):
+            resolve_references("${fetch.missing}", {"fetch": {}})
+
+
+class TestStepScheduler:
+    """Тесты параллельного выполнения"""
+    
+    def test_independent_steps_run_concurrently(self):
+        """Независимые шаги выполняются одновременно, зависимые - после"""
+        graph = StepGraph([
+            {"id": "a"}, {"id": "b"}, {"id": "c", "depends_on": ["a", "b"]}
+        ])
+        active = 0
+        peak = 0
+        order = []
+        
+        async def run_step(step_id, step_config):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            order.append(step_id)
+            return True
+        
+        assert asyncio.run(StepScheduler(graph, max_parallel=4).run(run_step))
+        assert peak == 2
+        assert order[-1] == "c"
+    
+    def test_parallel_limit(self):
+        """Число одновременно выполняемых шагов ограничено"""
+        graph = StepGraph([{"id": str(i)} for i in range(6)])
+        active = 0
+        peak = 0
+        
+        async def run_step(step_id, step_config):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.005)
+            active -= 1
+            return True
+        
+        assert asyncio.run(StepScheduler(graph, max_parallel=2).run(run_step))
+        assert peak == 2
+    
+    def test_failure_stops_dependents(self):
+        """После ошибки зависимые шаги не запускаются"""
+        graph = StepGraph([{"id": "a"}, {"id": "b", "depends_on": "a"}])
+        started = []
+        
+        async def run_step(step_id, step_config):
+            started.append(step_id)
+            return False
+        
+        assert not asyncio.run(StepScheduler(graph).run(run_step))
+        assert started == ["a"]
+
+    
+    def test_timeout_cancels_running_steps(self):
+        """Таймаут выполнения прерывает шаги в работе"""
+        graph = StepGraph([{"id": "slow"}, {"id": "after", "depends_on": "slow"}])
+        cancelled = []
+        
+        async def run_step(step_id, step_config):
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(step_id)
+                raise
+            return True
+        
+        async def scenario():
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(StepScheduler(graph).run(run_step), 0.05)
+        
+        asyncio.run(scenario())
+        assert cancelled == ["slow"]
+    
+    def test_resume_skips_completed_steps(self):
+        """Восстановленные шаги не перезапускаются, зависимые от них запускаются"""
+        graph = StepGraph([
+            {"id": "a"}, {"id": "b", "depends_on": "a"}, {"id": "c", "depends_on": ["a", "b"]}
+        ])
+        started = []
+        
+        async def run_step(step_id, step_config):
+            started.append(step_id)
+            return True
+        
+        assert asyncio.run(StepScheduler(graph).run(run_step, completed={"a"}))
+        assert started == ["b", "c"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
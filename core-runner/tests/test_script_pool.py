@@ -0,0 +1,171 @@
+"""
+Тесты для пула прогретых интерпретаторов
+"""
+
+import sys
+import shutil
+import asyncio
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from config import RunnerConfig
+from script_pool import ScriptWorkerPool
+
+
+def run_with_pool(config, scenario):
+    """Запуск сценария с пулом и гарантированной остановкой воркеров"""
+    async def wrapper():
+        pool = ScriptWorkerPool(config)
+        try:
+            return await scenario(pool)
+        finally:
+            await pool.close()
+    return asyncio.run(wrapper())
+
+
+def test_python_script_with_variables():
+    """Переменные доступны как имена и как переменные окружения"""
+    async def scenario(pool):
+        return await pool.run(
+            "py",
+            "import os\nprint(a + b, os.environ['a'])",
+            {"a": 2, "b": 3},
+            timeout=10
+        )
+    
+    result = run_with_pool(RunnerConfig(script_workers_per_language=1), scenario)
+    
+    assert result["stdout"].strip() == "5 2"
+    assert result["return_code"] == 0
+
+
+def test_jobs_are_isolated():
+    """Глобальные имена и окружение не переходят между заданиями"""
+    async def scenario(pool):
+        await pool.run("py", "leaked = 1\nimport os\nos.environ['LEAKED'] = '1'", {}, timeout=10)
+        return await pool.run(
+            "py",
+            "import os\nprint('leaked' in globals(), 'LEAKED' in os.environ)",
+            {},
+            timeout=10
+        )
+    
+    result = run_with_pool(RunnerConfig(script_workers_per_language=1), scenario)
+    
+    assert result["stdout"].strip() == "False False"
+
+
+def test_error_and_exit_code():
+    """Исключение скрипта возвращается как stderr и ненулевой код"""
+    async def scenario(pool):
+        return await pool.run("py", "raise RuntimeError('boom')", {}, timeout=10)
+    
+    result = run_with_pool(RunnerConfig(script_workers_per_language=1), scenario)
+    
+    assert result["return_code"] == 1
+    assert "boom" in result["stderr"]
+
+
+def test_worker_recycled_after_max_jobs():
+    """Воркер заменяется после лимита заданий"""
+    async def scenario(pool):
+        pids = []
+        for _ in range(3):
+            result = await pool.run("py", "import os\nprint(os.getpid())", {}, timeout=10)
+            pids.append(result["stdout"].strip())
+        return pids
+    
+    config = RunnerConfig(script_workers_per_language=1, script_max_jobs_per_worker=2)
+    pids = run_with_pool(config, scenario)
+    
+    assert pids[0] == pids[1]
+    assert pids[2] != pids[1]
+
+
+def test_timeout_replaces_worker():
+    """Зависший скрипт прерывается, пул продолжает работать"""
+    async def scenario(pool):
+        with pytest.raises(TimeoutError):
+            await pool.run("py", "while True: pass", {}, timeout=0.5)
+        return await pool.run("py", "print('ok')", {}, timeout=10)
+    
+    result = run_with_pool(RunnerConfig(script_workers_per_language=1), scenario)
+    
+    assert result["stdout"].strip() == "ok"
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node не установлен")
+def test_js_script():
+    """Выполнение JavaScript в vm-контексте"""
+    async def scenario(pool):
+        return await pool.run("js", "console.log(a + b * c)", {"a": 10, "b": 5, "c": 2}, timeout=10)
+    
+    result = run_with_pool(RunnerConfig(script_workers_per_language=1), scenario)
+    
+    assert result["stdout"].strip() == "20"
+
+
+
+def test_python_stdin_and_stdout_isolated():
+    """Чтение stdin и запись в fd 1 не затрагивают протокол воркера"""
+    async def scenario(pool):
+        first = await pool.run(
+            "py",
+            "import os, sys\nprint(repr(sys.stdin.read()))\nos.write(1, b'raw')",
+            {},
+            timeout=10
+        )
+        second = await pool.run("py", "print('next')", {}, timeout=10)
+        return first, second
+
+    first, second = run_with_pool(RunnerConfig(script_workers_per_language=1), scenario)
+
+    assert first["stdout"].strip() == "''" and first["return_code"] == 0
+    assert second["stdout"].strip() == "next"
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node не установлен")
+def test_js_async_output():
+    """process.stdout и вывод таймеров и промисов попадают в результат своего задания"""
+    script = """
+process.stdout.write("sync ");
+setTimeout(() => {
+  console.log("timer");
+  setTimeout(() => process.stderr.write("nested"), 20);
+}, 20);
+Promise.resolve().then(() => console.log("promise"));
+(async () => { await new Promise((resolve) => setTimeout(resolve, 10)); console.log("async"); })();
+"""
+    async def scenario(pool):
+        first = await pool.run("js", script, {}, timeout=10)
+        second = await pool.run("js", "console.log('next')", {}, timeout=10)
+        return first, second
+
+    first, second = run_with_pool(RunnerConfig(script_workers_per_language=1), scenario)
+
+    assert first["stdout"] == "sync promise\nasync\ntimer\n"
+    assert first["stderr"] == "nested"
+    assert second["stdout"] == "next\n"
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node не установлен")
+def test_js_errors_and_exit():
+    """Ошибка в колбэке и process.exit дают код возврата, воркер продолжает работать"""
+    async def scenario(pool):
+        failed = await pool.run("js", "setTimeout(() => { throw new Error('boom'); }, 5)", {}, timeout=10)
+        exited = await pool.run("js", "setInterval(() => {}, 1000); process.exit(3)", {}, timeout=10)
+        after = await pool.run("js", "console.log('ok')", {}, timeout=10)
+        return failed, exited, after
+
+    failed, exited, after = run_with_pool(RunnerConfig(script_workers_per_language=1), scenario)
+
+    assert failed["return_code"] == 1 and "boom" in failed["stderr"]
+    assert exited["return_code"] == 3
+    assert after["stdout"] == "ok\n" and after["return_code"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,93 @@
+"""
+Тесты для кэша результатов шагов
+"""
+
+import sys
+import math
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from config import RunnerConfig
+from step_cache import StepResultCache, side_effect, step_key
+from step_cards import load_step_cards
+
+
+@pytest.fixture
+def cards():
+    return load_step_cards()
+
+
+def test_side_effect_from_cards_and_input(cards):
+    """Побочный эффект берётся из карточки и уточняется по input"""
+    assert side_effect("render-html", {"template": "x"}, cards["render-html"]) == "none"
+    assert side_effect("render-html", {"output_path": "/tmp/p.html"}, cards["render-html"]) == "write"
+    assert side_effect("io-http", {"url": "http://x"}, cards["io-http"]) == "read"
+    assert side_effect("io-http", {"method": "post", "url": "http://x"}, cards["io-http"]) == "write"
+    assert side_effect("io-db", {"query": " select 1"}, cards["io-db"]) == "read"
+    assert side_effect("io-db", {"query": "DELETE FROM t"}, cards["io-db"]) == "write"
+    assert side_effect("notify-mq", {"type": "email"}, cards.get("notify-mq")) == "write"
+
+
+def test_ttl_policy(cards):
+    """TTL: без ограничения для none, read_ttl для read, нет кэша для write"""
+    cache = StepResultCache(RunnerConfig(step_cache_read_ttl=30))
+    
+    assert cache.ttl("render-html", {}, cards["render-html"]) == math.inf
+    assert cache.ttl("io-http", {"url": "http://x"}, cards["io-http"]) == 30
+    assert cache.ttl("io-http", {"url": "http://x"}, cards["io-http"], ttl_override=5) == 5
+    assert cache.ttl("io-http", {"url": "http://x"}, cards["io-http"], ttl_override=0) is None
+    assert cache.ttl("io-file", {"operation": "write"}, None) is None
+
+
+def test_step_key_is_canonical():
+    """Ключ не зависит от порядка полей и таймаута"""
+    first = step_key("io-http", {"url": "http://x", "headers": {"a": 1, "b": 2}})
+    second = step_key("io-http", {"headers": {"b": 2, "a": 1}, "url": "http://x", "timeout": 5})
+    assert first == second
+    assert first != step_key("io-db", {"url": "http://x", "headers": {"a": 1, "b": 2}})
+
+
+def test_hits_misses_and_copies():
+    """Попадания возвращают копию результата, промахи считаются"""
+    cache = StepResultCache(RunnerConfig())
+    key = step_key("render-html", {"template": "x"})
+    
+    assert cache.get(key) is None
+    cache.put(key, {"content": "x", "items": [1]}, math.inf)
+    
+    result = cache.get(key)
+    result["items"].append(2)
+    assert cache.get(key) == {"content": "x", "items": [1]}
+    
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 1, 1)
+    assert stats["hit_ratio"] == pytest.approx(2 / 3, abs=1e-3)
+
+
+def test_expiry_and_memory_budget():
+    """Записи истекают по TTL и вытесняются по бюджету памяти (LRU)"""
+    cache = StepResultCache(RunnerConfig(step_cache_memory_mb=0))
+    cache.budget = 100
+    
+    cache.put("expired", {"v": 1}, -1)
+    assert cache.get("expired") is None
+    
+    cache.put("a", {"v": "a" * 30}, math.inf)
+    cache.put("b", {"v": "b" * 30}, math.inf)
+    cache.get("a")
+    cache.put("c", {"v": "c" * 30}, math.inf)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 100
+    
+    cache.put("huge", {"v": "x" * 200}, math.inf)
+    assert cache.get("huge") is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,38 @@
+"""
+Тесты для карточек шагов
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем путь к ядру
+sys.path.append(str(Path(__file__).parent.parent / "kernel" / "src"))
+
+import pytest
+from step_cards import load_step_cards, input_default
+
+
+def test_cards_indexed_by_layer():
+    """Карточки из kernel/step_cards доступны по слою"""
+    cards = load_step_cards()
+    
+    assert {"io-http", "io-db", "compute-script"} <= set(cards)
+    assert cards["io-db"]["id"] == "db_query"
+
+
+def test_input_default_timeout():
+    """Таймауты по умолчанию берутся из карточек"""
+    cards = load_step_cards()
+    
+    assert input_default(cards["io-db"], "timeout") == 10
+    assert input_default(cards["io-http"], "timeout") == 30
+    assert input_default(None, "timeout") is None
+
+
+def test_missing_cards_dir(tmp_path):
+    """Отсутствующий каталог карточек не является ошибкой"""
+    assert load_step_cards(tmp_path / "missing") == {}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -3,20 +3,71 @@ Shablon Spec API Server
 FastAPI сервер для управления шаблонами JALM
 """
 
-from fastapi import FastAPI, HTTPException, Query, UploadFile, File
+from fastapi import FastAPI, HTTPException, Query, Request, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, Histogram, generate_latest
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import Dict, Any, List, Optional
+import asyncio
 import json
+import logging
 import os
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 import hashlib
 
+# Добавляем путь к модулям API и общим модулям каталогов
+sys.path.append(str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).parent.parent.parent / "shared"))
+
+from http_cache import ResponseCache
+from latency import LATENCY_BUCKETS, monitor_loop_lag
+
+logger = logging.getLogger("shablon-registry")
+
+EMPTY_REGISTRY = {"templates": [], "metadata": {"total_templates": 0}}
+REGISTRY_PATH = Path(__file__).parent.parent / "registry" / "templates.json"
+TEMPLATES_DIR = Path(__file__).parent.parent / "templates"
+
+# Готовые тела ответов каталога; действительны до смены версии реестра
+responses = ResponseCache(
+    max_entries=int(os.getenv("SHABLON_RESPONSE_CACHE_SIZE", "256")),
+    gzip_min_size=int(os.getenv("SHABLON_GZIP_MIN_SIZE", "1024"))
+)
+
+# Метрики
+TEMPLATE_DURATION = Histogram(
+    "shablon_template_duration_seconds",
+    "Время выполнения шаблона, включая загрузку",
+    ["template_id", "status"],
+    buckets=LATENCY_BUCKETS
+)
+TEMPLATES_IN_FLIGHT = Gauge("shablon_templates_in_flight", "Шаблоны в работе")
+LOOP_LAG = Histogram(
+    "shablon_event_loop_lag_seconds",
+    "Задержка event loop относительно запланированного пробуждения",
+    buckets=LATENCY_BUCKETS
+)
+# Загрузка реестра и шаблонов блокирует event loop - задержка показывает насколько
+LOOP_LAG_INTERVAL = float(os.getenv("SHABLON_LOOP_LAG_INTERVAL", "0.5"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Жизненный цикл приложения: фоновый замер задержки event loop"""
+    monitor = None
+    if LOOP_LAG_INTERVAL > 0:
+        monitor = asyncio.create_task(monitor_loop_lag(LOOP_LAG_INTERVAL, LOOP_LAG.observe))
+    yield
+    if monitor is not None:
+        monitor.cancel()
+
 app = FastAPI(
     title="Shablon Spec API",
     description="API для управления шаблонами JALM",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -69,23 +120,60 @@ class TemplateValidationResponse(BaseModel):
     errors: List[str] = []
     warnings: List[str] = []
 
+TEMPLATE_LIST = TypeAdapter(List[TemplateMetadata])
+
+# Разобранный реестр: (отметка файла, реестр, версия)
+_registry_state: tuple = (None, None, None)
+# Отметка файла, который не удалось разобрать: не перечитываем его на каждый запрос
+_failed_stamp: Optional[tuple] = None
+
+def file_stamp(path: Path) -> Optional[tuple]:
+    """Отметка изменения файла (mtime_ns, размер); None, если файла нет"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
 # Загрузка реестра шаблонов
+def registry_state() -> tuple:
+    """Реестр и его версия; файл перечитывается, только если изменилась его отметка"""
+    global _registry_state, _failed_stamp
+    stamp = file_stamp(REGISTRY_PATH)
+    unchanged = stamp == _registry_state[0] or (stamp is not None and stamp == _failed_stamp)
+    if _registry_state[1] is not None and unchanged:
+        return _registry_state[1], _registry_state[2]
+    
+    if stamp is None:
+        registry, version = EMPTY_REGISTRY, "empty"
+    else:
+        try:
+            with open(REGISTRY_PATH, 'rb') as f:
+                raw = f.read()
+            registry = json.loads(raw.decode('utf-8'))
+        except (OSError, ValueError) as e:
+            # Файл мог быть прочитан на середине записи - отдаём последний
+            # успешно загруженный реестр и повторим при следующем изменении
+            logger.error(f"Ошибка загрузки реестра {REGISTRY_PATH}: {e}")
+            _failed_stamp = stamp
+            if _registry_state[1] is None:
+                _registry_state = (None, EMPTY_REGISTRY, "empty")
+            return _registry_state[1], _registry_state[2]
+        # Хеш содержимого одинаков во всех процессах (ETag ответов)
+        version = hashlib.sha256(raw).hexdigest()[:16]
+    _registry_state = (stamp, registry, version)
+    return registry, version
+
 def load_registry() -> Dict[str, Any]:
     """Загружает реестр шаблонов из JSON файла"""
-    registry_path = Path(__file__).parent.parent / "registry" / "templates.json"
-    try:
-        with open(registry_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"templates": [], "metadata": {"total_templates": 0}}
+    return registry_state()[0]
 
-# Загрузка шаблона
-def load_template(template_id: str, version: Optional[str] = None, 
-                 hash: Optional[str] = None) -> tuple[Dict[str, Any], str]:
-    """Загружает шаблон по ID, версии или хешу"""
+# Поиск шаблона
+def find_template(template_id: str, version: Optional[str] = None,
+                  hash: Optional[str] = None) -> Dict[str, Any]:
+    """Метаданные шаблона по ID, версии или хешу"""
     registry = load_registry()
     
-    # Поиск шаблона
     target_template = None
     for template in registry["templates"]:
         if template["id"] == template_id:
@@ -101,9 +189,16 @@ def load_template(template_id: str, version: Optional[str] = None,
     
     if not target_template:
         raise HTTPException(status_code=404, detail=f"Шаблон {template_id} не найден")
+    return target_template
+
+# Загрузка шаблона
+def load_template(template_id: str, version: Optional[str] = None, 
+                 hash: Optional[str] = None) -> tuple[Dict[str, Any], str]:
+    """Загружает шаблон по ID, версии или хешу"""
+    target_template = find_template(template_id, version, hash)
     
     # Загрузка JALM файла
-    template_file = Path(__file__).parent.parent / "templates" / target_template["file"]
+    template_file = TEMPLATES_DIR / target_template["file"]
     
     if not template_file.exists():
         raise HTTPException(status_code=500, detail=f"Файл {target_template['file']} не найден")
@@ -179,23 +274,30 @@ async def health_check():
 
 @app.get("/templates", response_model=List[TemplateMetadata])
 async def list_templates(
+    request: Request,
     category: Optional[str] = Query(None, description="Фильтр по категории"),
     tag: Optional[str] = Query(None, description="Фильтр по тегу"),
     author: Optional[str] = Query(None, description="Фильтр по автору")
 ):
     """Список всех шаблонов с возможностью фильтрации"""
-    registry = load_registry()
-    templates = registry["templates"]
+    registry, version = registry_state()
     
-    # Фильтрация
-    if category:
-        templates = [t for t in templates if t.get("category") == category]
-    if tag:
-        templates = [t for t in templates if tag in t.get("tags", [])]
-    if author:
-        templates = [t for t in templates if t.get("author") == author]
+    def build() -> bytes:
+        templates = registry["templates"]
+        
+        # Фильтрация
+        if category:
+            templates = [t for t in templates if t.get("category") == category]
+        if tag:
+            templates = [t for t in templates if tag in t.get("tags", [])]
+        if author:
+            templates = [t for t in templates if t.get("author") == author]
+        
+        return TEMPLATE_LIST.dump_json(TEMPLATE_LIST.validate_python(templates))
     
-    return templates
+    return responses.respond(
+        request, version, ("templates", category or None, tag or None, author or None), build
+    )
 
 @app.get("/templates/{template_id}", response_model=TemplateMetadata)
 async def get_template(
@@ -219,21 +321,35 @@ async def get_template(
 
 @app.get("/templates/{template_id}/content")
 async def get_template_content(
+    request: Request,
     template_id: str,
     version: Optional[str] = Query(None, description="Версия шаблона"),
     hash: Optional[str] = Query(None, description="Хеш шаблона")
 ):
     """Получение содержимого шаблона"""
     try:
+        _, registry_version = registry_state()
+        template = find_template(template_id, version, hash)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    def build() -> bytes:
         template, content = load_template(template_id, version, hash)
-        return {
+        return json.dumps({
             "template_id": template_id,
             "metadata": template,
             "content": content,
             "hash": generate_hash(content)
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    # Файл шаблона меняется независимо от реестра: его отметка входит в ключ,
+    # и при попадании в кэш файл не читается
+    stamp = file_stamp(TEMPLATES_DIR / template["file"])
+    return responses.respond(
+        request, registry_version, ("content", template_id, version, hash, stamp), build
+    )
 
 @app.post("/templates/{template_id}/execute", response_model=TemplateExecutionResponse)
 async def execute_template(
@@ -243,15 +359,20 @@ async def execute_template(
     """Выполнение шаблона (имитация)"""
     import time
     
-    start_time = time.time()
+    start_time = time.perf_counter()
+    # Неизвестные id не попадают в метку, чтобы не раздувать число рядов
+    metric_id = "unknown"
+    TEMPLATES_IN_FLIGHT.inc()
     
     try:
         template, content = load_template(template_id, request.version, request.hash)
+        metric_id = template["id"]
         
         # Имитация выполнения шаблона
         # В реальной реализации здесь была бы интеграция с core-runner
         
-        execution_time = time.time() - start_time
+        execution_time = time.perf_counter() - start_time
+        TEMPLATE_DURATION.labels(template_id=metric_id, status="success").observe(execution_time)
         
         return TemplateExecutionResponse(
             template_id=template_id,
@@ -267,13 +388,17 @@ async def execute_template(
         )
         
     except Exception as e:
-        execution_time = time.time() - start_time
+        execution_time = time.perf_counter() - start_time
+        TEMPLATE_DURATION.labels(template_id=metric_id, status="error").observe(execution_time)
         return TemplateExecutionResponse(
             template_id=template_id,
             result={"error": str(e)},
             execution_time=execution_time,
             status="error"
         )
+    
+    finally:
+        TEMPLATES_IN_FLIGHT.dec()
 
 @app.post("/templates/validate", response_model=TemplateValidationResponse)
 async def validate_template(request: TemplateValidationRequest):
@@ -316,13 +441,17 @@ async def upload_template(
         raise HTTPException(status_code=500, detail=f"Ошибка загрузки: {str(e)}")
 
 @app.get("/categories")
-async def get_categories():
+async def get_categories(request: Request):
     """Получение списка категорий"""
-    registry = load_registry()
-    return {
-        "categories": registry["metadata"]["categories"],
-        "total": len(registry["metadata"]["categories"])
-    }
+    registry, version = registry_state()
+    
+    def build() -> bytes:
+        return json.dumps({
+            "categories": registry["metadata"]["categories"],
+            "total": len(registry["metadata"]["categories"])
+        }, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    
+    return responses.respond(request, version, "categories", build)
 
 @app.get("/categories/{category}/templates")
 async def get_templates_by_category(category: str):
@@ -336,6 +465,11 @@ async def get_templates_by_category(category: str):
         "count": len(templates)
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Метрики в формате Prometheus"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8002) 
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""
+Тесты для кэша ответов каталога шаблонов
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+# Добавляем путь к API
+sys.path.append(str(Path(__file__).parent.parent / "api"))
+
+import pytest
+from fastapi.testclient import TestClient
+import main
+
+JALM = "BEGIN demo\n  IMPORT slot_validator v1.3.2\n  WHEN client REQUESTS slot\n    RUN ok := slot_validator.create(slot)\nEND\n"
+
+
+def template(template_id, category="booking"):
+    return {
+        "id": template_id, "version": "1.0.0", "hash": f"{template_id}-hash", "name": template_id,
+        "description": "Шаблон", "category": category, "tags": [category], "author": "JALM Team",
+        "file": f"{template_id}.jalm", "dependencies": {}, "input_schema": {}, "output_schema": {},
+        "runtime": {}, "components": [], "config_schema": {}, "files": [],
+        "created_at": "2025-07-18T20:00:00Z", "updated_at": "2025-07-18T20:00:00Z"
+    }
+
+
+def touch(path: Path, text: str):
+    """Запись файла с новой отметкой изменения"""
+    path.write_text(text, encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def write_registry(path: Path, templates):
+    touch(path, json.dumps({
+        "templates": templates,
+        "metadata": {"total_templates": len(templates), "categories": sorted({t["category"] for t in templates})}
+    }))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """Клиент API с временным реестром и каталогом шаблонов"""
+    registry_path = tmp_path / "templates.json"
+    write_registry(registry_path, [template(f"t{i}") for i in range(20)])
+    touch(tmp_path / "t0.jalm", JALM)
+    monkeypatch.setattr(main, "REGISTRY_PATH", registry_path)
+    monkeypatch.setattr(main, "TEMPLATES_DIR", tmp_path)
+    monkeypatch.setattr(main, "_registry_state", (None, None, None))
+    monkeypatch.setattr(main, "_failed_stamp", None)
+    monkeypatch.setattr(main, "responses", main.ResponseCache())
+    return TestClient(main.app)
+
+
+class TestResponseCaching:
+    """Тесты ETag и кэша ответов"""
+
+    def test_templates_not_modified(self, client):
+        """Повторный запрос с ETag - 304, тело строится один раз"""
+        first = client.get("/templates")
+        assert first.status_code == 200
+        assert len(first.json()) == 20
+        assert first.headers["content-encoding"] == "gzip"
+
+        second = client.get("/templates", headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 304
+        assert main.responses.stats()["misses"] == 1
+
+    def test_registry_change_invalidates(self, client, tmp_path):
+        """Изменение реестра меняет ETag списков и категорий"""
+        etag = client.get("/categories").headers["etag"]
+        write_registry(tmp_path / "templates.json", [template("t0", "ecommerce")])
+
+        response = client.get("/categories", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json() == {"categories": ["ecommerce"], "total": 1}
+
+    def test_malformed_registry_keeps_last_good(self, client, tmp_path, caplog):
+        """Битый JSON реестра не роняет каталог: отдаётся последний загруженный реестр"""
+        etag = client.get("/templates").headers["etag"]
+        touch(tmp_path / "templates.json", '{"templates": [')
+
+        response = client.get("/templates", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert "Ошибка загрузки реестра" in caplog.text
+        assert client.get("/templates/t0").status_code == 200
+
+        write_registry(tmp_path / "templates.json", [template("t0")])
+        assert len(client.get("/templates").json()) == 1
+
+    def test_content_cached_until_file_changes(self, client, tmp_path):
+        """Содержимое шаблона перечитывается только при изменении файла"""
+        first = client.get("/templates/t0/content")
+        assert first.json()["content"] == JALM
+        assert client.get("/templates/t0/content", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+
+        touch(tmp_path / "t0.jalm", JALM.replace("demo", "demo2"))
+        changed = client.get("/templates/t0/content", headers={"If-None-Match": first.headers["etag"]})
+        assert changed.status_code == 200
+        assert "demo2" in changed.json()["content"]
+
+    def test_unknown_template(self, client):
+        """Неизвестный шаблон - 404"""
+        assert client.get("/templates/missing/content").status_code == 404
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
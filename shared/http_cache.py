@@ -0,0 +1,116 @@
+"""
+Кэш готовых ответов каталога
+Общий модуль сервисов tula_spec и shablon_spec: тело ответа сериализуется
+один раз на версию реестра, повторные запросы отдают готовые байты,
+If-None-Match - 304 без тела
+"""
+
+import gzip
+import hashlib
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+# Ответы меньше этого размера не сжимаются: выигрыш меньше заголовков
+GZIP_MIN_SIZE = 1024
+
+
+class CachedBody:
+    """Сериализованное тело ответа для одной версии реестра"""
+
+    __slots__ = ("version", "body", "etag", "_gzipped")
+
+    def __init__(self, version: str, body: bytes):
+        self.version = version
+        self.body = body
+        # Слабый валидатор: сжатое и несжатое тело - одно представление
+        self.etag = f'W/"{version}-{hashlib.sha256(body).hexdigest()[:12]}"'
+        self._gzipped: Optional[bytes] = None
+
+    def gzipped(self) -> bytes:
+        """Сжатое тело; сжимается при первом запросе"""
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """Слабое сравнение If-None-Match с ETag"""
+    if not header:
+        return False
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if (candidate[2:] if candidate.startswith("W/") else candidate) == opaque:
+            return True
+    return False
+
+
+def _accepts_gzip(header: Optional[str]) -> bool:
+    """Клиент принимает gzip (и не запретил его через q=0)"""
+    for item in (header or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() in ("gzip", "*"):
+            params = params.replace(" ", "")
+            return params not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+class ResponseCache:
+    """
+    Готовые ответы по ключу запроса
+
+    Запись действительна, пока версия реестра совпадает с той, для которой
+    тело построено; при смене версии тело строится заново. Число записей
+    ограничено: ключ включает параметры фильтров из запроса.
+    """
+
+    def __init__(self, max_entries: int = 256, gzip_min_size: int = GZIP_MIN_SIZE):
+        self.max_entries = max_entries
+        self.gzip_min_size = gzip_min_size
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def respond(self, request: Request, version: str, key: Hashable,
+                build: Callable[[], bytes], media_type: str = "application/json") -> Response:
+        """Ответ из кэша (build вызывается только при промахе) с учётом If-None-Match и Accept-Encoding"""
+        entry = self._entries.get(key)
+        if entry is not None and entry.version == version:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        else:
+            entry = CachedBody(version, build())
+            self.misses += 1
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        headers: Dict[str, str] = {
+            "ETag": entry.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding"
+        }
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        if len(entry.body) >= self.gzip_min_size and _accepts_gzip(request.headers.get("accept-encoding")):
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=entry.gzipped(), media_type=media_type, headers=headers)
+        return Response(content=entry.body, media_type=media_type, headers=headers)
+
+    def stats(self) -> Dict[str, int]:
+        """Состояние кэша ответов"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified
+        }
@@ -0,0 +1,25 @@
+"""
+Замеры задержек сервисов
+Общий модуль core-runner, tula_spec и shablon_spec: границы корзин
+гистограмм времени и фоновый замер задержки event loop
+"""
+
+import asyncio
+from typing import Callable
+
+# Границы корзин времени запросов: от ответов из кэша до долгих вызовов
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+async def monitor_loop_lag(interval: float, observe: Callable[[float], None]):
+    """
+    Фоновый замер задержки event loop
+
+    Задача засыпает на interval и передаёт в observe, насколько позже
+    срока она проснулась: это время, которое loop был занят другими задачами.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        observe(max(loop.time() - expected, 0.0))
@@ -0,0 +1,124 @@
+"""
+Исполнение функций Tula Spec вне event loop
+Режим выбирается по блоку runtime функции в реестре: inline, thread или process
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from modules import ModuleCache
+
+MODES = ("inline", "thread", "process")
+
+# Кэш модулей рабочего процесса пула (свой в каждом процессе)
+_process_modules: Optional[ModuleCache] = None
+
+
+def _call_in_process(functions_dir: str, file: str, func_name: str,
+                     args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+    """Вызов функции в рабочем процессе: модуль загружается один раз на процесс"""
+    global _process_modules
+    if _process_modules is None:
+        _process_modules = ModuleCache(Path(functions_dir))
+    func = getattr(_process_modules.get(file), func_name)
+    return func(*args, **kwargs)
+
+
+class FunctionTimeout(Exception):
+    """Функция не уложилась в таймаут вызова"""
+
+
+class ExecutionBackend:
+    """
+    Исполнитель вызовов функций
+
+    - inline - в event loop; только для коротких функций без блокировок
+    - thread - в пуле потоков; для функций с вводом-выводом
+    - process - в пуле процессов; для тяжёлых вычислений (обходит GIL)
+
+    runtime.executor и runtime.timeout в functions.json задают режим
+    и таймаут функции, иначе действуют значения по умолчанию. По таймауту
+    вызов завершается ошибкой, но поток или процесс пула дорабатывает
+    функцию до конца: прервать их извне нельзя.
+    """
+
+    def __init__(self, modules: ModuleCache, default_mode: str = "thread",
+                 default_timeout: Optional[float] = 30.0,
+                 thread_workers: int = 8, process_workers: Optional[int] = None):
+        if default_mode not in MODES:
+            raise ValueError(f"Неизвестный режим исполнения: {default_mode}")
+        self.modules = modules
+        self.default_mode = default_mode
+        self.default_timeout = default_timeout
+        self.thread_workers = max(1, thread_workers)
+        self.process_workers = max(1, process_workers or os.cpu_count() or 1)
+        # Пулы создаются при первом вызове в своём режиме
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    def mode(self, metadata: Dict[str, Any]) -> str:
+        """Режим исполнения функции"""
+        mode = metadata.get("runtime", {}).get("executor", self.default_mode)
+        if mode not in MODES:
+            raise ValueError(f"Неизвестный режим исполнения {mode} у функции {metadata.get('id')}")
+        return mode
+
+    def timeout(self, metadata: Dict[str, Any]) -> Optional[float]:
+        """Таймаут вызова функции, секунды (0 или null - без таймаута)"""
+        timeout = metadata.get("runtime", {}).get("timeout", self.default_timeout)
+        return timeout or None
+
+    async def call(self, metadata: Dict[str, Any], func: Callable[..., Any],
+                   args: Tuple[Any, ...] = (), kwargs: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Вызов функции в режиме из runtime
+
+        func - функция из загруженного модуля; в режиме process рабочий
+        процесс сам загружает implementation.file и вызывает func по имени.
+        """
+        kwargs = kwargs or {}
+        mode = self.mode(metadata)
+
+        if mode == "inline":
+            return func(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        if mode == "thread":
+            if self._threads is None:
+                self._threads = ThreadPoolExecutor(
+                    max_workers=self.thread_workers, thread_name_prefix="tula-function"
+                )
+            future = loop.run_in_executor(self._threads, lambda: func(*args, **kwargs))
+        else:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self.process_workers)
+            impl = metadata["implementation"]
+            future = loop.run_in_executor(
+                self._processes, _call_in_process,
+                str(self.modules.functions_dir), impl["file"], func.__name__, args, kwargs
+            )
+
+        timeout = self.timeout(metadata)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise FunctionTimeout(f"Функция {metadata.get('id')} не уложилась в {timeout} с")
+
+    def stats(self) -> Dict[str, Any]:
+        """Настройки пулов"""
+        return {
+            "default_mode": self.default_mode,
+            "default_timeout": self.default_timeout,
+            "thread_workers": self.thread_workers,
+            "process_workers": self.process_workers
+        }
+
+    def close(self):
+        """Остановка пулов"""
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
@@ -3,23 +3,89 @@ Tula Spec API Server
 FastAPI сервер для управления функциями JALM
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, Histogram, generate_latest
+from pydantic import BaseModel, Field, TypeAdapter
 from typing import Dict, Any, List, Optional
-import json
+import asyncio
 import os
 import sys
-import importlib.util
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-# Добавляем путь к функциям
+# Добавляем путь к функциям, модулям API и общим модулям каталогов
 sys.path.append(str(Path(__file__).parent.parent / "functions"))
+sys.path.append(str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).parent.parent.parent / "shared"))
+
+from executors import ExecutionBackend
+from http_cache import ResponseCache
+from latency import LATENCY_BUCKETS, monitor_loop_lag
+from modules import ModuleCache
+from registry import FunctionRegistry
+
+# Реестр функций загружается один раз и перечитывается при изменении файла
+registry = FunctionRegistry(
+    Path(__file__).parent.parent / "registry" / "functions.json",
+    poll_interval=float(os.getenv("TULA_REGISTRY_POLL_INTERVAL", "1.0"))
+)
+# Модули функций исполняются один раз, пока не изменится файл
+modules = ModuleCache(Path(__file__).parent.parent / "functions")
+# Режим исполнения функции задаётся runtime.executor в реестре
+backend = ExecutionBackend(
+    modules,
+    default_mode=os.getenv("TULA_EXECUTOR", "thread"),
+    default_timeout=float(os.getenv("TULA_EXECUTION_TIMEOUT", "30")),
+    thread_workers=int(os.getenv("TULA_THREAD_WORKERS", "8")),
+    process_workers=int(os.getenv("TULA_PROCESS_WORKERS", "0")) or None
+)
+# Готовые тела ответов каталога; действительны до смены версии реестра
+responses = ResponseCache(
+    max_entries=int(os.getenv("TULA_RESPONSE_CACHE_SIZE", "256")),
+    gzip_min_size=int(os.getenv("TULA_GZIP_MIN_SIZE", "1024"))
+)
+
+# Метрики
+FUNCTION_DURATION = Histogram(
+    "tula_function_duration_seconds",
+    "Время выполнения функции, включая загрузку модуля",
+    ["function_id", "status"],
+    buckets=LATENCY_BUCKETS
+)
+BATCH_DURATION = Histogram(
+    "tula_batch_duration_seconds",
+    "Время пакетного выполнения функции",
+    ["function_id", "mode"],
+    buckets=LATENCY_BUCKETS
+)
+FUNCTIONS_IN_FLIGHT = Gauge("tula_functions_in_flight", "Функции в работе")
+LOOP_LAG = Histogram(
+    "tula_event_loop_lag_seconds",
+    "Задержка event loop относительно запланированного пробуждения",
+    buckets=LATENCY_BUCKETS
+)
+# Функции выполняются в event loop синхронно - задержка показывает, насколько они его держат
+LOOP_LAG_INTERVAL = float(os.getenv("TULA_LOOP_LAG_INTERVAL", "0.5"))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Жизненный цикл приложения: прогрев модулей, слежение за реестром, замер задержки event loop"""
+    modules.warm(registry.snapshot.functions)
+    tasks = [asyncio.create_task(registry.watch())]
+    if LOOP_LAG_INTERVAL > 0:
+        tasks.append(asyncio.create_task(monitor_loop_lag(LOOP_LAG_INTERVAL, LOOP_LAG.observe)))
+    yield
+    for task in tasks:
+        task.cancel()
+    backend.close()
 
 app = FastAPI(
     title="Tula Spec API",
     description="API для управления функциями JALM",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -45,9 +111,13 @@ class FunctionMetadata(BaseModel):
     dependencies: List[str]
     runtime: Dict[str, Any]
 
+FUNCTION_LIST = TypeAdapter(List[FunctionMetadata])
+
 class FunctionExecutionRequest(BaseModel):
     version: Optional[str] = None
     hash: Optional[str] = None
+    # Точка входа из implementation.operations; по умолчанию implementation.function
+    operation: Optional[str] = None
     params: Dict[str, Any] = Field(default_factory=dict)
 
 class FunctionExecutionResponse(BaseModel):
@@ -56,51 +126,62 @@ class FunctionExecutionResponse(BaseModel):
     execution_time: float
     status: str
 
-# Загрузка реестра функций
-def load_registry() -> Dict[str, Any]:
-    """Загружает реестр функций из JSON файла"""
-    registry_path = Path(__file__).parent.parent / "registry" / "functions.json"
-    try:
-        with open(registry_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return {"functions": [], "metadata": {"total_functions": 0}}
+class FunctionBatchRequest(BaseModel):
+    version: Optional[str] = None
+    hash: Optional[str] = None
+    operation: Optional[str] = None
+    params: List[Dict[str, Any]]
+
+class FunctionBatchResponse(BaseModel):
+    function_id: str
+    results: List[Dict[str, Any]]
+    execution_time: float
+    status: str
+    mode: str  # batch - пакетная точка входа функции, map - параллельные вызовы
+
+BATCH_MAX_SIZE = int(os.getenv("TULA_BATCH_MAX_SIZE", "1000"))
+
+def call_arguments(params: Dict[str, Any]) -> tuple:
+    """Аргументы вызова: единственный параметр передаётся значением, иначе kwargs"""
+    if isinstance(params, dict) and len(params) == 1:
+        return (list(params.values())[0],), {}
+    return (), params
+
+def get_callable(module: Any, name: str) -> Any:
+    """Функция модуля по имени из реестра"""
+    if not hasattr(module, name):
+        raise HTTPException(status_code=500, detail=f"Функция {name} не найдена в модуле")
+    return getattr(module, name)
+
+def entry_point(metadata: Dict[str, Any], operation: Optional[str]) -> str:
+    """Имя вызываемой функции модуля: основная или одна из implementation.operations"""
+    impl = metadata["implementation"]
+    if operation is None or operation == impl["function"]:
+        return impl["function"]
+    if operation not in impl.get("operations", []):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Операция {operation} не поддерживается функцией {metadata['id']}"
+        )
+    return operation
 
 # Загрузка функции
 def load_function(function_id: str, version: Optional[str] = None, 
                  hash: Optional[str] = None) -> Any:
     """Загружает функцию по ID, версии или хешу"""
-    registry = load_registry()
-    
-    # Поиск функции
-    target_function = None
-    for func in registry["functions"]:
-        if func["id"] == function_id:
-            if version and func["version"] == version:
-                target_function = func
-                break
-            elif hash and func["hash"] == hash:
-                target_function = func
-                break
-            elif not version and not hash:
-                target_function = func
-                break
+    target_function = registry.snapshot.find(function_id, version, hash)
     
     if not target_function:
         raise HTTPException(status_code=404, detail=f"Функция {function_id} не найдена")
     
-    # Загрузка модуля
+    # Загрузка модуля из кэша
     impl = target_function["implementation"]
-    module_path = Path(__file__).parent.parent / "functions" / impl["file"]
-    
-    if not module_path.exists():
-        raise HTTPException(status_code=500, detail=f"Файл {impl['file']} не найден")
     
     try:
-        spec = importlib.util.spec_from_file_location(impl["file"], module_path)
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
+        module = modules.get(impl["file"])
         return module, target_function
+    except FileNotFoundError:
+        raise HTTPException(status_code=500, detail=f"Файл {impl['file']} не найден")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Ошибка загрузки функции: {str(e)}")
 
@@ -117,29 +198,32 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Проверка здоровья сервиса"""
-    registry = load_registry()
+    metadata = registry.snapshot.metadata
     return {
         "status": "healthy",
-        "total_functions": registry["metadata"]["total_functions"],
-        "last_updated": registry["metadata"]["last_updated"]
+        "total_functions": metadata.get("total_functions", 0),
+        "last_updated": metadata.get("last_updated"),
+        "registry_reloads": registry.reloads,
+        "modules": modules.stats(),
+        "executor": backend.stats(),
+        "responses": responses.stats()
     }
 
 @app.get("/functions", response_model=List[FunctionMetadata])
 async def list_functions(
+    request: Request,
     tag: Optional[str] = Query(None, description="Фильтр по тегу"),
     author: Optional[str] = Query(None, description="Фильтр по автору")
 ):
     """Список всех функций с возможностью фильтрации"""
-    registry = load_registry()
-    functions = registry["functions"]
+    snapshot = registry.snapshot
     
-    # Фильтрация
-    if tag:
-        functions = [f for f in functions if tag in f.get("tags", [])]
-    if author:
-        functions = [f for f in functions if f.get("author") == author]
+    def build() -> bytes:
+        # Фильтрация по инвертированным индексам тегов и авторов
+        functions = snapshot.filter(tag or None, author or None)
+        return FUNCTION_LIST.dump_json(FUNCTION_LIST.validate_python(functions))
     
-    return functions
+    return responses.respond(request, snapshot.version, ("functions", tag or None, author or None), build)
 
 @app.get("/functions/{function_id}", response_model=FunctionMetadata)
 async def get_function(
@@ -148,16 +232,9 @@ async def get_function(
     hash: Optional[str] = Query(None, description="Хеш функции")
 ):
     """Получение метаданных функции"""
-    registry = load_registry()
-    
-    for func in registry["functions"]:
-        if func["id"] == function_id:
-            if version and func["version"] == version:
-                return func
-            elif hash and func["hash"] == hash:
-                return func
-            elif not version and not hash:
-                return func
+    func = registry.snapshot.find(function_id, version, hash)
+    if func is not None:
+        return func
     
     raise HTTPException(status_code=404, detail=f"Функция {function_id} не найдена")
 
@@ -169,7 +246,10 @@ async def execute_function(
     """Выполнение функции"""
     import time
     
-    start_time = time.time()
+    start_time = time.perf_counter()
+    # Неизвестные id не попадают в метку, чтобы не раздувать число рядов
+    metric_id = "unknown"
+    FUNCTIONS_IN_FLIGHT.inc()
     
     try:
         # Загрузка функции
@@ -178,27 +258,17 @@ async def execute_function(
             request.version, 
             request.hash
         )
+        metric_id = metadata["id"]
         
         # Получение функции
-        func_name = metadata["implementation"]["function"]
-        if not hasattr(module, func_name):
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Функция {func_name} не найдена в модуле"
-            )
-        
-        func = getattr(module, func_name)
+        func = get_callable(module, entry_point(metadata, request.operation))
         
-        # Выполнение функции
-        if isinstance(request.params, dict) and len(request.params) == 1:
-            # Если один параметр, передаем его значение
-            param_value = list(request.params.values())[0]
-            result = func(param_value)
-        else:
-            # Иначе передаем все параметры как kwargs
-            result = func(**request.params)
+        # Выполнение функции вне event loop (режим из runtime функции)
+        args, kwargs = call_arguments(request.params)
+        result = await backend.call(metadata, func, args, kwargs)
         
-        execution_time = time.time() - start_time
+        execution_time = time.perf_counter() - start_time
+        FUNCTION_DURATION.labels(function_id=metric_id, status="success").observe(execution_time)
         
         return FunctionExecutionResponse(
             function_id=function_id,
@@ -208,13 +278,91 @@ async def execute_function(
         )
         
     except Exception as e:
-        execution_time = time.time() - start_time
+        execution_time = time.perf_counter() - start_time
+        FUNCTION_DURATION.labels(function_id=metric_id, status="error").observe(execution_time)
         return FunctionExecutionResponse(
             function_id=function_id,
-            result={"error": str(e)},
+            result={"error": e.detail if isinstance(e, HTTPException) else str(e)},
             execution_time=execution_time,
             status="error"
         )
+    
+    finally:
+        FUNCTIONS_IN_FLIGHT.dec()
+
+@app.post("/functions/{function_id}/execute_batch", response_model=FunctionBatchResponse)
+async def execute_function_batch(
+    function_id: str,
+    request: FunctionBatchRequest
+):
+    """
+    Пакетное выполнение функции
+    
+    Если у функции есть пакетная точка входа (implementation.batch_function
+    или <function>_many), она получает список аргументов одним вызовом:
+    значений для наборов из одного параметра, словарей для именованных.
+    Иначе функция вызывается для каждого набора параметров параллельно,
+    ошибка одного набора не прерывает остальные.
+    """
+    import time
+    
+    if len(request.params) > BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Слишком много наборов параметров: {len(request.params)} > {BATCH_MAX_SIZE}"
+        )
+    
+    start_time = time.perf_counter()
+    module, metadata = load_function(function_id, request.version, request.hash)
+    impl = metadata["implementation"]
+    name = entry_point(metadata, request.operation)
+    func = get_callable(module, name)
+    calls = [call_arguments(params) for params in request.params]
+    
+    batch_name = f"{name}_many"
+    if name == impl["function"] and impl.get("batch_function"):
+        batch_name = impl["batch_function"]
+    batch_func = getattr(module, batch_name, None)
+    # Пакетная точка входа принимает список одиночных аргументов или словарей kwargs
+    if batch_func is not None and all(len(args) == 1 for args, _ in calls):
+        mode, batch_args = "batch", [args[0] for args, _ in calls]
+    elif batch_func is not None and all(not args for args, _ in calls):
+        mode, batch_args = "batch", [kwargs for _, kwargs in calls]
+    else:
+        mode, batch_args = "map", None
+    FUNCTIONS_IN_FLIGHT.inc()
+    
+    try:
+        if mode == "batch":
+            try:
+                results = await backend.call(metadata, batch_func, (batch_args,))
+                status = "success"
+            except Exception as e:
+                results = [{"error": str(e)} for _ in calls]
+                status = "error"
+        else:
+            outcomes = await asyncio.gather(
+                *[backend.call(metadata, func, args, kwargs) for args, kwargs in calls],
+                return_exceptions=True
+            )
+            results = [
+                {"error": str(outcome) or type(outcome).__name__} if isinstance(outcome, Exception) else outcome
+                for outcome in outcomes
+            ]
+            status = "error" if any(isinstance(outcome, Exception) for outcome in outcomes) else "success"
+    finally:
+        FUNCTIONS_IN_FLIGHT.dec()
+    
+    execution_time = time.perf_counter() - start_time
+    BATCH_DURATION.labels(function_id=metadata["id"], mode=mode).observe(execution_time)
+    
+    return FunctionBatchResponse(
+        function_id=function_id,
+        results=results,
+        execution_time=execution_time,
+        status=status,
+        mode=mode
+    )
 
 @app.get("/functions/{function_id}/info")
 async def get_function_info(function_id: str):
@@ -236,6 +384,11 @@ async def get_function_info(function_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/metrics")
+async def metrics():
+    """Метрики в формате Prometheus"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""
+Кэш модулей функций Tula Spec
+Модуль функции исполняется один раз и переиспользуется, пока не изменится его файл
+"""
+
+import importlib.util
+import logging
+import os
+import threading
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, Iterable, Tuple
+
+logger = logging.getLogger("tula-modules")
+
+
+class ModuleCache:
+    """
+    Загруженные модули функций по пути к файлу
+
+    Запись помнит (mtime_ns, размер) файла, из которого модуль исполнен;
+    при несовпадении модуль загружается заново. Проверка - один stat
+    на вызов вместо разбора и исполнения всего модуля.
+    """
+
+    def __init__(self, functions_dir: Path):
+        self.functions_dir = Path(functions_dir)
+        self._modules: Dict[Path, Tuple[Tuple[int, int], ModuleType]] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, file: str) -> ModuleType:
+        """Модуль функции по имени файла; FileNotFoundError, если файла нет"""
+        path = self.functions_dir / file
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self._modules.get(path)
+        if entry is not None and entry[0] == stamp:
+            self.hits += 1
+            return entry[1]
+
+        # Загрузка под блокировкой: параллельные вызовы не исполняют модуль дважды
+        with self._lock:
+            entry = self._modules.get(path)
+            if entry is not None and entry[0] == stamp:
+                self.hits += 1
+                return entry[1]
+
+            spec = importlib.util.spec_from_file_location(file, path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            self._modules[path] = (stamp, module)
+            self.loads += 1
+            return module
+
+    def warm(self, functions: Iterable[Dict[str, Any]]) -> int:
+        """Предзагрузка модулей функций реестра; ошибки только логируются"""
+        loaded = 0
+        for func in functions:
+            file = func.get("implementation", {}).get("file")
+            if not file:
+                continue
+            try:
+                self.get(file)
+                loaded += 1
+            except Exception as e:
+                logger.error(f"Не удалось загрузить модуль {file} функции {func.get('id')}: {e}")
+        return loaded
+
+    def stats(self) -> Dict[str, int]:
+        """Состояние кэша модулей"""
+        return {"modules": len(self._modules), "loads": self.loads, "hits": self.hits}
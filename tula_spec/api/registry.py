@@ -0,0 +1,141 @@
+"""
+Реестр функций Tula Spec в памяти
+Загружается один раз, ищет по индексам и перечитывает файл при изменении
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("tula-registry")
+
+EMPTY_REGISTRY = {"functions": [], "metadata": {"total_functions": 0}}
+
+
+class RegistrySnapshot:
+    """
+    Неизменяемый снимок реестра с индексами
+
+    Снимок не меняется после построения: перезагрузка строит новый
+    и подменяет ссылку целиком, поэтому запрос всегда видит
+    согласованные функции и индексы.
+    """
+
+    def __init__(self, data: Dict[str, Any], stamp: Optional[Tuple[int, int]] = None,
+                 version: str = "empty"):
+        self.functions: List[Dict[str, Any]] = data.get("functions", [])
+        self.metadata: Dict[str, Any] = data.get("metadata", {})
+        # (mtime_ns, размер) файла, из которого построен снимок
+        self.stamp = stamp
+        # Хеш содержимого файла: одинаков во всех процессах (ETag ответов)
+        self.version = version
+
+        self.by_id: Dict[str, Dict[str, Any]] = {}
+        self.by_version: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.by_hash: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Инвертированные индексы: значение -> позиции функций в файле
+        self.by_tag: Dict[str, List[int]] = {}
+        self.by_author: Dict[str, List[int]] = {}
+
+        for position, func in enumerate(self.functions):
+            function_id = func["id"]
+            # Как и при линейном поиске, побеждает первая запись в файле
+            self.by_id.setdefault(function_id, func)
+            self.by_version.setdefault((function_id, func.get("version")), func)
+            self.by_hash.setdefault((function_id, func.get("hash")), func)
+            for tag in set(func.get("tags", [])):
+                self.by_tag.setdefault(tag, []).append(position)
+            if func.get("author") is not None:
+                self.by_author.setdefault(func["author"], []).append(position)
+
+    def find(self, function_id: str, version: Optional[str] = None,
+             hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Функция по ID, версии или хешу"""
+        if version:
+            func = self.by_version.get((function_id, version))
+            if func is not None or not hash:
+                return func
+        if hash:
+            return self.by_hash.get((function_id, hash))
+        return self.by_id.get(function_id)
+
+    def filter(self, tag: Optional[str] = None, author: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Функции с тегом и/или автором в порядке файла"""
+        if tag is None and author is None:
+            return self.functions
+
+        positions: Optional[set] = None
+        for index, key in ((self.by_tag, tag), (self.by_author, author)):
+            if key is None:
+                continue
+            found = set(index.get(key, ()))
+            positions = found if positions is None else positions & found
+        return [self.functions[position] for position in sorted(positions)]
+
+
+class FunctionRegistry:
+    """
+    Реестр функций с горячей перезагрузкой
+
+    Файл проверяется по mtime и размеру фоновой задачей watch(),
+    поиск на пути запроса не обращается к диску. Если новый файл
+    не разбирается, остаётся прежний снимок.
+    """
+
+    def __init__(self, path: Path, poll_interval: float = 1.0):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        # Отметка файла, который не удалось разобрать: не перечитываем его каждый опрос
+        self._failed_stamp: Optional[Tuple[int, int]] = None
+        self._snapshot = RegistrySnapshot(EMPTY_REGISTRY)
+        self.reload()
+
+    @property
+    def snapshot(self) -> RegistrySnapshot:
+        """Текущий снимок"""
+        return self._snapshot
+
+    def _stamp(self) -> Optional[Tuple[int, int]]:
+        """Отметка изменения файла; None, если файла нет"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self, force: bool = True) -> bool:
+        """Перечитывает файл (при force=False - только если он изменился)"""
+        stamp = self._stamp()
+        if not force and stamp in (self._snapshot.stamp, self._failed_stamp):
+            return False
+
+        if stamp is None:
+            snapshot = RegistrySnapshot(EMPTY_REGISTRY)
+        else:
+            try:
+                with open(self.path, 'rb') as f:
+                    raw = f.read()
+                snapshot = RegistrySnapshot(
+                    json.loads(raw.decode('utf-8')), stamp, hashlib.sha256(raw).hexdigest()[:16]
+                )
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                # Файл мог быть прочитан на середине записи - повторим при следующей проверке
+                logger.error(f"Ошибка загрузки реестра {self.path}: {e}")
+                self._failed_stamp = stamp
+                return False
+
+        self._snapshot = snapshot
+        self.reloads += 1
+        return True
+
+    async def watch(self):
+        """Фоновая проверка изменений файла реестра"""
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self.reload(force=False):
+                logger.info(f"Реестр функций перезагружен: {len(self.snapshot.functions)} функций")
@@ -0,0 +1,278 @@
+"""
+Notify Dispatcher - Пакетная доставка уведомлений для notify_system
+Вспомогательный модуль функций Tula (не регистрируется в реестре)
+
+Уведомления ставятся в очередь своего канала (web, email, sms). Обработчик
+канала забирает из очереди пачку до max_batch провайдера, схлопывает
+одинаковые уведомления и отправляет пачку одним вызовом провайдера
+с ограничением скорости и повторами с джиттером.
+
+Диспетчер работает в собственном потоке со своим event loop: функции Tula
+вызываются синхронно (inline или в пуле потоков), и ожидание результата
+не блокирует цикл, который доставляет уведомления.
+"""
+
+import abc
+import asyncio
+import concurrent.futures
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("tula-notify")
+
+CHANNELS = ("web", "email", "sms")
+
+
+@dataclass
+class Notification:
+    """Уведомление в очереди канала"""
+    notification_id: str
+    message: str
+    channel: str
+    recipient: str
+    notification_type: Optional[str] = None
+    future: concurrent.futures.Future = field(default_factory=concurrent.futures.Future, repr=False)
+
+    def key(self) -> Tuple[str, str, str, Optional[str]]:
+        """Ключ схлопывания: одинаковые уведомления отправляются один раз"""
+        return self.channel, self.recipient, self.message, self.notification_type
+
+
+class ProviderUnavailable(Exception):
+    """Временная ошибка провайдера: пачка будет отправлена повторно"""
+
+
+class NotificationProvider(abc.ABC):
+    """
+    Провайдер доставки канала
+
+    send_batch получает пачку уникальных уведомлений и возвращает статусы
+    ("sent" или "failed") в том же порядке. ProviderUnavailable - повтор
+    всей пачки, любое другое исключение - пачка не доставлена.
+    """
+
+    channel: str = ""
+    # Максимальный размер пачки одного вызова
+    max_batch: int = 100
+    # Уведомлений в секунду; None - без ограничения
+    rate: Optional[float] = None
+
+    @abc.abstractmethod
+    async def send_batch(self, notifications: List[Notification]) -> List[str]:
+        """Отправка пачки одним вызовом; статусы в порядке уведомлений"""
+
+
+class LocalProvider(NotificationProvider):
+    """
+    Локальная замена внешнего сервиса
+
+    Пишет пачку в лог и хранит последние отправленные уведомления
+    для отладки и тестов.
+    """
+
+    def __init__(self, channel: str, max_batch: int = 100, rate: Optional[float] = None,
+                 history: int = 1000):
+        self.channel = channel
+        self.max_batch = max_batch
+        self.rate = rate
+        self.batches = 0
+        self.sent: Deque[Notification] = deque(maxlen=history)
+
+    async def send_batch(self, notifications: List[Notification]) -> List[str]:
+        self.batches += 1
+        for notification in notifications:
+            logger.debug(f"[NOTIFY] {self.channel.upper()}: {notification.recipient} - {notification.message}")
+            self.sent.append(notification)
+        logger.info(f"[NOTIFY] {self.channel.upper()}: отправлено {len(notifications)} уведомлений")
+        return ["sent"] * len(notifications)
+
+
+class _RateLimiter:
+    """
+    Ограничение скорости канала (token bucket)
+
+    Запас - одна секунда отправки; пачка больше запаса уходит в долг,
+    и следующая ждёт, пока он не погасится. У канала один обработчик,
+    поэтому блокировка не нужна.
+    """
+
+    def __init__(self, rate: Optional[float]):
+        self.rate = rate
+        self.tokens = rate or 0.0
+        self.updated = time.monotonic()
+
+    async def acquire(self, count: int):
+        if not self.rate:
+            return
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= count
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class NotifyDispatcher:
+    """
+    Очереди уведомлений по каналам с пакетной отправкой
+
+    submit() потокобезопасен и возвращает concurrent.futures.Future
+    со статусом доставки каждого уведомления.
+    """
+
+    def __init__(self, providers: Optional[Dict[str, NotificationProvider]] = None,
+                 linger: float = 0.01, retries: int = 3, backoff: float = 0.1):
+        self.providers: Dict[str, NotificationProvider] = {
+            channel: LocalProvider(channel) for channel in CHANNELS
+        }
+        self.providers.update(providers or {})
+        # Сколько подождать добора пачки после первого уведомления, секунды
+        self.linger = linger
+        self.retries = retries
+        self.backoff = backoff
+        self.stats = {"queued": 0, "batches": 0, "coalesced": 0, "retries": 0, "sent": 0, "failed": 0}
+
+        self._loop = asyncio.new_event_loop()
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._limiters: Dict[str, _RateLimiter] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._thread = threading.Thread(target=self._loop.run_forever, name="tula-notify", daemon=True)
+        self._thread.start()
+
+    def register(self, provider: NotificationProvider):
+        """Подключение провайдера канала вместо текущего"""
+        self._loop.call_soon_threadsafe(self._set_provider, provider)
+
+    def submit(self, notifications: List[Notification]) -> List[concurrent.futures.Future]:
+        """Постановка уведомлений в очереди каналов"""
+        self._loop.call_soon_threadsafe(self._enqueue, notifications)
+        return [notification.future for notification in notifications]
+
+    def close(self):
+        """Остановка обработчиков; недоставленные уведомления получают статус failed"""
+        async def stop():
+            for task in self._workers.values():
+                task.cancel()
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+            for queue in self._queues.values():
+                while not queue.empty():
+                    self._resolve(queue.get_nowait(), "failed")
+
+        asyncio.run_coroutine_threadsafe(stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def _set_provider(self, provider: NotificationProvider):
+        self.providers[provider.channel] = provider
+        self._limiters[provider.channel] = _RateLimiter(provider.rate)
+
+    def _enqueue(self, notifications: List[Notification]):
+        for notification in notifications:
+            channel = notification.channel
+            if channel not in self.providers:
+                self._resolve(notification, "failed")
+                continue
+            if channel not in self._workers:
+                self._queues[channel] = asyncio.Queue()
+                self._limiters.setdefault(channel, _RateLimiter(self.providers[channel].rate))
+                self._workers[channel] = self._loop.create_task(self._worker(channel))
+            self._queues[channel].put_nowait(notification)
+            self.stats["queued"] += 1
+
+    async def _worker(self, channel: str):
+        """Обработчик канала: пачки из очереди по порядку"""
+        queue = self._queues[channel]
+        while True:
+            batch = [await queue.get()]
+            limit = self.providers[channel].max_batch
+            self._drain(queue, batch, limit)
+            if len(batch) < limit and self.linger > 0:
+                await asyncio.sleep(self.linger)
+                self._drain(queue, batch, limit)
+            try:
+                await self._deliver(channel, batch)
+            except asyncio.CancelledError:
+                for notification in batch:
+                    self._resolve(notification, "failed")
+                raise
+            except Exception as e:
+                logger.error(f"Ошибка доставки пачки канала {channel}: {e}")
+                for notification in batch:
+                    self._resolve(notification, "failed")
+
+    @staticmethod
+    def _drain(queue: asyncio.Queue, batch: List[Notification], limit: int):
+        while len(batch) < limit and not queue.empty():
+            batch.append(queue.get_nowait())
+
+    async def _deliver(self, channel: str, batch: List[Notification]):
+        """Отправка пачки: схлопывание, ограничение скорости, повторы"""
+        groups: Dict[Tuple, List[Notification]] = {}
+        for notification in batch:
+            groups.setdefault(notification.key(), []).append(notification)
+        unique = [group[0] for group in groups.values()]
+        self.stats["coalesced"] += len(batch) - len(unique)
+
+        provider = self.providers[channel]
+        await self._limiters[channel].acquire(len(unique))
+
+        statuses = ["failed"] * len(unique)
+        for attempt in range(self.retries + 1):
+            try:
+                statuses = await provider.send_batch(unique)
+                break
+            except ProviderUnavailable as e:
+                if attempt == self.retries:
+                    logger.error(f"Провайдер {channel} недоступен после {attempt + 1} попыток: {e}")
+                    break
+                self.stats["retries"] += 1
+                # Экспоненциальная задержка с полным джиттером
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+            except Exception as e:
+                logger.error(f"Ошибка провайдера {channel}: {e}")
+                break
+
+        if len(statuses) != len(unique):
+            logger.error(f"Провайдер {channel} вернул {len(statuses)} статусов на {len(unique)} уведомлений")
+            statuses = ["failed"] * len(unique)
+
+        self.stats["batches"] += 1
+        for group, status in zip(groups.values(), statuses):
+            for notification in group:
+                self._resolve(notification, status)
+
+    def _resolve(self, notification: Notification, status: str):
+        if not notification.future.done():
+            notification.future.set_result(status)
+            self.stats["sent" if status == "sent" else "failed"] += 1
+
+
+_default: Optional[NotifyDispatcher] = None
+_default_lock = threading.Lock()
+
+
+def get_dispatcher() -> NotifyDispatcher:
+    """Диспетчер процесса; настройки - TULA_NOTIFY_*"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                rate = float(os.getenv("TULA_NOTIFY_RATE", "0")) or None
+                batch = int(os.getenv("TULA_NOTIFY_BATCH_SIZE", "100"))
+                _default = NotifyDispatcher(
+                    providers={
+                        channel: LocalProvider(channel, max_batch=batch, rate=rate)
+                        for channel in CHANNELS
+                    },
+                    linger=float(os.getenv("TULA_NOTIFY_LINGER", "0.01")),
+                    retries=int(os.getenv("TULA_NOTIFY_RETRIES", "3")),
+                    backoff=float(os.getenv("TULA_NOTIFY_BACKOFF", "0.1"))
+                )
+    return _default
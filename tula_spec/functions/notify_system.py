@@ -5,12 +5,18 @@ JALM Tula Function
 Использование в JALM:
 IMPORT notify_system v1.0.0
 RUN notification_id := notify_system.send(message, channel, recipient, type)
+RUN report := notify_system.send_many(notifications)
 """
 
+import concurrent.futures
+import os
 import uuid
-import json
-from typing import Dict, Any, Optional
-from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from notify_dispatcher import Notification, get_dispatcher
+
+# Сколько ждать доставки, секунды (меньше runtime.timeout в реестре); дольше - статус "pending"
+WAIT_TIMEOUT = float(os.getenv("TULA_NOTIFY_WAIT_TIMEOUT", "4"))
 
 
 def send(message: str, channel: str, recipient: str, 
@@ -38,15 +44,13 @@ def send(message: str, channel: str, recipient: str,
                 "error": "Неверные входные данные"
             }
         
-        # Создание уведомления
-        notification_id = str(uuid.uuid4())
-        
-        # Имитация отправки
-        status = _send_notification(message, channel, recipient, notification_type)
+        # Отправка через очередь канала вместе с параллельными вызовами
+        notification = Notification(str(uuid.uuid4()), message, channel, recipient, notification_type)
+        get_dispatcher().submit([notification])
         
         return {
-            "notification_id": notification_id,
-            "status": status
+            "notification_id": notification.notification_id,
+            "status": _wait(notification)
         }
         
     except Exception as e:
@@ -57,6 +61,67 @@ def send(message: str, channel: str, recipient: str,
         }
 
 
+def send_many(notifications: List[Dict[str, Any]], wait: bool = True) -> List[Dict[str, Any]]:
+    """
+    Пакетная отправка уведомлений
+    
+    Уведомления ставятся в очереди каналов сразу все и уходят пачками
+    провайдера, а не по одному вызову на сообщение.
+    
+    Args:
+        notifications: Список словарей с полями message, channel, recipient
+            и необязательным notification_type, как у send
+        wait: Ждать доставки; False - вернуть статус "pending" сразу
+    
+    Returns:
+        Список результатов send в порядке входных уведомлений
+    """
+    results: List[Dict[str, Any]] = []
+    queued: List[Notification] = []
+    
+    for data in notifications:
+        notification_id = str(uuid.uuid4())
+        try:
+            message, channel, recipient = data["message"], data["channel"], data["recipient"]
+            valid = _validate_input(message, channel, recipient)
+        except (KeyError, TypeError, AttributeError):
+            valid = False
+        if not valid:
+            results.append({
+                "notification_id": notification_id,
+                "status": "failed",
+                "error": "Неверные входные данные"
+            })
+            continue
+        
+        notification = Notification(notification_id, message, channel, recipient, data.get("notification_type"))
+        queued.append(notification)
+        results.append({"notification_id": notification_id, "status": "pending"})
+    
+    get_dispatcher().submit(queued)
+    
+    if wait:
+        # Один общий таймаут на всю пачку
+        concurrent.futures.wait([notification.future for notification in queued], timeout=WAIT_TIMEOUT)
+        statuses = {
+            notification.notification_id: notification.future.result()
+            for notification in queued if notification.future.done()
+        }
+        for result in results:
+            if result["notification_id"] in statuses:
+                result["status"] = statuses[result["notification_id"]]
+    
+    return results
+
+
+def _wait(notification: Notification) -> str:
+    """Статус доставки уведомления"""
+    try:
+        return notification.future.result(timeout=WAIT_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        return "pending"
+
+
 def _validate_input(message: str, channel: str, recipient: str) -> bool:
     """Валидация входных данных"""
     # Проверка сообщения
@@ -75,23 +140,11 @@ def _validate_input(message: str, channel: str, recipient: str) -> bool:
     return True
 
 
-def _send_notification(message: str, channel: str, recipient: str, 
-                      notification_type: Optional[str]) -> str:
-    """Имитация отправки уведомления"""
-    # В реальной реализации здесь была бы интеграция с сервисами
-    # Пока возвращаем "sent" для имитации успешной отправки
-    
-    # Логирование для отладки
-    print(f"[NOTIFY] {channel.upper()}: {recipient} - {message}")
-    
-    return "sent"
-
-
 def get_info() -> Dict[str, Any]:
     """Возвращает информацию о функции"""
     return {
         "name": "notify_system",
         "version": "1.0.0",
         "description": "Система уведомлений",
-        "functions": ["send"]
+        "functions": ["send", "send_many"]
     } 
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+Slot Availability - Поиск свободных слотов
+JALM Tula Function
+
+Использование в JALM:
+IMPORT slot_availability v1.0.0
+RUN free_slots := slot_availability.find(query)
+"""
+
+import math
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Any, List
+
+from slot_index import get_index, parse_datetime
+
+MAX_LIMIT = 1000
+MAX_RANGE_DAYS = 366
+
+
+def find(query: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Ищет первые свободные слоты заданной длительности
+
+    Args:
+        query: Словарь с параметрами поиска или обертка {"query": {...}}
+            - service_id: UUID услуги
+            - calendar_id: календарь (опционально, как в slot_validator)
+            - duration: длительность в минутах (15-480)
+            - start, end: границы поиска, строки в формате ISO
+            - limit: сколько слотов вернуть (по умолчанию 10)
+            - step: шаг сетки начала слотов в минутах (по умолчанию 15)
+
+    Returns:
+        Словарь с результатом:
+            - slots: список {"datetime", "duration"} по возрастанию времени
+            - status: "ok" или "invalid"
+            - message: описание результата
+    """
+    started = time.perf_counter()
+    try:
+        if "query" in query:
+            query = query["query"]
+
+        resource = str(query.get("calendar_id") or query["service_id"])
+        uuid.UUID(str(query["service_id"]))
+        duration = int(query["duration"])
+        step = int(query.get("step", 15))
+        limit = int(query.get("limit", 10))
+        range_start = parse_datetime(query["start"]).timestamp()
+        range_end = parse_datetime(query["end"]).timestamp()
+
+        if not (15 <= duration <= 480) or step <= 0 or not (0 < limit <= MAX_LIMIT):
+            return _invalid("Неверные параметры поиска", started)
+        if not (range_start < range_end <= range_start + MAX_RANGE_DAYS * 86400):
+            return _invalid("Неверный диапазон поиска", started)
+
+        slots = _first_free(resource, range_start, range_end, duration * 60, step * 60, limit)
+
+        return {
+            "slots": [
+                {
+                    "datetime": datetime.fromtimestamp(slot, tz=timezone.utc).isoformat().replace("+00:00", "Z"),
+                    "duration": duration
+                }
+                for slot in slots
+            ],
+            "status": "ok",
+            "message": f"Найдено свободных слотов: {len(slots)}",
+            "search_time": time.perf_counter() - started
+        }
+
+    except (KeyError, ValueError, TypeError, AttributeError) as e:
+        return _invalid(f"Ошибка параметров поиска: {str(e)}", started)
+
+
+def _first_free(resource: str, range_start: float, range_end: float,
+                duration: float, step: float, limit: int) -> List[float]:
+    """
+    Развёртка по свободным промежуткам индекса
+
+    Начала слотов выравниваются по сетке step от полуночи UTC; перебор
+    останавливается, как только набрано limit слотов.
+    """
+    slots: List[float] = []
+    for gap_start, gap_end in get_index().iter_free(resource, range_start, range_end):
+        candidate = math.ceil(gap_start / step) * step
+        while candidate + duration <= gap_end:
+            slots.append(candidate)
+            if len(slots) >= limit:
+                return slots
+            candidate += step
+    return slots
+
+
+def _invalid(message: str, started: float) -> Dict[str, Any]:
+    """Результат для неверного запроса"""
+    return {
+        "slots": [],
+        "status": "invalid",
+        "message": message,
+        "search_time": time.perf_counter() - started
+    }
+
+
+# Функции для тестирования
+def get_info() -> Dict[str, Any]:
+    """Возвращает информацию о функции"""
+    return {
+        "name": "slot_availability",
+        "version": "1.0.0",
+        "description": "Поиск свободных слотов бронирования",
+        "functions": ["find"]
+    }
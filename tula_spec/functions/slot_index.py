@@ -0,0 +1,242 @@
+"""
+Slot Index - Индекс бронирований для slot_validator
+Вспомогательный модуль функций Tula (не регистрируется в реестре)
+
+Бронирования хранятся в SQLite и в памяти - по отсортированным массивам
+на каждый ресурс (календарь или услугу). Бронирования одного ресурса
+не пересекаются, поэтому пересечение с интервалом [start, end) проверяется
+одним бинарным поиском: достаточно бронирования с наибольшим началом < end.
+"""
+
+import bisect
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Бронирований за один проход iter_free под блокировкой
+GAPS_CHUNK = 256
+
+
+def parse_datetime(value: str) -> datetime:
+    """ISO-время; без часового пояса считается UTC"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class _Timeline:
+    """Непересекающиеся бронирования ресурса, отсортированные по началу"""
+
+    __slots__ = ("starts", "ends", "ids")
+
+    def __init__(self):
+        self.starts: List[float] = []
+        self.ends: List[float] = []
+        self.ids: List[str] = []
+
+    def conflict(self, start: float, end: float) -> Optional[str]:
+        """Бронирование, пересекающееся с [start, end), за O(log n)"""
+        position = bisect.bisect_left(self.starts, end) - 1
+        if position >= 0 and self.ends[position] > start:
+            return self.ids[position]
+        return None
+
+    def conflicts(self, intervals: List[Tuple[int, float, float]]) -> Iterator[Tuple[int, Optional[str]]]:
+        """
+        Пересечения для интервалов (номер, начало, конец), отсортированных
+        по концу: поиск продолжается с позиции предыдущего интервала
+        """
+        low = 0
+        for number, start, end in intervals:
+            low = bisect.bisect_left(self.starts, end, low)
+            position = low - 1
+            if position >= 0 and self.ends[position] > start:
+                yield number, self.ids[position]
+            else:
+                yield number, None
+
+    def insert(self, start: float, end: float, slot_uuid: str):
+        """Вставка с сохранением порядка"""
+        position = bisect.bisect_left(self.starts, start)
+        self.starts.insert(position, start)
+        self.ends.insert(position, end)
+        self.ids.insert(position, slot_uuid)
+
+    def remove(self, start: float, slot_uuid: str) -> bool:
+        """Удаление бронирования"""
+        position = bisect.bisect_left(self.starts, start)
+        while position < len(self.starts) and self.starts[position] == start:
+            if self.ids[position] == slot_uuid:
+                del self.starts[position], self.ends[position], self.ids[position]
+                return True
+            position += 1
+        return False
+
+    def gaps(self, start: float, end: float, limit: int) -> Tuple[List[Tuple[float, float]], float]:
+        """
+        Свободные промежутки внутри [start, end) по порядку, не дальше
+        limit бронирований; возвращает промежутки и точку, с которой
+        продолжать (end, если диапазон пройден)
+        """
+        # Первое бронирование, которое может заходить в начало диапазона
+        position = max(bisect.bisect_right(self.starts, start) - 1, 0)
+        stop = position + limit
+        cursor = start
+        gaps = []
+        while position < len(self.starts) and self.starts[position] < end:
+            if position == stop:
+                return gaps, cursor
+            if self.starts[position] > cursor:
+                gaps.append((cursor, self.starts[position]))
+            cursor = max(cursor, self.ends[position])
+            position += 1
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps, end
+
+
+class SlotIndex:
+    """
+    Индекс бронирований с хранилищем SQLite
+
+    При открытии загружает все бронирования, дальше обновляется
+    по одной записи. Чтение и запись массивов идут под одной блокировкой:
+    функции исполняются в пуле потоков. Индекс живёт в процессе:
+    slot_validator должен исполняться в режиме inline или thread,
+    а не в пуле процессов.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS bookings ("
+            "slot_uuid TEXT PRIMARY KEY, resource TEXT NOT NULL, "
+            "start_ts REAL NOT NULL, end_ts REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._timelines: Dict[str, _Timeline] = {}
+        # slot_uuid -> (ресурс, начало) для отмены
+        self._slots: Dict[str, Tuple[str, float]] = {}
+
+        rows = self._conn.execute(
+            "SELECT slot_uuid, resource, start_ts, end_ts FROM bookings ORDER BY resource, start_ts"
+        )
+        for slot_uuid, resource, start, end in rows:
+            timeline = self._timelines.setdefault(resource, _Timeline())
+            # Строки уже отсортированы: добавление в конец без сдвига
+            timeline.starts.append(start)
+            timeline.ends.append(end)
+            timeline.ids.append(slot_uuid)
+            self._slots[slot_uuid] = (resource, start)
+
+    def conflict(self, resource: str, start: float, end: float) -> Optional[str]:
+        """slot_uuid бронирования, пересекающегося с [start, end), или None"""
+        with self._lock:
+            return self._conflict(resource, start, end)
+
+    def _conflict(self, resource: str, start: float, end: float) -> Optional[str]:
+        timeline = self._timelines.get(resource)
+        return timeline.conflict(start, end) if timeline is not None else None
+
+    def conflicts(self, intervals: List[Tuple[str, float, float]]) -> List[Optional[str]]:
+        """
+        conflict для списка интервалов (ресурс, начало, конец) за один проход
+        по индексу каждого ресурса и одно взятие блокировки
+        """
+        by_resource: Dict[str, List[Tuple[int, float, float]]] = {}
+        for number, (resource, start, end) in enumerate(intervals):
+            by_resource.setdefault(resource, []).append((number, start, end))
+
+        found: List[Optional[str]] = [None] * len(intervals)
+        with self._lock:
+            for resource, queries in by_resource.items():
+                timeline = self._timelines.get(resource)
+                if timeline is None:
+                    continue
+                queries.sort(key=lambda query: query[2])
+                for number, slot_uuid in timeline.conflicts(queries):
+                    found[number] = slot_uuid
+        return found
+
+    def book(self, resource: str, start: float, end: float, slot_uuid: str) -> bool:
+        """Бронирование интервала; False, если он занят"""
+        with self._lock:
+            if self._conflict(resource, start, end) is not None:
+                return False
+            self._conn.execute(
+                "INSERT INTO bookings (slot_uuid, resource, start_ts, end_ts) VALUES (?, ?, ?, ?)",
+                (slot_uuid, resource, start, end)
+            )
+            self._timelines.setdefault(resource, _Timeline()).insert(start, end, slot_uuid)
+            self._slots[slot_uuid] = (resource, start)
+            return True
+
+    def cancel(self, slot_uuid: str) -> bool:
+        """Отмена бронирования"""
+        with self._lock:
+            entry = self._slots.pop(slot_uuid, None)
+            if entry is None:
+                return False
+            self._conn.execute("DELETE FROM bookings WHERE slot_uuid = ?", (slot_uuid,))
+            resource, start = entry
+            return self._timelines[resource].remove(start, slot_uuid)
+
+    def iter_free(self, resource: str, start: float, end: float) -> Iterator[Tuple[float, float]]:
+        """
+        Свободные промежутки ресурса внутри [start, end) по мере обхода
+
+        Массивы читаются порциями под блокировкой; между порциями обход
+        продолжается с достигнутой точки, так что бронирования и отмены
+        не ждут, пока вызывающий дочитает промежутки.
+        """
+        cursor = start
+        while cursor < end:
+            with self._lock:
+                timeline = self._timelines.get(resource)
+                if timeline is None:
+                    gaps, cursor = [(cursor, end)], end
+                else:
+                    gaps, cursor = timeline.gaps(cursor, end, GAPS_CHUNK)
+            yield from gaps
+
+    def free_intervals(self, resource: str, start: float, end: float) -> List[Tuple[float, float]]:
+        """Все свободные промежутки ресурса внутри [start, end)"""
+        return list(self.iter_free(resource, start, end))
+
+    def count(self, resource: Optional[str] = None) -> int:
+        """Число бронирований ресурса или всех"""
+        with self._lock:
+            if resource is None:
+                return len(self._slots)
+            timeline = self._timelines.get(resource)
+            return len(timeline.starts) if timeline is not None else 0
+
+    def close(self):
+        """Закрытие хранилища"""
+        self._conn.close()
+
+
+_default: Optional[SlotIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_index() -> SlotIndex:
+    """Индекс процесса; хранилище - TULA_SLOT_STORE"""
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None:
+                path = os.getenv("TULA_SLOT_STORE") or os.path.join(
+                    tempfile.gettempdir(), "jalm", "tula_slots.db"
+                )
+                _default = SlotIndex(path)
+    return _default
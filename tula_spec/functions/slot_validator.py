@@ -5,23 +5,31 @@ JALM Tula Function
 Использование в JALM:
 IMPORT slot_validator tula:hash~ab12fe
 RUN slot_uuid := slot_validator.create(slot)
+RUN booking := slot_validator.book(slot)
 """
 
 import uuid
 import json
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+
+from slot_index import get_index, parse_datetime
 
 
 def create(slot_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Создает и валидирует слот бронирования
     
+    Только проверка: слот не бронируется, индекс не меняется.
+    Бронирование - отдельная операция book.
+    
     Args:
         slot_data: Словарь с данными слота или обертка {"slot": {...}}
             - datetime: строка в формате ISO
             - duration: длительность в минутах (15-480)
             - service_id: UUID услуги
+            - calendar_id: календарь (мастер, кресло), опционально;
+              без него слоты не пересекаются в пределах услуги
     
     Returns:
         Словарь с результатом:
@@ -44,7 +52,7 @@ def create(slot_data: Dict[str, Any]) -> Dict[str, Any]:
                 "message": "Неверные входные данные"
             }
         
-        # Проверка конфликтов (имитация)
+        # Проверка пересечения с бронированиями без записи
         if _check_conflicts(slot):
             return {
                 "slot_uuid": str(uuid.uuid4()),
@@ -52,11 +60,8 @@ def create(slot_data: Dict[str, Any]) -> Dict[str, Any]:
                 "message": "Слот уже занят"
             }
         
-        # Создание слота
-        slot_uuid = str(uuid.uuid4())
-        
         return {
-            "slot_uuid": slot_uuid,
+            "slot_uuid": str(uuid.uuid4()),
             "status": "valid",
             "message": "Слот успешно создан"
         }
@@ -69,6 +74,93 @@ def create(slot_data: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
+def create_many(slots_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Пакетная валидация слотов за один вызов
+    
+    Слоты проверяются независимо и не бронируются: пересекающиеся
+    кандидаты не исключают друг друга.
+    
+    Args:
+        slots_data: Список слотов в том же формате, что и для create
+    
+    Returns:
+        Список результатов create в порядке входных слотов
+    
+    Каждый слот разбирается один раз, пересечения всех корректных слотов
+    проверяются одним проходом по индексу (SlotIndex.conflicts).
+    """
+    intervals: List[Optional[Tuple[str, float, float]]] = []
+    for slot_data in slots_data:
+        try:
+            intervals.append(_parse_slot(slot_data))
+        except Exception:
+            intervals.append(None)
+    
+    valid = [interval for interval in intervals if interval is not None]
+    found = iter(get_index().conflicts(valid))
+    
+    results = []
+    for interval in intervals:
+        if interval is None:
+            results.append({
+                "slot_uuid": str(uuid.uuid4()),
+                "status": "invalid",
+                "message": "Неверные входные данные"
+            })
+        elif next(found) is not None:
+            results.append({
+                "slot_uuid": str(uuid.uuid4()),
+                "status": "conflict",
+                "message": "Слот уже занят"
+            })
+        else:
+            results.append({
+                "slot_uuid": str(uuid.uuid4()),
+                "status": "valid",
+                "message": "Слот успешно создан"
+            })
+    return results
+
+
+def book(slot_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Бронирует слот
+    
+    Args:
+        slot_data: Слот в том же формате, что и для create
+    
+    Returns:
+        Словарь с результатом:
+            - slot_uuid: UUID бронирования (для cancel)
+            - status: "booked", "invalid" или "conflict"
+            - message: описание результата
+    """
+    slot = slot_data["slot"] if "slot" in slot_data else slot_data
+    if not _validate_input(slot):
+        return {
+            "slot_uuid": str(uuid.uuid4()),
+            "status": "invalid",
+            "message": "Неверные входные данные"
+        }
+    
+    # Проверка пересечения и запись под одной блокировкой индекса
+    slot_uuid = str(uuid.uuid4())
+    resource, start, end = _slot_interval(slot)
+    if not get_index().book(resource, start, end, slot_uuid):
+        return {
+            "slot_uuid": str(uuid.uuid4()),
+            "status": "conflict",
+            "message": "Слот уже занят"
+        }
+    
+    return {
+        "slot_uuid": slot_uuid,
+        "status": "booked",
+        "message": "Слот забронирован"
+    }
+
+
 def _validate_input(slot: Dict[str, Any]) -> bool:
     """Валидация входных данных"""
     try:
@@ -79,7 +171,7 @@ def _validate_input(slot: Dict[str, Any]) -> bool:
                 return False
         
         # Валидация datetime
-        datetime.fromisoformat(slot["datetime"].replace("Z", "+00:00"))
+        parse_datetime(slot["datetime"])
         
         # Валидация duration
         duration = int(slot["duration"])
@@ -95,11 +187,50 @@ def _validate_input(slot: Dict[str, Any]) -> bool:
         return False
 
 
+def _parse_slot(slot_data: Dict[str, Any]) -> Optional[Tuple[str, float, float]]:
+    """Ресурс и интервал слота (в том числе в обертке {"slot": ...}); None, если данные неверны"""
+    slot = slot_data["slot"] if "slot" in slot_data else slot_data
+    try:
+        if any(field not in slot for field in ("datetime", "duration", "service_id")):
+            return None
+        start = parse_datetime(slot["datetime"]).timestamp()
+        duration = int(slot["duration"])
+        if not (15 <= duration <= 480):
+            return None
+        uuid.UUID(slot["service_id"])
+    except (ValueError, TypeError, AttributeError):
+        return None
+    return _resource(slot), start, start + duration * 60
+
+
+def _resource(slot: Dict[str, Any]) -> str:
+    """Ресурс, в пределах которого слоты не пересекаются"""
+    return str(slot.get("calendar_id") or slot["service_id"])
+
+
+def _slot_interval(slot: Dict[str, Any]) -> Tuple[str, float, float]:
+    """Ресурс и интервал слота [начало, конец) в секундах Unix"""
+    start = parse_datetime(slot["datetime"]).timestamp()
+    return _resource(slot), start, start + int(slot["duration"]) * 60
+
+
 def _check_conflicts(slot: Dict[str, Any]) -> bool:
-    """Проверка конфликтов с существующими слотами (имитация)"""
-    # В реальной реализации здесь была бы проверка БД
-    # Пока возвращаем False (нет конфликтов)
-    return False
+    """Проверка пересечения с существующими бронированиями по индексу"""
+    resource, start, end = _slot_interval(slot)
+    return get_index().conflict(resource, start, end) is not None
+
+
+def cancel(slot_uuid: str) -> Dict[str, Any]:
+    """
+    Отменяет бронирование слота
+    
+    Returns:
+        Словарь с результатом:
+            - slot_uuid: UUID слота
+            - status: "cancelled" или "not_found"
+    """
+    cancelled = get_index().cancel(slot_uuid)
+    return {"slot_uuid": slot_uuid, "status": "cancelled" if cancelled else "not_found"}
 
 
 # Функции для тестирования
@@ -109,7 +240,7 @@ def get_info() -> Dict[str, Any]:
         "name": "slot_validator",
         "version": "1.3.2",
         "description": "Валидатор слотов бронирования",
-        "functions": ["create"]
+        "functions": ["create", "create_many", "book", "cancel"]
     }
 
 
@@ -0,0 +1,21 @@
+"""
+Общие фикстуры тестов Tula Spec
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем путь к функциям
+sys.path.append(str(Path(__file__).parent.parent / "functions"))
+
+import pytest
+import slot_index
+
+
+@pytest.fixture(autouse=True)
+def slot_store(monkeypatch):
+    """Каждый тест работает с пустым индексом бронирований в памяти"""
+    index = slot_index.SlotIndex(":memory:")
+    monkeypatch.setattr(slot_index, "_default", index)
+    yield index
+    index.close()
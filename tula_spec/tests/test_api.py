@@ -0,0 +1,133 @@
+"""
+Тесты API Tula Spec
+"""
+
+import sys
+from pathlib import Path
+
+# Добавляем путь к API
+sys.path.append(str(Path(__file__).parent.parent / "api"))
+
+import pytest
+from fastapi.testclient import TestClient
+import main
+
+SERVICE_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+def slot(start, duration=60):
+    return {"slot": {"datetime": start, "duration": duration, "service_id": SERVICE_ID}}
+
+
+@pytest.fixture(scope="module")
+def client():
+    """Клиент приложения с реестром функций репозитория"""
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def execute(client, function_id, params, operation=None):
+    body = {"params": params}
+    if operation:
+        body["operation"] = operation
+    response = client.post(f"/functions/{function_id}/execute", json=body)
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestBooking:
+    """Бронирование через операции slot_validator"""
+
+    def test_overlapping_booking_rejected(self, client):
+        """Второе пересекающееся бронирование отклоняется, после отмены слот свободен"""
+        first = execute(client, "slot_validator", slot("2024-06-15T10:00:00Z"), "book")
+        assert first["status"] == "success"
+        assert first["result"]["status"] == "booked"
+
+        second = execute(client, "slot_validator", slot("2024-06-15T10:30:00Z"), "book")
+        assert second["result"]["status"] == "conflict"
+        # Проверка без бронирования видит занятый слот
+        check = execute(client, "slot_validator", slot("2024-06-15T10:30:00Z"))
+        assert check["result"]["status"] == "conflict"
+
+        cancelled = execute(client, "slot_validator", {"slot_uuid": first["result"]["slot_uuid"]}, "cancel")
+        assert cancelled["result"]["status"] == "cancelled"
+        again = execute(client, "slot_validator", slot("2024-06-15T10:30:00Z"), "book")
+        assert again["result"]["status"] == "booked"
+
+    def test_unknown_operation(self, client):
+        """Операции вне implementation.operations не вызываются"""
+        result = execute(client, "slot_validator", slot("2024-06-15T10:00:00Z"), "get_info")
+        assert result["status"] == "error"
+        assert "get_info" in result["result"]["error"]
+
+
+class TestBatchExecution:
+    """POST /functions/{id}/execute_batch"""
+
+    def test_batch_entry_point(self, client):
+        """Наборы из одного параметра уходят в пакетную точку входа"""
+        response = client.post("/functions/slot_validator/execute_batch", json={"params": [
+            slot("2024-06-15T10:00:00Z"), slot("2024-06-15T11:00:00Z", duration=5)
+        ]})
+        body = response.json()
+
+        assert response.status_code == 200
+        assert body["mode"] == "batch" and body["status"] == "success"
+        assert [result["status"] for result in body["results"]] == ["valid", "invalid"]
+
+    def test_kwargs_batch(self, client):
+        """Именованные наборы передаются пакетной точке входа списком словарей"""
+        response = client.post("/functions/notify_system/execute_batch", json={"params": [
+            {"message": "Напоминание", "channel": "email", "recipient": "a@example.com"},
+            {"message": "Напоминание", "channel": "pigeon", "recipient": "b@example.com"}
+        ]})
+        body = response.json()
+
+        assert body["mode"] == "batch"
+        assert [result["status"] for result in body["results"]] == ["sent", "failed"]
+
+    def test_map_with_item_errors(self, client):
+        """Без пакетной точки входа наборы выполняются по одному, ошибка набора остаётся в нём"""
+        calendar_id = "123e4567-e89b-12d3-a456-426614174001"
+        response = client.post("/functions/booking_widget/execute_batch", json={"params": [
+            {"calendar_id": calendar_id, "user_id": "u1"},
+            {"calendar_id": calendar_id, "unknown": 1},
+            {"calendar_id": calendar_id}
+        ]})
+        body = response.json()
+
+        assert body["mode"] == "map" and body["status"] == "error"
+        assert "error" not in body["results"][0] and "error" not in body["results"][2]
+        assert "unknown" in body["results"][1]["error"]
+
+    def test_too_many_params(self, client, monkeypatch):
+        """Больше TULA_BATCH_MAX_SIZE наборов - 413"""
+        monkeypatch.setattr(main, "BATCH_MAX_SIZE", 2)
+        response = client.post("/functions/slot_validator/execute_batch", json={
+            "params": [slot("2024-06-15T10:00:00Z")] * 3
+        })
+        assert response.status_code == 413
+
+
+class TestCatalogCaching:
+    """ETag списка функций"""
+
+    def test_functions_not_modified(self, client):
+        """Повторный GET /functions с If-None-Match - 304 без тела"""
+        first = client.get("/functions", params={"tag": "booking"})
+        assert first.status_code == 200
+        assert {function["id"] for function in first.json()} == {"slot_validator", "booking_widget", "slot_availability"}
+
+        second = client.get("/functions", params={"tag": "booking"},
+                            headers={"If-None-Match": first.headers["etag"]})
+        assert second.status_code == 304
+        assert second.content == b""
+
+        # Другой фильтр - другое тело и другой ETag
+        other = client.get("/functions", headers={"If-None-Match": first.headers["etag"]})
+        assert other.status_code == 200
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
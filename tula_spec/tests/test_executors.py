@@ -0,0 +1,100 @@
+"""
+Тесты для исполнения функций вне event loop
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Добавляем путь к API
+sys.path.append(str(Path(__file__).parent.parent / "api"))
+
+import pytest
+from executors import ExecutionBackend, FunctionTimeout
+from modules import ModuleCache
+
+HEAVY_MODULE = """
+import os
+import time
+
+def pid(_):
+    return os.getpid()
+
+def slow(seconds):
+    time.sleep(seconds)
+    return seconds
+"""
+
+
+def metadata(function, executor, timeout=5):
+    return {
+        "id": function,
+        "implementation": {"file": "heavy.py", "function": function},
+        "runtime": {"language": "python", "executor": executor, "timeout": timeout}
+    }
+
+
+@pytest.fixture
+def backend(tmp_path):
+    (tmp_path / "heavy.py").write_text(HEAVY_MODULE, encoding="utf-8")
+    backend = ExecutionBackend(ModuleCache(tmp_path), thread_workers=4, process_workers=2)
+    yield backend
+    backend.close()
+
+
+class TestExecutionBackend:
+    """Тесты для ExecutionBackend"""
+
+    def test_thread_mode_does_not_block_loop(self, backend):
+        """Блокирующие функции в пуле потоков идут параллельно, event loop свободен"""
+        async def scenario():
+            module = backend.modules.get("heavy.py")
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    await asyncio.sleep(0.01)
+                    ticks += 1
+
+            tick_task = asyncio.create_task(ticker())
+            started = time.perf_counter()
+            results = await asyncio.gather(*[
+                backend.call(metadata("slow", "thread"), module.slow, (0.2,)) for _ in range(4)
+            ])
+            elapsed = time.perf_counter() - started
+            tick_task.cancel()
+
+            assert results == [0.2] * 4
+            assert elapsed < 0.6
+            assert ticks >= 5
+
+        asyncio.run(scenario())
+
+    def test_process_mode_runs_in_worker(self, backend):
+        """В режиме process функция выполняется в другом процессе"""
+        async def scenario():
+            module = backend.modules.get("heavy.py")
+            return await backend.call(metadata("pid", "process"), module.pid, (None,))
+
+        assert asyncio.run(scenario()) != os.getpid()
+
+    def test_timeout(self, backend):
+        """Функция дольше таймаута завершается ошибкой"""
+        async def scenario():
+            module = backend.modules.get("heavy.py")
+            with pytest.raises(FunctionTimeout):
+                await backend.call(metadata("slow", "thread", timeout=0.05), module.slow, (0.3,))
+
+        asyncio.run(scenario())
+
+    def test_unknown_mode(self, backend):
+        """Неизвестный режим в runtime - ошибка"""
+        with pytest.raises(ValueError):
+            backend.mode(metadata("pid", "gpu"))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,95 @@
+"""
+Тесты для кэша ответов каталога
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Добавляем путь к API и общим модулям каталогов
+sys.path.append(str(Path(__file__).parent.parent / "api"))
+sys.path.append(str(Path(__file__).parent.parent.parent / "shared"))
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from http_cache import ResponseCache
+from registry import FunctionRegistry
+from test_registry import function, write_registry
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    """Приложение со списком функций из временного реестра"""
+    path = tmp_path / "functions.json"
+    write_registry(path, [function(f"f{i}", "1.0.0", f"h{i}", tags=["booking"]) for i in range(50)])
+    registry = FunctionRegistry(path)
+    cache = ResponseCache(gzip_min_size=1024)
+    builds = []
+    app = FastAPI()
+
+    @app.get("/functions")
+    async def list_functions(request: Request):
+        snapshot = registry.snapshot
+
+        def build():
+            builds.append(snapshot.version)
+            return json.dumps(snapshot.functions).encode()
+
+        return cache.respond(request, snapshot.version, "functions", build)
+
+    return TestClient(app), registry, path, cache, builds
+
+
+class TestResponseCache:
+    """Тесты для ResponseCache"""
+
+    def test_body_built_once_per_version(self, catalog):
+        """Повторные запросы отдают готовое тело"""
+        client, _, _, cache, builds = catalog
+        first = client.get("/functions")
+        second = client.get("/functions")
+
+        assert first.json() == second.json()
+        assert first.headers["etag"] == second.headers["etag"]
+        assert len(builds) == 1
+        assert cache.stats()["hits"] == 1
+
+    def test_if_none_match(self, catalog):
+        """Совпадающий ETag - 304 без тела"""
+        client = catalog[0]
+        etag = client.get("/functions").headers["etag"]
+
+        response = client.get("/functions", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert client.get("/functions", headers={"If-None-Match": 'W/"other"'}).status_code == 200
+
+    def test_reload_invalidates(self, catalog):
+        """Перезагрузка реестра меняет ETag и тело"""
+        client, registry, path, _, builds = catalog
+        etag = client.get("/functions").headers["etag"]
+
+        write_registry(path, [function("f0", "2.0.0", "h0")])
+        assert registry.reload(force=False)
+
+        response = client.get("/functions", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()[0]["version"] == "2.0.0"
+        assert len(builds) == 2
+
+    def test_gzip(self, catalog):
+        """Большой список сжимается, если клиент принимает gzip"""
+        client = catalog[0]
+        plain = client.get("/functions", headers={"Accept-Encoding": "identity"})
+        compressed = client.get("/functions", headers={"Accept-Encoding": "gzip"})
+
+        assert "content-encoding" not in plain.headers
+        assert compressed.headers["content-encoding"] == "gzip"
+        assert compressed.json() == plain.json()
+        assert int(compressed.headers["content-length"]) < len(plain.content)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
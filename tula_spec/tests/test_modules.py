@@ -0,0 +1,64 @@
+"""
+Тесты для кэша модулей функций
+"""
+
+import os
+import sys
+from pathlib import Path
+
+# Добавляем путь к API
+sys.path.append(str(Path(__file__).parent.parent / "api"))
+
+import pytest
+from modules import ModuleCache
+
+
+def write_module(path, body):
+    """Запись модуля с новой отметкой изменения"""
+    path.write_text(body, encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+class TestModuleCache:
+    """Тесты для ModuleCache"""
+
+    def test_module_executed_once(self, tmp_path):
+        """Повторный вызов не исполняет модуль заново"""
+        write_module(tmp_path / "counter.py", "LOADS = []\nLOADS.append(1)\n")
+        cache = ModuleCache(tmp_path)
+
+        first = cache.get("counter.py")
+        second = cache.get("counter.py")
+        assert first is second
+        assert first.LOADS == [1]
+        assert cache.stats() == {"modules": 1, "loads": 1, "hits": 1}
+
+    def test_changed_file_reloaded(self, tmp_path):
+        """Изменение файла инвалидирует модуль"""
+        path = tmp_path / "value.py"
+        write_module(path, "VALUE = 1\n")
+        cache = ModuleCache(tmp_path)
+        assert cache.get("value.py").VALUE == 1
+
+        write_module(path, "VALUE = 2\n")
+        assert cache.get("value.py").VALUE == 2
+        assert cache.loads == 2
+
+    def test_warm_skips_broken_modules(self, tmp_path):
+        """Прогрев загружает модули реестра и не падает на ошибке"""
+        write_module(tmp_path / "good.py", "def run():\n    return 1\n")
+        write_module(tmp_path / "broken.py", "raise RuntimeError('boom')\n")
+        cache = ModuleCache(tmp_path)
+
+        loaded = cache.warm([
+            {"id": "good", "implementation": {"file": "good.py"}},
+            {"id": "broken", "implementation": {"file": "broken.py"}},
+            {"id": "missing", "implementation": {"file": "missing.py"}},
+        ])
+        assert loaded == 1
+        assert cache.stats()["modules"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
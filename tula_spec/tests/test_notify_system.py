@@ -0,0 +1,124 @@
+"""
+Тесты для пакетной отправки уведомлений
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Добавляем путь к функциям
+sys.path.append(str(Path(__file__).parent.parent / "functions"))
+
+import pytest
+import notify_dispatcher
+from notify_dispatcher import LocalProvider, NotificationProvider, NotifyDispatcher, ProviderUnavailable
+from notify_system import send, send_many
+
+
+class FlakyProvider(NotificationProvider):
+    """Провайдер, недоступный первые failures вызовов"""
+
+    def __init__(self, channel, failures):
+        self.channel = channel
+        self.failures = failures
+        self.calls = 0
+
+    async def send_batch(self, notifications):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ProviderUnavailable("503")
+        return ["sent"] * len(notifications)
+
+
+@pytest.fixture
+def dispatcher(monkeypatch):
+    """Отдельный диспетчер с локальными провайдерами на каждый тест"""
+    instance = NotifyDispatcher(
+        providers={channel: LocalProvider(channel, max_batch=50) for channel in notify_dispatcher.CHANNELS},
+        linger=0.01, backoff=0.001
+    )
+    monkeypatch.setattr(notify_dispatcher, "_default", instance)
+    yield instance
+    instance.close()
+
+
+def reminder(index, channel="sms"):
+    return {
+        "message": f"Напоминание о записи #{index}",
+        "channel": channel,
+        "recipient": f"+7900000{index:04d}",
+        "notification_type": "reminder"
+    }
+
+
+class TestNotifySystem:
+    """Тесты для notify_system"""
+
+    def test_send(self, dispatcher):
+        """Одиночная отправка возвращает статус доставки"""
+        result = send("Слот подтвержден", "web", "user@example.com", "confirmed")
+        assert result["status"] == "sent"
+        assert dispatcher.providers["web"].sent[-1].recipient == "user@example.com"
+
+    def test_send_invalid(self, dispatcher):
+        """Неверный канал не ставится в очередь"""
+        assert send("Текст", "fax", "user@example.com")["status"] == "failed"
+        assert dispatcher.stats["queued"] == 0
+
+    def test_send_many_batches_per_channel(self, dispatcher):
+        """Рассылка уходит пачками провайдера, а не по одному сообщению"""
+        notifications = [reminder(i) for i in range(200)] + [reminder(i, "email") for i in range(30)]
+        results = send_many(notifications)
+
+        assert len(results) == 230
+        assert all(result["status"] == "sent" for result in results)
+        assert dispatcher.providers["sms"].batches == 4
+        assert dispatcher.providers["email"].batches == 1
+
+    def test_send_many_coalesces_duplicates(self, dispatcher):
+        """Одинаковые уведомления в пачке отправляются один раз"""
+        results = send_many([reminder(1)] * 5 + [{"message": "", "channel": "sms", "recipient": "x"}])
+
+        assert [result["status"] for result in results] == ["sent"] * 5 + ["failed"]
+        assert len(dispatcher.providers["sms"].sent) == 1
+        assert dispatcher.stats["coalesced"] == 4
+
+    def test_send_many_without_wait(self, dispatcher):
+        """Без ожидания уведомления возвращаются в статусе pending"""
+        results = send_many([reminder(i) for i in range(10)], wait=False)
+        assert all(result["status"] == "pending" for result in results)
+
+    def test_retry_transient_errors(self, dispatcher):
+        """Временные ошибки провайдера повторяются"""
+        provider = FlakyProvider("email", failures=2)
+        dispatcher.register(provider)
+
+        assert send("Текст", "email", "user@example.com")["status"] == "sent"
+        assert provider.calls == 3
+        assert dispatcher.stats["retries"] == 2
+
+    def test_retries_exhausted(self, dispatcher):
+        """После исчерпания повторов уведомление не доставлено"""
+        dispatcher.register(FlakyProvider("email", failures=10))
+        assert send("Текст", "email", "user@example.com")["status"] == "failed"
+
+    def test_rate_limit(self, dispatcher):
+        """Скорость канала ограничена"""
+        dispatcher.register(LocalProvider("sms", max_batch=10, rate=100))
+
+        started = time.perf_counter()
+        send_many([reminder(i) for i in range(300)])
+        # Запас - 100 сообщений, остальные 200 - не быстрее 100 в секунду
+        assert time.perf_counter() - started >= 1.5
+
+    def test_provider_requires_send_batch(self):
+        """Провайдер без send_batch не создаётся"""
+        class Incomplete(NotificationProvider):
+            channel = "web"
+
+        with pytest.raises(TypeError):
+            Incomplete()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,83 @@
+"""
+Тесты для реестра функций
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+# Добавляем путь к API
+sys.path.append(str(Path(__file__).parent.parent / "api"))
+
+import pytest
+from registry import FunctionRegistry
+
+
+def write_registry(path, functions):
+    """Запись реестра с новой отметкой изменения"""
+    path.write_text(json.dumps({
+        "functions": functions,
+        "metadata": {"total_functions": len(functions)}
+    }), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def function(function_id, version, hash, tags=(), author="JALM Team"):
+    return {"id": function_id, "version": version, "hash": hash, "tags": list(tags), "author": author}
+
+
+class TestFunctionRegistry:
+    """Тесты для FunctionRegistry"""
+
+    def test_find_by_id_version_and_hash(self, tmp_path):
+        """Поиск по индексам совпадает с прежним линейным поиском"""
+        path = tmp_path / "functions.json"
+        write_registry(path, [
+            function("slot_validator", "1.3.2", "abc"),
+            function("slot_validator", "1.4.0", "def"),
+        ])
+        snapshot = FunctionRegistry(path).snapshot
+
+        assert snapshot.find("slot_validator")["version"] == "1.3.2"
+        assert snapshot.find("slot_validator", version="1.4.0")["hash"] == "def"
+        assert snapshot.find("slot_validator", hash="def")["version"] == "1.4.0"
+        assert snapshot.find("slot_validator", version="9.9.9") is None
+        assert snapshot.find("missing") is None
+
+    def test_filter_by_tag_and_author(self, tmp_path):
+        """Фильтры по тегу и автору пересекаются, порядок файла сохраняется"""
+        path = tmp_path / "functions.json"
+        write_registry(path, [
+            function("a", "1.0.0", "1", tags=["booking"], author="alice"),
+            function("b", "1.0.0", "2", tags=["booking", "ui"], author="bob"),
+            function("c", "1.0.0", "3", tags=["booking"], author="bob"),
+        ])
+        snapshot = FunctionRegistry(path).snapshot
+
+        assert [f["id"] for f in snapshot.filter(tag="booking")] == ["a", "b", "c"]
+        assert [f["id"] for f in snapshot.filter(tag="booking", author="bob")] == ["b", "c"]
+        assert snapshot.filter(tag="missing") == []
+        assert len(snapshot.filter()) == 3
+
+    def test_reload_swaps_snapshot(self, tmp_path):
+        """Изменённый файл подменяет снимок, испорченный - оставляет прежний"""
+        path = tmp_path / "functions.json"
+        write_registry(path, [function("a", "1.0.0", "1")])
+        registry = FunctionRegistry(path)
+        old = registry.snapshot
+
+        assert not registry.reload(force=False)
+        write_registry(path, [function("a", "2.0.0", "2")])
+        assert registry.reload(force=False)
+        assert registry.snapshot.find("a")["version"] == "2.0.0"
+        assert old.find("a")["version"] == "1.0.0"
+
+        path.write_text("{", encoding="utf-8")
+        assert not registry.reload(force=False)
+        assert registry.snapshot.find("a")["version"] == "2.0.0"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
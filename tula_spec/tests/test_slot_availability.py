@@ -0,0 +1,84 @@
+"""
+Тесты для поиска свободных слотов
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Добавляем путь к функциям
+sys.path.append(str(Path(__file__).parent.parent / "functions"))
+
+import pytest
+from slot_availability import find
+from slot_validator import book as book_slot
+
+SERVICE_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+def book(start, duration=60):
+    result = book_slot({"datetime": start, "duration": duration, "service_id": SERVICE_ID})
+    assert result["status"] == "booked"
+
+
+def query(**overrides):
+    data = {
+        "service_id": SERVICE_ID,
+        "duration": 60,
+        "start": "2024-06-15T09:00:00Z",
+        "end": "2024-06-15T18:00:00Z",
+        "limit": 3,
+        "step": 30
+    }
+    data.update(overrides)
+    return {"query": data}
+
+
+class TestSlotAvailability:
+    """Тесты для slot_availability"""
+
+    def test_skips_booked_intervals(self):
+        """Свободные слоты обходят бронирования и выравниваются по сетке"""
+        book("2024-06-15T09:00:00Z", 90)
+        book("2024-06-15T11:00:00Z", 60)
+
+        result = find(query())
+
+        assert result["status"] == "ok"
+        assert [slot["datetime"] for slot in result["slots"]] == [
+            "2024-06-15T12:00:00Z",
+            "2024-06-15T12:30:00Z",
+            "2024-06-15T13:00:00Z",
+        ]
+
+    def test_found_slot_can_be_booked(self):
+        """Найденный слот бронируется без конфликта"""
+        book("2024-06-15T09:00:00Z", 60)
+        slot = find(query(limit=1))["slots"][0]
+        result = book_slot({"datetime": slot["datetime"], "duration": 60, "service_id": SERVICE_ID})
+        assert result["status"] == "booked"
+
+    def test_invalid_query(self):
+        """Неверные параметры не приводят к исключению"""
+        assert find(query(duration=5))["status"] == "invalid"
+        assert find(query(end="2024-06-15T08:00:00Z"))["status"] == "invalid"
+        assert find(query(start="not-a-date"))["status"] == "invalid"
+
+    def test_busy_calendar_is_fast(self, slot_store):
+        """Поиск по календарю с десятками тысяч бронирований занимает миллисекунды"""
+        day = 86400
+        base = 1718409600  # 2024-06-15T00:00:00Z
+        # Каждый день занят с 00:00 до 23:00, свободен последний час
+        for i in range(20000):
+            slot_store.book(SERVICE_ID, base + i * day, base + i * day + 23 * 3600, f"s{i}")
+
+        started = time.perf_counter()
+        result = find(query(start="2024-06-15T00:00:00Z", end="2025-06-15T00:00:00Z", limit=10))
+        elapsed = time.perf_counter() - started
+
+        assert [slot["datetime"][11:16] for slot in result["slots"]][:2] == ["23:00", "23:00"]
+        assert elapsed < 0.05
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
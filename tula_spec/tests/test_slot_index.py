@@ -0,0 +1,161 @@
+"""
+Тесты для индекса бронирований
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+# Добавляем путь к функциям
+sys.path.append(str(Path(__file__).parent.parent / "functions"))
+
+import pytest
+import slot_index
+from slot_index import SlotIndex
+from slot_validator import book, cancel, create
+
+SERVICE_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+def slot(start, duration=60, calendar_id=None):
+    data = {"datetime": start, "duration": duration, "service_id": SERVICE_ID}
+    if calendar_id:
+        data["calendar_id"] = calendar_id
+    return {"slot": data}
+
+
+class TestSlotIndex:
+    """Тесты для SlotIndex"""
+
+    def test_overlap_detection(self):
+        """Пересечение [start, end): соседние интервалы не конфликтуют"""
+        index = SlotIndex(":memory:")
+        assert index.book("r", 100, 200, "a")
+        assert index.book("r", 300, 400, "b")
+
+        assert index.conflict("r", 150, 160) == "a"
+        assert index.conflict("r", 50, 101) == "a"
+        assert index.conflict("r", 199, 250) == "a"
+        assert index.conflict("r", 350, 500) == "b"
+        assert index.conflict("r", 200, 300) is None
+        assert index.conflict("r", 0, 100) is None
+        assert index.conflict("other", 150, 160) is None
+        assert not index.book("r", 390, 450, "c")
+
+    def test_free_intervals(self):
+        """Свободные промежутки диапазона с учётом бронирования на его границе"""
+        index = SlotIndex(":memory:")
+        index.book("r", 100, 200, "a")
+        index.book("r", 250, 300, "b")
+
+        assert index.free_intervals("r", 150, 400) == [(200, 250), (300, 400)]
+        assert index.free_intervals("r", 0, 100) == [(0, 100)]
+        assert index.free_intervals("r", 100, 200) == []
+        assert index.free_intervals("empty", 0, 10) == [(0, 10)]
+
+    def test_free_intervals_in_chunks(self, monkeypatch):
+        """Обход порциями даёт те же промежутки, что и за один проход"""
+        index = SlotIndex(":memory:")
+        for i in range(10):
+            index.book("r", i * 100, i * 100 + 50, f"s{i}")
+        expected = index.free_intervals("r", 25, 1000)
+
+        monkeypatch.setattr(slot_index, "GAPS_CHUNK", 3)
+        assert index.free_intervals("r", 25, 1000) == expected
+        assert expected[0] == (50, 100) and expected[-1] == (950, 1000) and len(expected) == 10
+
+    def test_persisted_and_cancelled(self, tmp_path):
+        """Бронирования загружаются из хранилища, отмена освобождает интервал"""
+        path = str(tmp_path / "slots.db")
+        index = SlotIndex(path)
+        for i in range(100):
+            index.book("r", i * 10, i * 10 + 5, f"s{i}")
+        index.close()
+
+        index = SlotIndex(path)
+        assert index.count("r") == 100
+        assert index.conflict("r", 502, 503) == "s50"
+        assert index.cancel("s50")
+        assert index.conflict("r", 502, 503) is None
+        assert not index.cancel("s50")
+        index.close()
+        assert SlotIndex(path).count("r") == 99
+
+
+class TestDoubleBooking:
+    """Тесты для бронирования через slot_validator"""
+
+    def test_second_booking_conflicts(self):
+        """Пересекающийся слот той же услуги отклоняется"""
+        first = book(slot("2024-06-15T10:00:00Z"))
+        assert first["status"] == "booked"
+        assert book(slot("2024-06-15T10:30:00+00:00"))["status"] == "conflict"
+        assert book(slot("2024-06-15T11:00:00Z"))["status"] == "booked"
+
+        assert cancel(first["slot_uuid"])["status"] == "cancelled"
+        assert book(slot("2024-06-15T10:30:00Z", duration=30))["status"] == "booked"
+
+    def test_calendars_are_independent(self):
+        """Слоты разных календарей одной услуги не пересекаются"""
+        assert book(slot("2024-06-15T10:00:00Z", calendar_id="master-1"))["status"] == "booked"
+        assert book(slot("2024-06-15T10:00:00Z", calendar_id="master-2"))["status"] == "booked"
+        assert book(slot("2024-06-15T10:00:00Z", calendar_id="master-1"))["status"] == "conflict"
+
+    def test_concurrent_reads_and_writes(self):
+        """Проверки и поиск свободных промежутков идут параллельно с бронированием и отменой"""
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        index = SlotIndex(":memory:")
+        errors = []
+        stop = threading.Event()
+
+        def writer(offset):
+            try:
+                for i in range(3000):
+                    slot_uuid = f"{offset}-{i}"
+                    start = (i * 7 + offset) % 1000 * 10
+                    index.book("r", start, start + 5, slot_uuid)
+                    if i % 2:
+                        index.cancel(slot_uuid)
+            except Exception as e:
+                errors.append(e)
+
+        def reader():
+            try:
+                while not stop.is_set():
+                    index.conflict("r", 0, 5000)
+                    for gap_start, gap_end in index.iter_free("r", 0, 10000):
+                        assert gap_start < gap_end
+            except Exception as e:
+                errors.append(e)
+
+        try:
+            readers = [threading.Thread(target=reader) for _ in range(3)]
+            writers = [threading.Thread(target=writer, args=(offset,)) for offset in range(3)]
+            for thread in readers + writers:
+                thread.start()
+            for thread in writers:
+                thread.join()
+            stop.set()
+            for thread in readers:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+
+        assert errors == []
+        timeline = index._timelines["r"]
+        assert list(timeline.starts) == sorted(timeline.starts)
+        assert index.count("r") == len(timeline.ids)
+
+    def test_create_does_not_book(self, slot_store):
+        """Проверка create не меняет индекс, а видит бронирования book"""
+        assert create(slot("2024-06-15T10:00:00Z"))["status"] == "valid"
+        assert create(slot("2024-06-15T10:00:00Z"))["status"] == "valid"
+        assert slot_store.count() == 0
+
+        book(slot("2024-06-15T10:00:00Z"))
+        assert create(slot("2024-06-15T10:30:00Z"))["status"] == "conflict"
+        assert slot_store.count() == 1
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -10,7 +10,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent / "functions"))
 
 import pytest
-from slot_validator import create, _validate_input, _check_conflicts
+from slot_validator import book, create, create_many, _validate_input, _check_conflicts
 
 
 class TestSlotValidator:
@@ -105,8 +105,59 @@ class TestSlotValidator:
             "service_id": "123e4567-e89b-12d3-a456-426614174000"
         }
         
-        # Пока функция всегда возвращает False (нет конфликтов)
+        # Индекс бронирований пуст - конфликтов нет
         assert _check_conflicts(slot_data) == False
+        
+        # После бронирования тот же интервал занят
+        assert book(slot_data)["status"] == "booked"
+        assert _check_conflicts(slot_data) == True
+    
+    def test_create_many(self):
+        """Тест пакетной валидации: результаты create по порядку слотов"""
+        slots = [
+            {"slot": {
+                "datetime": "2024-06-15T10:00:00Z",
+                "duration": 60,
+                "service_id": "123e4567-e89b-12d3-a456-426614174000"
+            }},
+            {"datetime": "invalid-datetime", "duration": 60,
+             "service_id": "123e4567-e89b-12d3-a456-426614174000"},
+            {"slot": {"datetime": "2024-06-15T10:00:00Z"}}
+        ]
+        
+        results = create_many(slots)
+        
+        assert [r["status"] for r in results] == ["valid", "invalid", "invalid"]
+        # Проверка ничего не бронирует: повторный вызов даёт тот же результат
+        assert [r["status"] for r in create_many(slots)] == ["valid", "invalid", "invalid"]
+    
+    def test_create_many_overlapping_candidates(self):
+        """Пересекающиеся кандидаты не исключают друг друга"""
+        slot_data = {
+            "datetime": "2024-06-15T10:00:00Z",
+            "duration": 60,
+            "service_id": "123e4567-e89b-12d3-a456-426614174000"
+        }
+        overlapping = dict(slot_data, datetime="2024-06-15T10:30:00Z")
+        
+        assert [r["status"] for r in create_many([slot_data, overlapping])] == ["valid", "valid"]
+    
+    def test_create_many_matches_create(self):
+        """Пакетная проверка по индексу совпадает с поштучной"""
+        service_id = "123e4567-e89b-12d3-a456-426614174000"
+        for hour in (9, 12, 15):
+            book({"datetime": f"2024-06-15T{hour:02d}:00:00Z", "duration": 90, "service_id": service_id})
+        slots = [
+            {"datetime": f"2024-06-15T{hour:02d}:{minute:02d}:00Z", "duration": 30,
+             "service_id": service_id, "calendar_id": calendar}
+            for hour in range(8, 18) for minute in (0, 45) for calendar in (None, "chair-1")
+        ]
+        slots.append({"datetime": "2024-06-15T10:00:00Z", "duration": 5, "service_id": service_id})
+        
+        statuses = [r["status"] for r in create_many(slots)]
+        
+        assert statuses == [create(slot)["status"] for slot in slots]
+        assert {"valid", "conflict", "invalid"} == set(statuses)
 
 
 if __name__ == "__main__":